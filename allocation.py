@@ -0,0 +1,211 @@
+"""
+Plant Feed Allocation
+Re-allocates the ore feed between CGP3, CGP2, CGP1 and TGP to maximise LoM
+concentrate or the discounted processing margin. The chart's plant bands
+become just one feasible schedule to compare against.
+
+Per annual period t (resampled with the schedule's LoM method):
+  feed[p, t] <= capacity[p, t]                      plant capacity
+  sum over s <= t of (feed[:, s]) <= stockpile_0 + sum over s <= t of (ore[s])
+                                                    ore mined so far plus the
+                                                    opening stockpile; the
+                                                    stockpile never goes negative
+  maximise  sum of value[p, t] * feed[p, t]
+
+Per-plant recovery is the plant's LoM concentrate / processing ratio. value
+is that recovery for the concentrate objective. For npv it is the discounted
+after-royalty margin per tonne fed (see valuation.py). Mining cost and
+capital do not depend on the allocation and are left out; so is tax, which
+is charged on the total margin.
+
+The capacity constraints and the nested "fed so far" limits define a
+polymatroid. For one of those, filling slots greedily in descending value
+order is optimal. The greedy pass runs over the P*T slots in rank order,
+with every step vectorized across the whole batch of scenarios. A
+28-year x 4-plant problem takes a few milliseconds, and thousands of
+variants take a fraction of a second.
+
+Usage: python allocation.py [SCENARIOS_DIR|MANIFEST.json|STORE.cols] [--objective concentrate|npv]
+                            [--capacity cgp1=2.5 ...] [--price 1200] [--fx 0.65] [--rate 0.0732]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from lom_schedule import PLANTS
+from resample import period_end, resample_array, total_weights
+from valuation import DISCOUNT_RATE, PER_TONNE_PROCESSED, ROYALTY_RATE, discount_factors
+
+OBJECTIVES = ("concentrate", "npv")
+
+
+# ==============================================================================
+# BATCHED GREEDY SOLVE
+# ==============================================================================
+
+def allocate(ore, stock0, capacity, value):
+    """Optimal feed (S, P, T) for a batch of S problems.
+
+    ore (S, T) Mt mined per period, stock0 (S,) opening stockpile,
+    capacity (S, P, T) Mt per period, value (S, P, T) per Mt fed. Slots with
+    value <= 0 are left empty; among slots of equal value the earlier period
+    is filled first.
+    """
+    S, P, T = capacity.shape
+    v = value.reshape(S, P * T)
+    cap = capacity.reshape(S, P * T)
+    # slack[:, t]: ore available through period t minus feed through t
+    slack = stock0[:, None] + np.cumsum(ore, axis=-1)
+    feed = np.zeros((S, P * T))
+    # descending value; earliest period first among equal values
+    order = np.lexsort((np.broadcast_to(np.tile(np.arange(T), P), v.shape), -v), axis=1)
+    rows = np.arange(S)
+    periods = np.arange(T)
+
+    for rank in range(P * T):
+        slot = order[:, rank]
+        later = periods >= (slot % T)[:, None]
+        room = np.maximum(np.where(later, slack, np.inf).min(axis=1), 0.0)
+        amount = np.where(v[rows, slot] > 0, np.minimum(cap[rows, slot], room), 0.0)
+        feed[rows, slot] = amount
+        slack -= np.where(later, amount[:, None], 0.0)
+    return feed.reshape(S, P, T)
+
+
+# ==============================================================================
+# SCHEDULES
+# ==============================================================================
+
+def plant_recovery(c, years, method):
+    """(..., P) LoM concentrate / processing ratio of each plant (0 for an idle plant)."""
+    w = total_weights(years, method)
+    proc = np.stack([c[f"proc_{p}"] @ w for p in PLANTS], axis=-1)
+    conc = np.stack([c[f"conc_{p}"] @ w for p in PLANTS], axis=-1)
+    return np.divide(conc, proc, out=np.zeros(proc.shape), where=proc > 0)
+
+
+def problem(c, years, mining, method="linear", objective="concentrate", capacity=None,
+            price=1200.0, fx=0.65, rate=DISCOUNT_RATE):
+    """Annual allocation problem for snapshot columns `c`, each (S, T), on one year axis.
+
+    `capacity` maps plant -> Mt/year and overrides the default, which is the
+    plant's highest chart reading. Capacity only applies in years where the
+    chart shows the plant running.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    unknown = set(capacity or ()) - set(PLANTS)
+    if unknown:
+        raise ValueError(f"unknown plants: {', '.join(sorted(unknown))}")
+    end = period_end(years)
+    annual = np.arange(years[0], end)
+    ore = resample_array(c["ore"][..., mining], years[mining], annual, 1.0, method, period_end(years[mining]))
+    read = np.stack([resample_array(c[f"proc_{p}"], years, annual, 1.0, method) for p in PLANTS], axis=1)
+    peak = np.stack([np.full(len(ore), capacity[p]) if p in (capacity or {}) else c[f"proc_{p}"].max(axis=-1)
+                     for p in PLANTS], axis=-1)
+    recovery = plant_recovery(c, years, method)
+
+    if objective == "concentrate":
+        value = np.broadcast_to(recovery[..., None], read.shape)
+    else:
+        margin = price / fx * recovery * (1 - ROYALTY_RATE) - PER_TONNE_PROCESSED
+        value = margin[..., None] * discount_factors(annual, [rate])
+    return {
+        "years": annual,
+        "ore": ore,
+        "stock0": c["stockpile"][:, 0],
+        "capacity": np.where(read > 0, peak[..., None], 0.0),
+        "value": value,
+        "recovery": recovery,
+        "read": read,
+    }
+
+
+def optimize(schedules, objective="concentrate", capacity=None, price=1200.0, fx=0.65, rate=DISCOUNT_RATE):
+    """Optimise [(name, LomSchedule)]; one batched setup and solve per shared
+    year axis and LoM method.
+
+    Returns {name: result}, each with the annual years, feed (P, T),
+    concentrate (T,), closing stockpile (T,), the objective value and the
+    value of the chart's own plant bands (as_read).
+    """
+    groups = {}
+    for name, sched in schedules:
+        key = (sched.years.tobytes(), sched.mining.tobytes(), sched.lom_method)
+        groups.setdefault(key, []).append((name, sched))
+
+    results = {}
+    for members in groups.values():
+        first = members[0][1]
+        c = {name: np.stack([s[name] for _, s in members]) for name in first.columns}
+        prob = problem(c, first.years, first.mining, first.lom_method, objective, capacity, price, fx, rate)
+        feed = allocate(prob["ore"], prob["stock0"], prob["capacity"], prob["value"])
+        conc = (feed * prob["recovery"][..., None]).sum(axis=1)
+        stock = np.maximum(prob["stock0"][:, None] + np.cumsum(prob["ore"] - feed.sum(axis=1), axis=-1), 0.0)
+        best = (feed * prob["value"]).sum(axis=(1, 2))
+        as_read = (prob["read"] * prob["value"]).sum(axis=(1, 2))
+        capacities = prob["capacity"].max(axis=-1)
+        for i, (name, _) in enumerate(members):
+            results[name] = {"years": prob["years"], "feed": feed[i], "concentrate": conc[i],
+                             "stockpile": stock[i], "objective": float(best[i]),
+                             "as_read": float(as_read[i]), "recovery": prob["recovery"][i],
+                             "capacity": capacities[i]}
+    return results
+
+
+def parse_capacity(items):
+    """["cgp1=2.5", ...] -> {"cgp1": 2.5}."""
+    out = {}
+    for item in items or ():
+        plant, _, mt = item.partition("=")
+        try:
+            out[plant.strip().lower()] = float(mt)
+        except ValueError:
+            raise ValueError(f"bad capacity {item!r}; expected PLANT=MT") from None
+    return out
+
+
+if __name__ == "__main__":
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="Optimise the plant feed allocation over the LoM.")
+    parser.add_argument("source", nargs="?",
+                        help="Scenario directory, manifest or column store (default: Figure 14 only)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="concentrate")
+    parser.add_argument("--capacity", nargs="+", metavar="PLANT=MT",
+                        help="Plant capacity in Mt/year (default: highest chart reading)")
+    parser.add_argument("--price", type=float, default=1200.0, help="Flat SC6 price for npv (US$/t)")
+    parser.add_argument("--fx", type=float, default=0.65, help="US$ per A$ for npv")
+    parser.add_argument("--rate", type=float, default=DISCOUNT_RATE, help="Discount rate for npv")
+    args = parser.parse_args()
+
+    if args.source:
+        from scenarios import load_scenarios, scenario_schedule
+        schedules = [(name, scenario_schedule(s)) for name, s in load_scenarios(args.source)]
+    else:
+        schedules = [("Figure 14", load_schedule())]
+    try:
+        capacity = parse_capacity(args.capacity)
+        start = time.perf_counter()
+        results = optimize(schedules, args.objective, capacity, args.price, args.fx, args.rate)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    unit = "Mt concentrate" if args.objective == "concentrate" else "A$M discounted margin"
+    if len(schedules) == 1:
+        r = results[schedules[0][0]]
+        print(f"{'Year':<6}" + "".join(f"{p.upper():>8}" for p in PLANTS) + f"{'Conc':>8}{'Stock':>8}")
+        for t, year in enumerate(r["years"].tolist()):
+            print(f"{year:<6}" + "".join(f"{v:>8.2f}" for v in r["feed"][:, t])
+                  + f"{r['concentrate'][t]:>8.2f}{r['stockpile'][t]:>8.2f}")
+        print("Recovery " + "  ".join(f"{p.upper()} {v:.1%}" for p, v in zip(PLANTS, r["recovery"])))
+        print(f"Optimised {r['objective']:,.1f} vs chart bands {r['as_read']:,.1f} {unit}")
+    else:
+        print(f"{'Scenario':<30}{'Optimised':>12}{'As Read':>12}{'Gain':>8}")
+        for name, r in results.items():
+            gain = (r["objective"] / r["as_read"] - 1) * 100 if r["as_read"] else 0.0
+            print(f"{name:<30}{r['objective']:>12.1f}{r['as_read']:>12.1f}{gain:>7.1f}%")
+    print(f"\nOptimised {len(schedules)} schedule(s) in {elapsed * 1000:.1f} ms ({unit})")
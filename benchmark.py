@@ -0,0 +1,407 @@
+"""
+Benchmark Suite
+Times every stage of workbook generation and extraction on synthetic data
+scaled to 10x, 100x and 10,000x the Figure 14 row count; --large adds
+1,000,000x. That scale holds about 14M rows of ~25 float64 columns, several
+GB, twice over under tracemalloc, so it only runs when asked for.
+
+The synthetic schedule tiles the Figure 14 series end to end on an extended
+even-year axis, so every code path sees realistic values. Each scale runs
+twice: once untraced for wall times, then under tracemalloc for the peak
+memory each stage allocates above the level it started at (tracing slows the
+pure-Python stages several times over, so it never overlaps the timing pass).
+Memory of PDF worker processes is not traced. Stages that cannot run at a
+scale are recorded as skipped, with the reason. Examples are sheets past
+Excel's row limit, PDFs past --max-pdf-pages and extractor loads past
+--max-points.
+
+Results are saved as JSON; pass an earlier file with --compare to print the
+change per stage.
+
+Cold start of the cli.py subcommands is measured in fresh interpreters (best
+of several runs). The lightweight commands must start within
+STARTUP_TARGET_MS; `--startup` runs only that check and exits non-zero when
+one of them misses it.
+
+Stages per scale:
+  derive             LomSchedule.from_inputs (alignment + derived columns)
+  lom_totals         full-period LoM totals via the annual resampling layer
+  styles             named style registration
+  rows:<sheet>       row generation only
+  write:<sheet>      row generation + cell writes + per-cell styling
+  save               serialise the workbook
+  store:write        save the schedule as a column store (see column_store.py)
+  store:read         open the store and sum two memory-mapped columns
+  workbook:read      openpyxl read-only parse of the saved Mining sheet, for comparison
+  extractor:ingest   GraphDataExtractor bulk ingest of 4 graphs (validated)
+  extractor:extend   full-size PointSeries load for the exports
+  extractor:csv      CSV export
+  extractor:excel    Excel export
+  extractor:store    column store export
+  extractor:reload   read the points store back (graph names + both columns)
+  pdf:extract        read_pdf.extract on a synthetic PDF, cold cache
+  pdf:cached         the same request again, served from the cache
+
+Usage: python benchmark.py [--scales 10 100] [--large] [--mode streaming|memory] [-o RESULTS.json]
+                           [--compare OLD.json]
+       python benchmark.py --startup
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+from openpyxl import Workbook
+
+from column_store import SUFFIX, ScheduleStore, save_schedules
+from figure14 import FIGURE_14
+from generate_mine_plan_excel import SHEETS, register_named_styles, stream_sheet, write_sheet
+from extract_graph_data import MAX_YEAR, MIN_YEAR, GraphDataExtractor, read_points
+from lom_schedule import FULL_INPUTS, MINING_INPUTS, LomSchedule
+
+BASE_ROWS = len(FIGURE_14["years"])
+SCALES = (10, 100, 10_000)
+LARGE_SCALES = (1_000_000,)                 # several GB; only with --large
+EXCEL_MAX_ROWS = 1_048_576
+PDF_BASE_PAGES = 35                         # pages read from the annual report
+PDF_MAX_PAGES = 5_000
+EXTRACTOR_MAX_POINTS = 10_000_000           # the year -> slot index is a Python dict
+SHEET_HEADER_ROWS = 10                      # title / notes / totals rows around the table
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+STARTUP_TARGET_MS = 250
+STARTUP_REPEATS = 7
+# (cli.py arguments, lightweight?) - lightweight commands must meet STARTUP_TARGET_MS
+STARTUP_COMMANDS = [
+    (["--help"], True),
+    (["pdf", "--help"], True),
+    (["export"], True),
+    (["extract", "--help"], True),
+    (["generate", "--help"], False),
+]
+
+
+# ==============================================================================
+# SYNTHETIC DATA
+# ==============================================================================
+
+def synthetic_inputs(scale):
+    """Figure 14 inputs tiled `scale` times on an extended even-year axis."""
+    n = BASE_ROWS * scale
+    years = FIGURE_14["years"][0] + 2 * np.arange(n, dtype=np.int64)
+    mining = np.tile(np.isin(FIGURE_14["years"], FIGURE_14["mining_years"]), scale)
+    inputs = {"years": years, "mining_years": years[mining]}
+    for name in MINING_INPUTS + FULL_INPUTS:
+        inputs[name] = np.tile(np.asarray(FIGURE_14[name], dtype=np.float64), scale)
+    return inputs
+
+
+def synthetic_points(scale, graphs=4):
+    """(graphs, years, values) columns for GraphDataExtractor.ingest.
+
+    Years cycle through the accepted range, so most rows are re-reads that
+    overwrite an earlier point.
+    """
+    n = BASE_ROWS * scale
+    years = np.tile(MIN_YEAR + np.arange(n, dtype=np.int64) % (MAX_YEAR - MIN_YEAR + 1), graphs)
+    labels = np.repeat(np.array([str(g + 1) for g in range(graphs)], dtype=object), n)
+    values = np.random.default_rng(0).uniform(0, 100, len(years))
+    return labels, years, values
+
+
+def synthetic_pdf(path, pages):
+    """PDF with `pages` pages of release-style text."""
+    import pymupdf
+
+    text = "\n".join(f"Greenbushes LoM {year}: total movement {42 + year % 7} Mt, strip ratio 3.{year % 9}"
+                     for year in range(2026, 2054, 2))
+    with pymupdf.open() as doc:
+        for _ in range(pages):
+            doc.new_page().insert_text((72, 72), text, fontsize=9)
+        doc.save(path)
+
+
+# ==============================================================================
+# RECORDER
+# ==============================================================================
+
+class Recorder:
+    """Collects {name, seconds, peak_mb} per stage for one scale."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        entry = {"name": name, "seconds": round(time.perf_counter() - start, 6)}
+        if self.memory:
+            entry["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 3)
+        self.stages.append(entry)
+
+    def skip(self, name, reason):
+        self.stages.append({"name": name, "skipped": reason})
+
+
+# ==============================================================================
+# STAGES
+# ==============================================================================
+
+def bench_workbook(rec, inputs, out_dir, streaming=True):
+    with rec.stage("derive"):
+        sched = LomSchedule.from_inputs(inputs)
+    with rec.stage("lom_totals"):
+        for name in ("ore", "waste", "proc_total", "conc_total"):
+            sched.lom_total(name)
+
+    store = os.path.join(out_dir, "bench" + SUFFIX)
+    with rec.stage("store:write"):
+        save_schedules(store, [("bench", sched)])
+    with rec.stage("store:read"):
+        columns = ScheduleStore(store).columns_for("bench", ("ore", "waste"))
+        float(columns["ore"].sum() + columns["waste"].sum())
+
+    if len(sched) + SHEET_HEADER_ROWS > EXCEL_MAX_ROWS:
+        for name in (["styles"] + [f"{kind}:{title}" for title, *_ in SHEETS for kind in ("rows", "write")]
+                     + ["save", "workbook:read"]):
+            rec.skip(name, f"{len(sched):,} rows exceed the Excel limit of {EXCEL_MAX_ROWS:,}")
+        return
+
+    wb = Workbook(write_only=streaming)
+    if not streaming:
+        wb.remove(wb.active)
+    with rec.stage("styles"):
+        register_named_styles(wb)
+    for title, rows, widths, _ in SHEETS:
+        with rec.stage(f"rows:{title}"):
+            for _ in rows(sched):
+                pass
+        with rec.stage(f"write:{title}"):
+            ws = wb.create_sheet(title)
+            (stream_sheet if streaming else write_sheet)(ws, rows(sched), widths)
+    with rec.stage("save"):
+        wb.save(os.path.join(out_dir, "bench.xlsx"))
+    with rec.stage("workbook:read"):
+        wb = openpyxl.load_workbook(os.path.join(out_dir, "bench.xlsx"), read_only=True)
+        for _ in wb["Mining"].iter_rows(values_only=True):
+            pass
+        wb.close()
+
+
+def bench_extractor(rec, scale, out_dir, max_points=EXTRACTOR_MAX_POINTS):
+    extractor = GraphDataExtractor()
+    n = BASE_ROWS * scale * len(extractor.graphs)
+    if n > max_points:
+        for name in ("extractor:ingest", "extractor:extend", "extractor:csv", "extractor:excel",
+                     "extractor:store", "extractor:reload"):
+            rec.skip(name, f"{n:,} points exceed --max-points {max_points:,}")
+        return
+    points = synthetic_points(scale, len(extractor.graphs))
+    cwd = os.getcwd()
+    os.chdir(out_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with rec.stage("extractor:ingest"):
+                extractor.ingest(*points)
+            # the year range caps ingest at a few hundred points per graph, so
+            # the exports are timed on full-size series loaded directly
+            n = BASE_ROWS * scale
+            with rec.stage("extractor:extend"):
+                for series in extractor.data.values():
+                    series.extend(np.arange(n, dtype=np.int64), np.arange(n, dtype=np.float64))
+            with rec.stage("extractor:csv"):
+                extractor.export_to_csv()
+            rows = max(len(s) for s in extractor.data.values()) + 1
+            if rows > EXCEL_MAX_ROWS:
+                rec.skip("extractor:excel", f"{rows:,} rows exceed the Excel limit of {EXCEL_MAX_ROWS:,}")
+            else:
+                with rec.stage("extractor:excel"):
+                    extractor.export_to_excel()
+            store = os.path.join(out_dir, "points" + SUFFIX)
+            with rec.stage("extractor:store"):
+                extractor.export_to_store(store)
+            with rec.stage("extractor:reload"):
+                graphs, years, values = read_points(store)
+                float(years.sum() + values.sum())
+    finally:
+        os.chdir(cwd)
+
+
+def bench_pdf(rec, scale, out_dir, max_pages=PDF_MAX_PAGES, workers=None):
+    pages = PDF_BASE_PAGES * scale
+    if pages > max_pages:
+        for name in ("pdf:extract", "pdf:cached"):
+            rec.skip(name, f"{pages:,} pages exceed --max-pdf-pages {max_pages:,}")
+        return
+    try:
+        import pymupdf  # noqa: F401
+    except ImportError:
+        for name in ("pdf:extract", "pdf:cached"):
+            rec.skip(name, "pymupdf is not installed")
+        return
+    from read_pdf import extract
+
+    pdf = os.path.join(out_dir, "bench.pdf")
+    synthetic_pdf(pdf, pages)
+    cache = os.path.join(out_dir, "pdf_cache")
+    with rec.stage("pdf:extract"):
+        extract([(pdf, None)], out_dir, workers, cache)
+    with rec.stage("pdf:cached"):
+        extract([(pdf, None)], out_dir, workers, cache)
+
+
+def bench_scale(rec, scale, streaming=True, max_pdf_pages=PDF_MAX_PAGES,
+                max_points=EXTRACTOR_MAX_POINTS, workers=None):
+    inputs = synthetic_inputs(scale)
+    with tempfile.TemporaryDirectory() as out_dir:
+        bench_workbook(rec, inputs, out_dir, streaming)
+        del inputs
+        bench_extractor(rec, scale, out_dir, max_points)
+        bench_pdf(rec, scale, out_dir, max_pdf_pages, workers)
+    return rec.stages
+
+
+def bench_startup(commands=STARTUP_COMMANDS, repeats=STARTUP_REPEATS, target_ms=STARTUP_TARGET_MS):
+    """Best and median wall time (ms) of each cli.py command in a fresh interpreter."""
+    def wall_ms(argv):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            times.append((time.perf_counter() - start) * 1000)
+        return min(times), float(np.median(times))
+
+    results = [{"command": "python -c pass", "best_ms": round(wall_ms([sys.executable, "-c", "pass"])[0], 1)}]
+    for args, light in commands:
+        best, median = wall_ms([sys.executable, CLI, *args])
+        entry = {"command": "cli.py " + " ".join(args), "best_ms": round(best, 1), "median_ms": round(median, 1),
+                 "lightweight": light}
+        if light:
+            entry["within_target"] = best <= target_ms
+        results.append(entry)
+    return results
+
+
+def run(scales=SCALES, streaming=True, memory=True, max_pdf_pages=PDF_MAX_PAGES,
+        max_points=EXTRACTOR_MAX_POINTS, workers=None, log=print):
+    """Benchmark every scale; returns the JSON-ready results dict."""
+    startup = bench_startup()
+    if log:
+        log(format_startup(startup))
+    results = []
+    for scale in scales:
+        stages = bench_scale(Recorder(memory=False), scale, streaming, max_pdf_pages, max_points, workers)
+        if memory:
+            tracemalloc.start()
+            try:
+                traced = bench_scale(Recorder(memory=True), scale, streaming, max_pdf_pages, max_points, workers)
+            finally:
+                tracemalloc.stop()
+            peaks = {s["name"]: s["peak_mb"] for s in traced if "peak_mb" in s}
+            for s in stages:
+                if s["name"] in peaks:
+                    s["peak_mb"] = peaks[s["name"]]
+        results.append({"scale": scale, "rows": BASE_ROWS * scale, "stages": stages})
+        if log:
+            log(format_scale(results[-1]))
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mode": "streaming" if streaming else "memory",
+        "tracemalloc": memory,
+        "startup_target_ms": STARTUP_TARGET_MS,
+        "startup": startup,
+        "results": results,
+    }
+
+
+# ==============================================================================
+# REPORTING
+# ==============================================================================
+
+def format_scale(result, baseline=None):
+    """Text table of one scale's stages, with the change against `baseline` stages."""
+    before = {s["name"]: s for s in baseline["stages"]} if baseline else {}
+    lines = [f"\n{result['scale']:,}x ({result['rows']:,} rows)",
+             f"  {'Stage':<34}{'Seconds':>12}{'Peak MB':>10}" + (f"{'vs base':>10}" if baseline else "")]
+    for s in result["stages"]:
+        if "skipped" in s:
+            lines.append(f"  {s['name']:<34}{'skipped':>12}  {s['skipped']}")
+            continue
+        peak = f"{s['peak_mb']:>10.1f}" if "peak_mb" in s else f"{'-':>10}"
+        line = f"  {s['name']:<34}{s['seconds']:>12.4f}{peak}"
+        old = before.get(s["name"], {}).get("seconds")
+        if baseline and old:
+            line += f"{(s['seconds'] - old) / old:>+10.0%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_startup(startup, target_ms=STARTUP_TARGET_MS):
+    lines = [f"\nCold start (best of {STARTUP_REPEATS}, target {target_ms} ms for lightweight commands)"]
+    for s in startup:
+        flag = "" if "within_target" not in s else ("  ok" if s["within_target"] else "  OVER TARGET")
+        lines.append(f"  {s['command']:<34}{s['best_ms']:>10.1f} ms{flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time workbook generation and extraction at scaled data sizes.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES),
+                        help="Multiples of the Figure 14 row count")
+    parser.add_argument("--large", action="store_true",
+                        help=f"Also run {', '.join(f'{s:,}x' for s in LARGE_SCALES)} (needs several GB of memory)")
+    parser.add_argument("--mode", choices=("streaming", "memory"), default="streaming",
+                        help="Workbook writer to benchmark")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="Skip the traced pass (timings only)")
+    parser.add_argument("--max-pdf-pages", type=int, default=PDF_MAX_PAGES)
+    parser.add_argument("--max-points", type=int, default=EXTRACTOR_MAX_POINTS,
+                        help="Largest GraphDataExtractor load to benchmark")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction pool size")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="OLD.json", help="Print the change against an earlier results file")
+    parser.add_argument("--startup", action="store_true",
+                        help=f"Only check cli.py cold start against {STARTUP_TARGET_MS} ms")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup = bench_startup()
+        print(format_startup(startup))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"startup_target_ms": STARTUP_TARGET_MS, "startup": startup}, f, indent=2)
+        raise SystemExit(0 if all(s.get("within_target", True) for s in startup) else 1)
+
+    scales = args.scales + [s for s in LARGE_SCALES if args.large and s not in args.scales]
+    report = run(scales, args.mode == "streaming", not args.no_tracemalloc,
+                 args.max_pdf_pages, args.max_points, args.workers, log=None if args.compare else print)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = {r["scale"]: r for r in json.load(f)["results"]}
+        for result in report["results"]:
+            print(format_scale(result, old.get(result["scale"])))
+    print(f"\nResults saved to: {args.output}")
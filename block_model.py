@@ -0,0 +1,317 @@
+"""
+Block Model Ingestion
+Derives the Mining series (total movement, strip ratio, ore grade) from the
+block model instead of back-calculating ore and waste from the chart.
+
+A block model is one row per block with its tonnes, Li2O grade (%) and
+mining period (year). It is read as a CSV, or as a column store
+(column_store.py), in fixed-size chunks; tens of millions of blocks never
+sit in memory at once:
+  - CSV: the file is split into CHUNK_BYTES byte ranges on line boundaries.
+    Each range is parsed and aggregated on a process pool, and only its
+    per-period sums come back.
+  - column store: CHUNK_ROWS rows at a time are sliced from the memory-mapped
+    columns.
+
+A block at or above the 0.5% Li2O reporting cut-off (investment-analysis.md)
+is ore; everything else, including blocks with no grade (an empty Li2O field
+reads as NaN), is waste. A block with no period is an error. Each chunk is
+grouped by period with np.bincount. The running sums hold one slot
+per period, so memory is bounded by the chunk size.
+
+schedule_inputs() turns the period sums into the Figure 14 layout. Block
+periods are folded onto the snapshot axis. Each snapshot gets the average
+annual rate of its period [year, next snapshot), so the step-method LoM
+totals equal the block model totals. The strip ratio and grade are ratios
+of those sums. The ore / waste split the workbook derives as
+total / (1 + strip ratio) is then the block model's own split.
+
+Usage: python block_model.py BLOCKS.csv|BLOCKS.cols [--cutoff 0.5] [--workers N]
+                             [--columns tonnes=TONNES li2o=LI2O period=YEAR]
+       python block_model.py BLOCKS.csv --to-store BLOCKS.cols
+"""
+
+import argparse
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from column_store import ColumnStore, is_store, write_store_chunks
+from resample import period_end
+
+CUTOFF = 0.5                    # % Li2O, ORE reporting cut-off
+TONNES_PER_MT = 1e6
+CHUNK_ROWS = 1_000_000          # column store rows per chunk
+CHUNK_BYTES = 32 << 20          # CSV bytes per chunk
+
+# role -> default column name (matched case-insensitively)
+COLUMNS = {"tonnes": "tonnes", "li2o": "li2o", "period": "period"}
+
+# an empty CSV field: after a comma, before a comma or line end, or a leading comma
+EMPTY_FIELD = re.compile(rb"(?<=,)(?=,|\r?\n|$)|^(?=,)", re.MULTILINE)
+
+
+# ==============================================================================
+# PERIOD SUMS
+# ==============================================================================
+
+class PeriodTotals:
+    """Running ore / waste tonnes, ore Li2O tonnes and block counts per period."""
+
+    FIELDS = ("ore", "waste", "ore_li2o", "blocks")
+
+    def __init__(self):
+        self.first = 0                              # period of slot 0
+        self.sums = np.zeros((len(self.FIELDS), 0))
+
+    def _grow(self, first, last):
+        if not self.sums.shape[1]:
+            self.first, self.sums = first, np.zeros((len(self.FIELDS), last - first + 1))
+            return
+        lo, hi = min(first, self.first), max(last, self.first + self.sums.shape[1] - 1)
+        if (lo, hi) != (self.first, self.first + self.sums.shape[1] - 1):
+            sums = np.zeros((len(self.FIELDS), hi - lo + 1))
+            sums[:, self.first - lo:self.first - lo + self.sums.shape[1]] = self.sums
+            self.first, self.sums = lo, sums
+
+    def add(self, period, tonnes, li2o, cutoff=CUTOFF):
+        """Add one chunk of blocks."""
+        if not len(period):
+            return self
+        period = np.asarray(period)
+        if period.dtype.kind == "f":
+            if np.isnan(period).any():
+                raise ValueError(f"{int(np.isnan(period).sum())} block(s) have no period")
+            period = period.astype(np.int64)
+        tonnes = np.nan_to_num(np.asarray(tonnes, dtype=np.float64))
+        li2o = np.asarray(li2o, dtype=np.float64)
+        ore = li2o >= cutoff                        # NaN grade compares False: waste
+        first, last = int(period.min()), int(period.max())
+        slot = period - first
+        n = last - first + 1
+        part = np.stack([
+            np.bincount(slot, np.where(ore, tonnes, 0.0), n),
+            np.bincount(slot, np.where(ore, 0.0, tonnes), n),
+            np.bincount(slot, np.where(ore, tonnes * li2o, 0.0), n),
+            np.bincount(slot, minlength=n),
+        ])
+        self._grow(first, last)
+        self.sums[:, first - self.first:first - self.first + n] += part
+        return self
+
+    def merge(self, other):
+        if other.sums.shape[1]:
+            self._grow(other.first, other.first + other.sums.shape[1] - 1)
+            start = other.first - self.first
+            self.sums[:, start:start + other.sums.shape[1]] += other.sums
+        return self
+
+    def table(self):
+        """{period, ore, waste, total_movement (Mt), strip_ratio, ore_grade (%), blocks} for
+        periods with any block."""
+        from lom_schedule import safe_ratio
+
+        ore, waste, metal, blocks = self.sums
+        keep = blocks > 0
+        return {
+            "period": (self.first + np.arange(len(blocks)))[keep],
+            "ore": ore[keep] / TONNES_PER_MT,
+            "waste": waste[keep] / TONNES_PER_MT,
+            "total_movement": (ore + waste)[keep] / TONNES_PER_MT,
+            "strip_ratio": safe_ratio(waste, ore)[keep],
+            "ore_grade": safe_ratio(metal, ore)[keep],
+            "blocks": blocks[keep].astype(np.int64),
+        }
+
+
+# ==============================================================================
+# READERS
+# ==============================================================================
+
+def _csv_header(path, columns):
+    """(column indices in role order, byte offset of the first data row)."""
+    with open(path, "rb") as f:
+        header = f.readline()
+    names = [h.strip().strip('"').lower() for h in header.decode("utf-8-sig").split(",")]
+    missing = [name for name in columns.values() if name.lower() not in names]
+    if missing:
+        raise ValueError(f"{path}: no column(s) {', '.join(missing)}; header has {', '.join(names)}")
+    return [names.index(name.lower()) for name in columns.values()], len(header)
+
+
+def _csv_ranges(path, start, chunk_bytes):
+    size = os.path.getsize(path)
+    return [(lo, min(lo + chunk_bytes, size)) for lo in range(start, size, chunk_bytes)]
+
+
+def _read_range(path, start, end, usecols):
+    """(rows, len(usecols)) array of the CSV lines that begin in [start, end).
+
+    Empty fields read as NaN.
+    """
+    with open(path, "rb") as f:
+        # a line belongs to the range holding its first byte
+        f.seek(max(start - 1, 0))
+        if start:
+            f.readline()
+        if f.tell() >= end:
+            return np.empty((0, len(usecols)))
+        data = f.read(end - f.tell())
+        if not data.endswith(b"\n"):
+            data += f.readline()
+    # the substring checks are cheap; only a range with empty fields pays for the regex
+    if b",," in data or b",\n" in data or b",\r" in data or b"\n," in data or data.startswith(b","):
+        data = EMPTY_FIELD.sub(b"nan", data)
+    return np.loadtxt(io.StringIO(data.decode("utf-8")), delimiter=",", usecols=usecols, ndmin=2)
+
+
+def _csv_totals(args):
+    path, start, end, usecols, cutoff = args
+    tonnes, li2o, period = _read_range(path, start, end, usecols).T
+    return PeriodTotals().add(period, tonnes, li2o, cutoff)
+
+
+def csv_chunks(path, columns=COLUMNS, chunk_bytes=CHUNK_BYTES):
+    """Yield {role: array} chunks of a block model CSV, one byte range at a time."""
+    usecols, start = _csv_header(path, columns)
+    for lo, hi in _csv_ranges(path, start, chunk_bytes):
+        data = _read_range(path, lo, hi, usecols)
+        yield {role: data[:, i] for i, role in enumerate(columns)}
+
+
+def store_chunks(path, columns=COLUMNS, chunk_rows=CHUNK_ROWS):
+    """Yield {role: array} chunks sliced from a block model column store."""
+    store = ColumnStore(path)
+    lower = {name.lower(): name for name in store.columns}
+    missing = [name for name in columns.values() if name.lower() not in lower]
+    if missing:
+        raise ValueError(f"{path}: no column(s) {', '.join(missing)}; store has {', '.join(store.columns)}")
+    names = {role: lower[name.lower()] for role, name in columns.items()}
+    for lo in range(0, len(store), chunk_rows):
+        yield {role: np.asarray(store[name][lo:lo + chunk_rows]) for role, name in names.items()}
+
+
+# ==============================================================================
+# AGGREGATION
+# ==============================================================================
+
+def aggregate(path, cutoff=CUTOFF, columns=None, workers=None, chunk_rows=CHUNK_ROWS, chunk_bytes=CHUNK_BYTES):
+    """Per-period mining table (see PeriodTotals.table) of a block model CSV or column store."""
+    columns = {**COLUMNS, **(columns or {})}
+    totals = PeriodTotals()
+    if is_store(path):
+        for chunk in store_chunks(path, columns, chunk_rows):
+            totals.add(chunk["period"], chunk["tonnes"], chunk["li2o"], cutoff)
+        return totals.table()
+
+    # columns keeps COLUMNS' order: tonnes, li2o, period
+    usecols, start = _csv_header(path, columns)
+    tasks = [(path, lo, hi, usecols, cutoff) for lo, hi in _csv_ranges(path, start, chunk_bytes)]
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            totals.merge(_csv_totals(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_csv_totals, tasks):
+                totals.merge(part)
+    return totals.table()
+
+
+def schedule_inputs(table, base=None, grade=True, decimals=2):
+    """Figure 14-layout inputs with the Mining series taken from a block model table.
+
+    Block periods are folded onto the snapshot years of `base` (default
+    Figure 14): each snapshot gets the average annual tonnes of its period
+    [year, next snapshot), and the strip ratio and ore grade of the summed
+    tonnes. With `grade` the ore grade also replaces li2o_grade in the mining
+    years. Every other series is kept from `base`. The block series are
+    rounded to `decimals`, as the report shows them.
+    """
+    from figure14 import FIGURE_14
+    from lom_schedule import safe_ratio
+
+    base = FIGURE_14 if base is None else base
+    years = np.asarray(base["years"], dtype=np.int64)
+    period = np.asarray(table["period"], dtype=np.int64)
+    outside = (period < years[0]) | (period >= period_end(years))
+    if outside.any():
+        raise ValueError(f"block periods {sorted(set(period[outside].tolist()))} fall outside "
+                         f"the schedule years {years[0]}-{period_end(years) - 1}")
+    k = np.searchsorted(years, period, side="right") - 1
+    span = np.diff(np.append(years, period_end(years)))
+    ore = np.bincount(k, table["ore"], len(years))
+    waste = np.bincount(k, table["waste"], len(years))
+    metal = np.bincount(k, table["ore"] * table["ore_grade"], len(years))
+    mining = ore + waste > 0
+
+    inputs = dict(base)
+    inputs["mining_years"] = years[mining].tolist()
+    inputs["total_movement"] = np.round((ore + waste) / span, decimals)[mining].tolist()
+    inputs["strip_ratio"] = np.round(safe_ratio(waste, ore), decimals)[mining].tolist()
+    if grade:
+        inputs["li2o_grade"] = np.where(mining & (ore > 0), np.round(safe_ratio(metal, ore), decimals),
+                                        np.asarray(base["li2o_grade"], dtype=np.float64)).tolist()
+    return inputs
+
+
+def csv_to_store(csv_path, store_path, columns=None, chunk_bytes=CHUNK_BYTES):
+    """Convert a block model CSV to a column store, one chunk in memory at a time."""
+    columns = {**COLUMNS, **(columns or {})}
+    rows, last = 0, b"\n"
+    with open(csv_path, "rb") as f:
+        f.readline()
+        for block in iter(lambda: f.read(1 << 24), b""):
+            rows, last = rows + block.count(b"\n"), block[-1:]
+    rows += last != b"\n"          # final line without a newline
+    dtypes = {"tonnes": np.float64, "li2o": np.float64, "period": np.int32}
+    return write_store_chunks(store_path, csv_chunks(csv_path, columns, chunk_bytes), int(rows),
+                              {role: dtypes[role] for role in columns}, {"kind": "block_model", "source": csv_path})
+
+
+def parse_columns(items):
+    """["tonnes=TONNES", ...] -> {"tonnes": "TONNES"}."""
+    out = {}
+    for item in items or ():
+        role, _, name = item.partition("=")
+        if role not in COLUMNS or not name:
+            raise ValueError(f"bad column mapping {item!r}; expected one of {', '.join(COLUMNS)}=NAME")
+        out[role] = name
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate a block model into the Mining schedule series.")
+    parser.add_argument("source", help="Block model CSV or column store")
+    parser.add_argument("--cutoff", type=float, default=CUTOFF, help="Ore cut-off grade, %% Li2O (default 0.5)")
+    parser.add_argument("--columns", nargs="+", metavar="ROLE=NAME",
+                        help="Column names for tonnes, li2o and period (default: those names)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for CSV (default: all cores)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    parser.add_argument("--to-store", metavar="BLOCKS.cols", help="Convert a CSV block model to a column store")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        columns = parse_columns(args.columns)
+        if args.to_store:
+            csv_to_store(args.source, args.to_store, columns, args.chunk_mb << 20)
+        else:
+            table = aggregate(args.source, args.cutoff, columns, args.workers, args.chunk_rows,
+                              args.chunk_mb << 20)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    if args.to_store:
+        print(f"Block model saved to: {args.to_store} in {elapsed:.1f}s")
+        raise SystemExit
+
+    print(f"{'Period':<8}{'Ore':>9}{'Waste':>9}{'Total':>9}{'Strip':>8}{'Li2O %':>8}{'Blocks':>11}")
+    for row in zip(*table.values()):
+        period, ore, waste, total, strip, grade, blocks = row
+        print(f"{period:<8}{ore:>9.2f}{waste:>9.2f}{total:>9.2f}{strip:>8.2f}{grade:>8.2f}{blocks:>11,}")
+    print(f"\n{int(table['blocks'].sum()):,} blocks at a {args.cutoff}% Li2O cut-off in {elapsed:.2f}s")
@@ -0,0 +1,208 @@
+"""
+Figure 14 Charts
+Draws the Mining, Stockpiles, Processing and Concentrate charts of a schedule
+as PNG files, for embedding next to the matching workbook sheets.
+
+Every chart is cached under the SHA-256 of its title, its input series and
+this module's source. A chart whose series have not changed is never drawn
+twice, across runs or across scenarios that share it. Missing charts are
+rendered on a process pool with matplotlib's headless Agg backend. Each file
+is written next to its final path and renamed into place, so concurrent
+renderers of the same chart cannot leave a partial file.
+
+Usage: python charts.py [SCENARIOS_DIR|MANIFEST.json|STORE.cols] [--workers N] [--cache-dir DIR]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from lom_schedule import PLANTS
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chart_cache")
+SIZE_INCHES = (9.0, 4.5)
+DPI = 100
+ANCHOR_GAP = 2                              # blank columns between a sheet's table and its chart
+
+PLANT_COLORS = {"cgp3": "#1F4E79", "cgp2": "#2E75B6", "cgp1": "#9DC3E6", "tgp": "#F4B183"}
+
+
+# ==============================================================================
+# SERIES
+# ==============================================================================
+# title -> function of a LomSchedule returning the arrays the chart is drawn
+# from; these are also what the cache key hashes.
+
+def _mining_series(sched):
+    return {"years": sched.mining_years, "ore": sched.mined("ore"), "waste": sched.mined("waste"),
+            "strip_ratio": sched.mined("strip_ratio")}
+
+
+def _stockpile_series(sched):
+    return {"years": sched.years, "stockpile": sched["stockpile"]}
+
+
+def _processing_series(sched):
+    return {"years": sched.years, **{p: sched[f"proc_{p}"] for p in PLANTS}, "li2o_grade": sched["li2o_grade"]}
+
+
+def _concentrate_series(sched):
+    return {"years": sched.years, **{p: sched[f"conc_{p}"] for p in PLANTS}, "conc_total": sched["conc_total"]}
+
+
+CHARTS = {
+    "Mining": _mining_series,
+    "Stockpiles": _stockpile_series,
+    "Processing": _processing_series,
+    "Concentrate": _concentrate_series,
+}
+
+
+@lru_cache(maxsize=None)
+def _chart_version():
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read() + repr((SIZE_INCHES, DPI)).encode()).hexdigest()
+
+
+def chart_key(title, series):
+    h = hashlib.sha256(_chart_version().encode())
+    h.update(title.encode())
+    for name, values in series.items():
+        values = np.ascontiguousarray(values)
+        h.update(f"{name}:{values.dtype.str}:{values.shape}".encode())
+        h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def chart_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f"{key}.png")
+
+
+# ==============================================================================
+# DRAWING
+# ==============================================================================
+
+def _stacked(ax, years, layers, width=1.4):
+    bottom = np.zeros(len(years))
+    for label, values, color in layers:
+        ax.bar(years, values, width, bottom=bottom, label=label, color=color)
+        bottom = bottom + values
+    return bottom
+
+
+def _draw(title, s, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=SIZE_INCHES, dpi=DPI)
+    years = s["years"]
+    if title == "Mining":
+        _stacked(ax, years, [("Ore", s["ore"], "#2E75B6"), ("Waste", s["waste"], "#BFBFBF")])
+        ax.set_ylabel("Mt")
+        ax2 = ax.twinx()
+        ax2.plot(years, s["strip_ratio"], "o-", color="#C00000", label="Strip ratio")
+        ax2.set_ylabel("Strip ratio (waste:ore)")
+        for x, y in zip(years, s["strip_ratio"]):
+            ax2.annotate(f"{y:g}", (x, y), textcoords="offset points", xytext=(0, 6), ha="center", fontsize=8)
+        ax2.legend(loc="upper right", frameon=False)
+    elif title == "Stockpiles":
+        ax.bar(years, s["stockpile"], 1.4, color="#A9D18E", label="Stockpile")
+        for x, y in zip(years, s["stockpile"]):
+            ax.annotate(f"{y:g}", (x, y), textcoords="offset points", xytext=(0, 3), ha="center", fontsize=8)
+        ax.set_ylabel("Mt")
+    elif title == "Processing":
+        _stacked(ax, years, [(p.upper(), s[p], PLANT_COLORS[p]) for p in PLANTS])
+        ax.set_ylabel("Mt")
+        ax2 = ax.twinx()
+        ax2.plot(years, s["li2o_grade"], "o-", color="#C00000", label="Li2O grade")
+        ax2.set_ylabel("Li2O grade (%)")
+        ax2.legend(loc="upper right", frameon=False)
+    elif title == "Concentrate":
+        top = _stacked(ax, years, [(p.upper(), s[p], PLANT_COLORS[p]) for p in PLANTS])
+        for x, y, total in zip(years, top, s["conc_total"]):
+            ax.annotate(f"{total:g}", (x, y), textcoords="offset points", xytext=(0, 3), ha="center", fontsize=8)
+        ax.set_ylabel("Mt")
+    else:
+        raise KeyError(title)
+
+    ax.set_title(f"{title} - Greenbushes LoM (CY25 ORE, Figure 14)")
+    ax.set_xticks(years)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.legend(loc="upper left", frameon=False, ncol=5, fontsize=8)
+    ax.spines[["top"]].set_visible(False)
+    fig.tight_layout()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fig.savefig(tmp, format="png")
+    plt.close(fig)
+    os.replace(tmp, path)
+
+
+def _render(args):
+    title, series, path = args
+    _draw(title, series, path)
+    return path
+
+
+def render_charts(jobs, workers=None, cache_dir=CACHE_DIR):
+    """Render every (title, series) job that is not cached yet.
+
+    Returns (paths in job order, number rendered, number served from cache).
+    Jobs sharing a key are rendered once.
+    """
+    paths, tasks = [], {}
+    for title, series in jobs:
+        path = chart_path(cache_dir, chart_key(title, series))
+        paths.append(path)
+        if path not in tasks and not os.path.exists(path):
+            tasks[path] = (title, series, path)
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks.values():
+            _render(task)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(tasks))) as pool:
+            list(pool.map(_render, tasks.values()))
+    return paths, len(tasks), len(jobs) - len(tasks)
+
+
+def chart_jobs(sched):
+    return [(title, fn(sched)) for title, fn in CHARTS.items()]
+
+
+def schedule_charts(sched, workers=None, cache_dir=CACHE_DIR):
+    """{sheet title: PNG path} for one schedule."""
+    paths, _, _ = render_charts(chart_jobs(sched), workers, cache_dir)
+    return dict(zip(CHARTS, paths))
+
+
+if __name__ == "__main__":
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="Render (or reuse cached) Figure 14 charts for one or many schedules.")
+    parser.add_argument("source", nargs="?",
+                        help="Scenario directory, manifest or column store (default: Figure 14 only)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.source:
+        from scenarios import load_scenarios, scenario_schedule
+        schedules = [(name, scenario_schedule(s)) for name, s in load_scenarios(args.source)]
+    else:
+        schedules = [("Figure 14", load_schedule())]
+
+    start = time.perf_counter()
+    jobs = [job for _, sched in schedules for job in chart_jobs(sched)]
+    paths, rendered, cached = render_charts(jobs, args.workers, args.cache_dir)
+    elapsed = time.perf_counter() - start
+    for (name, _), i in zip(schedules, range(0, len(paths), len(CHARTS))):
+        print(f"{name}: " + "  ".join(paths[i:i + len(CHARTS)]))
+    print(f"\n{len(jobs)} charts: {rendered} rendered, {cached} from cache in {elapsed:.2f}s")
@@ -0,0 +1,120 @@
+"""
+Greenbushes LoM Command Line
+One entry point for the workbook, extraction and export tools.
+
+Only argparse and importlib load at startup. Each subcommand imports its own
+module (and with it openpyxl, numpy or pymupdf) when it runs, so `--help`
+and the lightweight commands never pay for libraries they do not use.
+
+Commands:
+  generate   build the LoM analysis workbook       (generate_mine_plan_excel)
+  extract    graph data menu / bulk load + export  (extract_graph_data)
+  pdf        parallel, cached PDF text extraction  (read_pdf)
+  index      search index over announcements       (doc_index)
+  serve      watch scenarios, rebuild warm + API   (service)
+  diff       compare generated plan workbooks      (plan_diff)
+  export     schedule columns to CSV, JSON or a column store, at snapshot or resampled resolution
+
+Usage: python cli.py COMMAND [ARGS...]
+       python cli.py COMMAND --help
+"""
+
+import argparse
+import importlib
+import sys
+
+# command -> (module, entry point, help); modules are imported on dispatch
+COMMANDS = {
+    "generate": ("generate_mine_plan_excel", "main", "Build the Greenbushes LoM analysis workbook"),
+    "extract": ("extract_graph_data", "main", "Graph data extraction tool (menu, or --load/--export)"),
+    "pdf": ("read_pdf", "main", "Extract PDF page text (parallel, cached)"),
+    "index": ("doc_index", "main", "Index announcements and search their text and tables"),
+    "serve": ("service", "main", "Watch scenario inputs and rebuild workbooks in a warm process"),
+    "diff": ("plan_diff", "main", "Diff generated LoM workbooks by metric, plant and year"),
+    "export": ("cli", "export_main", "Export schedule columns to CSV, JSON or a column store"),
+}
+
+EXPORT_COLUMNS = ("ore", "waste", "total_movement", "strip_ratio", "stockpile",
+                  "proc_total", "li2o_grade", "conc_total", "recovery")
+
+
+def export_main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py export", description=COMMANDS["export"][2])
+    parser.add_argument("--freq", choices=("snapshot", "annual", "quarterly", "monthly"), default="snapshot",
+                        help="Snapshot years as published, or resampled periods")
+    parser.add_argument("--method", choices=("step", "linear", "mass"), default=None,
+                        help="Interpolation for resampled periods (default: linear)")
+    parser.add_argument("--columns", nargs="+", default=list(EXPORT_COLUMNS))
+    parser.add_argument("--format", choices=("csv", "json", "store"), default="csv",
+                        help="store writes a column store directory (see column_store.py)")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--store", metavar="SCHEDULES.cols", help="Read the schedule from a column store")
+    parser.add_argument("--scenario", help="Scenario in --store (default: the first)")
+    args = parser.parse_args(argv)
+    if args.format == "store" and args.output == "-":
+        parser.error("--format store needs -o DIRECTORY")
+
+    if args.store:
+        from column_store import ScheduleStore
+
+        try:
+            sched = ScheduleStore(args.store).schedule(args.scenario or 0)
+        except ValueError:
+            parser.error(f"--scenario {args.scenario!r} not in {args.store}")
+    else:
+        from figure14 import load_schedule
+
+        sched = load_schedule()
+    if args.freq == "snapshot":
+        index = {"year": sched.years.tolist()}
+        view = sched
+    else:
+        view = sched.resample(args.freq, args.method)
+        index = {"year": view.years.tolist(), "period": view.periods.tolist()}
+    try:
+        columns = {name: view[name].round(6).tolist() for name in args.columns}
+    except KeyError as e:
+        parser.error(f"unknown column {e}")
+
+    if args.format == "store":
+        from column_store import write_store
+
+        write_store(args.output, {**index, **columns}, {"kind": "columns", "freq": args.freq})
+        return
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.format == "json":
+            import json
+
+            json.dump({**index, **columns}, out)
+            out.write("\n")
+        else:
+            import csv
+
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(list(index) + list(columns))
+            writer.writerows(zip(*index.values(), *columns.values()))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Greenbushes LoM tools. Run `cli.py COMMAND --help` for a command's options.")
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+
+    # parse the command name only; everything after it belongs to the command
+    args = parser.parse_args(argv[:1])
+    module, entry, _ = COMMANDS[args.command]
+    # export lives here; importing "cli" again under __main__ would load it twice
+    target = globals()[entry] if module == "cli" else getattr(importlib.import_module(module), entry)
+    return target(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
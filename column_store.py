@@ -0,0 +1,262 @@
+"""
+Columnar on-disk store for schedules and extracted graph points.
+
+A store is a directory holding one .npy file per column plus meta.json. Each
+column is read on its own: uncompressed columns are memory-mapped, so opening a
+store and reading two columns of a million-row dataset touches only those two
+files' pages. With compress=True every column is zlib-compressed (.npy.z).
+That is smaller on disk but decompressed in full when read.
+
+Schedules: many LomSchedules go into one store back to back on a shared row
+axis. meta.json lists the scenario names and row offsets, so one scenario's
+column is a zero-copy slice. Every schedule column is stored (inputs and
+derived), along with the year axis and the mining mask.
+
+Points: GraphDataExtractor series as parallel graph / year / value columns.
+
+Usage: python column_store.py STORE [--columns ore waste] [--scenario NAME]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import zlib
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META = "meta.json"
+SUFFIX = ".cols"
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, META))
+
+
+# ==============================================================================
+# GENERIC COLUMNS
+# ==============================================================================
+
+def write_store(path, columns, attrs=None, compress=False, level=6):
+    """Write equal-length 1-D `columns` {name: array} and JSON `attrs` to `path`.
+
+    The store is written next to `path` and swapped in at the end, so readers
+    never see a half-written store.
+    """
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"columns differ in length: {sorted(lengths)}")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    meta = {"format": FORMAT_VERSION, "length": lengths.pop() if lengths else 0,
+            "attrs": attrs or {}, "columns": {}}
+    for i, (name, values) in enumerate(columns.items()):
+        values = np.ascontiguousarray(values)
+        file = f"c{i:03d}.npy" + (".z" if compress else "")
+        if compress:
+            buf = io.BytesIO()
+            np.save(buf, values, allow_pickle=False)
+            with open(os.path.join(tmp, file), "wb") as f:
+                f.write(zlib.compress(buf.getbuffer(), level))
+        else:
+            np.save(os.path.join(tmp, file), values, allow_pickle=False)
+        meta["columns"][name] = {"file": file, "dtype": values.dtype.str, "compressed": compress}
+    with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return path
+
+
+def write_store_chunks(path, chunks, length, dtypes, attrs=None):
+    """Write `length` rows from an iterable of {name: array} chunks, holding one
+    chunk in memory at a time. `dtypes` maps each column to its dtype.
+
+    Columns are uncompressed .npy files filled in place through memory maps;
+    like write_store, the store is swapped in only once it is complete.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    meta = {"format": FORMAT_VERSION, "length": length, "attrs": attrs or {}, "columns": {}}
+    out = {}
+    for i, (name, dtype) in enumerate(dtypes.items()):
+        file = f"c{i:03d}.npy"
+        out[name] = np.lib.format.open_memmap(os.path.join(tmp, file), mode="w+", dtype=dtype, shape=(length,))
+        meta["columns"][name] = {"file": file, "dtype": np.dtype(dtype).str, "compressed": False}
+    row = 0
+    for chunk in chunks:
+        n = len(next(iter(chunk.values())))
+        if row + n > length:
+            raise ValueError(f"more than {length} rows")
+        for name, values in chunk.items():
+            out[name][row:row + n] = values
+        row += n
+    if row != length:
+        raise ValueError(f"expected {length} rows, got {row}")
+    for column in out.values():
+        column.flush()
+    del out
+    with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return path
+
+
+class ColumnStore:
+    """Read side of a store; columns are loaded on first access and cached."""
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, META), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported store format {meta.get('format')!r}")
+        self.path = path
+        self.mmap = mmap
+        self.attrs = meta["attrs"]
+        self.length = meta["length"]
+        self._meta = meta["columns"]
+        self._cache = {}
+
+    @property
+    def columns(self):
+        return tuple(self._meta)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self._meta
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            info = self._meta[name]
+            file = os.path.join(self.path, info["file"])
+            if info["compressed"]:
+                with open(file, "rb") as f:
+                    self._cache[name] = np.load(io.BytesIO(zlib.decompress(f.read())), allow_pickle=False)
+            else:
+                self._cache[name] = np.load(file, mmap_mode="r" if self.mmap else None, allow_pickle=False)
+        return self._cache[name]
+
+    def read(self, names=None):
+        """{name: array} for `names` (default all columns)."""
+        return {name: self[name] for name in (self.columns if names is None else names)}
+
+
+# ==============================================================================
+# SCHEDULES
+# ==============================================================================
+
+def save_schedules(path, schedules, compress=False):
+    """Store [(name, LomSchedule)] back to back; returns the store path."""
+    names = [name for name, _ in schedules]
+    if len(set(names)) != len(names):
+        raise ValueError("scenario names must be unique")
+    offsets = np.cumsum([0] + [len(s) for _, s in schedules]).tolist()
+    columns = {
+        "year": np.concatenate([s.years for _, s in schedules]),
+        "mining": np.concatenate([s.mining for _, s in schedules]),
+    }
+    for name in schedules[0][1].columns:
+        columns[name] = np.concatenate([s[name] for _, s in schedules])
+    attrs = {"kind": "schedules", "scenarios": names, "offsets": offsets,
+             "lom_method": [s.lom_method for _, s in schedules]}
+    return write_store(path, columns, attrs, compress)
+
+
+class ScheduleStore(ColumnStore):
+    """A schedules store; scenario columns are zero-copy slices."""
+
+    def __init__(self, path, mmap=True):
+        super().__init__(path, mmap)
+        if self.attrs.get("kind") != "schedules":
+            raise ValueError(f"{path}: not a schedule store")
+        self.scenarios = self.attrs["scenarios"]
+        self.offsets = self.attrs["offsets"]
+
+    def _rows(self, scenario):
+        i = self.scenarios.index(scenario) if isinstance(scenario, str) else scenario
+        return i, slice(self.offsets[i], self.offsets[i + 1])
+
+    def columns_for(self, scenario, names):
+        """{name: array} of one scenario, reading only `names`."""
+        _, rows = self._rows(scenario)
+        return {name: self[name][rows] for name in names}
+
+    def inputs(self, scenario):
+        """Figure 14-layout inputs for one scenario (see figure14.FIGURE_14)."""
+        from lom_schedule import FULL_INPUTS, MINING_INPUTS
+
+        c = self.columns_for(scenario, ("year", "mining") + MINING_INPUTS + FULL_INPUTS)
+        mining = np.asarray(c["mining"], dtype=bool)
+        inputs = {"years": np.asarray(c["year"]), "mining_years": np.asarray(c["year"])[mining]}
+        inputs.update({name: np.asarray(c[name])[mining] for name in MINING_INPUTS})
+        inputs.update({name: np.asarray(c[name]) for name in FULL_INPUTS})
+        return inputs
+
+    def schedule(self, scenario):
+        """LomSchedule for one scenario."""
+        from lom_schedule import LomSchedule
+
+        i, _ = self._rows(scenario)
+        sched = LomSchedule.from_inputs(self.inputs(i))
+        sched.lom_method = self.attrs["lom_method"][i]
+        return sched
+
+
+# ==============================================================================
+# GRAPH POINTS
+# ==============================================================================
+
+def save_points(path, data, compress=False):
+    """Store GraphDataExtractor.data ({graph name: PointSeries}), sorted by year."""
+    graphs = list(data)
+    parts = [(g, *series.sorted_arrays()) for g, series in data.items()]
+    columns = {
+        "graph": np.concatenate([np.full(len(y), i, dtype=np.int32) for i, (_, y, _) in enumerate(parts)]),
+        "year": np.concatenate([y for _, y, _ in parts]),
+        "value": np.concatenate([v for _, _, v in parts]),
+    }
+    return write_store(path, columns, {"kind": "points", "graphs": graphs}, compress)
+
+
+def load_points(path):
+    """(graph names, years, values) columns, the shape read_points returns."""
+    store = ColumnStore(path)
+    if store.attrs.get("kind") != "points":
+        raise ValueError(f"{path}: not a points store")
+    names = np.array(store.attrs["graphs"], dtype=object)
+    return names[store["graph"]], store["year"], store["value"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect a column store or print selected columns.")
+    parser.add_argument("store")
+    parser.add_argument("--columns", nargs="+", help="Columns to print (default: list the store)")
+    parser.add_argument("--scenario", help="Scenario name in a schedule store")
+    args = parser.parse_args()
+
+    store = ScheduleStore(args.store) if ColumnStore(args.store).attrs.get("kind") == "schedules" \
+        else ColumnStore(args.store)
+    if not args.columns:
+        print(f"{args.store}: {store.attrs.get('kind', 'columns')}, {len(store):,} rows")
+        print("columns: " + ", ".join(store.columns))
+        if isinstance(store, ScheduleStore):
+            print(f"scenarios ({len(store.scenarios)}): " + ", ".join(store.scenarios[:20])
+                  + (" ..." if len(store.scenarios) > 20 else ""))
+    else:
+        cols = (store.columns_for(args.scenario, args.columns) if args.scenario
+                else store.read(args.columns))
+        print(",".join(cols))
+        for row in zip(*(c.tolist() for c in cols.values())):
+            print(",".join(str(v) for v in row))
@@ -0,0 +1,336 @@
+"""
+Figure Digitizer
+Reads chart series straight from the vector drawings of a PDF page (e.g. the
+four Figure 14 LoM charts on page 28) instead of keying points by hand.
+
+For every chart on the page:
+  - the x axis is calibrated from the row of year tick labels,
+  - the y axis from the column of numeric tick labels to its left,
+  - filled paths (stacked areas and bars) are grouped by fill colour and read
+    as band thickness at each year; stroked polylines are read as levels,
+  - legend swatches name the series (CGP1/CGP2/CGP3/TGP, Ore/Waste, ...),
+  - any other numbers inside the plot are returned as per-year annotations.
+
+All path edges of a series are intersected with all year positions in one
+array operation, so a chart takes milliseconds and needs no input. Year
+positions snap to a path vertex a point or two away, and a year where a
+series has no edge reads as null rather than zero.
+
+Usage: python digitize_figure.py DOC.pdf:PAGES [DOC.pdf:PAGES ...] [-o OUT.json]
+"""
+
+import argparse
+import json
+import re
+import warnings
+
+import numpy as np
+
+from read_pdf import parse_pages, parse_request
+
+YEAR_RE = re.compile(r"^(19|20)\d\d$")
+NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?%?x?$")
+
+SWATCH_MAX = 15.0       # legend swatches are smaller than this (pt) in both directions
+ROW_TOLERANCE = 3.0     # labels within this many pt vertically share a row
+BACKGROUND_SHARE = 0.9  # filled paths covering this much of the plot are backgrounds
+SNAP_SHARE = 0.1        # year positions snap to a path vertex within this share of the year spacing
+
+
+def _number(text):
+    return float(text.rstrip("%x"))
+
+
+def _colour(rgb):
+    return "#" + "".join(f"{round(c * 255):02X}" for c in rgb)
+
+
+def _segments(path):
+    """All straight edges of a drawing path as an (n, 4) array of x1, y1, x2, y2."""
+    segs = []
+    for item in path["items"]:
+        kind = item[0]
+        if kind == "l":
+            segs.append((item[1].x, item[1].y, item[2].x, item[2].y))
+        elif kind == "c":
+            segs.append((item[1].x, item[1].y, item[4].x, item[4].y))
+        elif kind == "re":
+            r = item[1]
+            segs += [(r.x0, r.y0, r.x1, r.y0), (r.x1, r.y0, r.x1, r.y1),
+                     (r.x1, r.y1, r.x0, r.y1), (r.x0, r.y1, r.x0, r.y0)]
+        elif kind == "qu":
+            q = item[1]
+            pts = [q.ul, q.ur, q.lr, q.ll, q.ul]
+            segs += [(a.x, a.y, b.x, b.y) for a, b in zip(pts, pts[1:])]
+    return np.asarray(segs, dtype=np.float64).reshape(-1, 4)
+
+
+def crossings(segs, xs, eps=0.5):
+    """y of every edge at every x, shape (2 * len(segs), len(xs)); NaN where an edge misses.
+
+    Edges are extended by `eps` pt so x positions read off text labels still
+    hit a path that ends exactly on the tick.
+    """
+    x1, y1, x2, y2 = (segs[:, i:i + 1] for i in range(4))
+    xs = np.asarray(xs, dtype=np.float64)[None, :]
+    lo, hi = np.minimum(x1, x2) - eps, np.maximum(x1, x2) + eps
+    dx = x2 - x1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(dx != 0, (xs - x1) / dx, 0.0)
+    ys = y1 + t * (y2 - y1)
+    # vertical edges lying exactly on x contribute both end points
+    vertical = (dx == 0) & (np.abs(x1 - xs) <= eps)
+    ys = np.where(vertical, np.minimum(y1, y2), ys)
+    hit = ((xs >= lo) & (xs <= hi) & (dx != 0)) | vertical
+    ys = np.where(hit, ys, np.nan)
+    ys_bottom = np.where(vertical, np.maximum(y1, y2), ys)
+    return np.concatenate([ys, ys_bottom])
+
+
+def _rows(words, tolerance=ROW_TOLERANCE):
+    """Group words into rows by vertical centre."""
+    rows = []
+    for w in sorted(words, key=lambda w: (w[1] + w[3]) / 2):
+        cy = (w[1] + w[3]) / 2
+        if rows and abs(rows[-1][0] - cy) <= tolerance:
+            rows[-1][1].append(w)
+        else:
+            rows.append([cy, [w]])
+    return [sorted(r[1], key=lambda w: w[0]) for r in rows]
+
+
+def _split_axes(row):
+    """Split a row of year labels into one run per chart (side-by-side charts)."""
+    gaps = np.diff([(w[0] + w[2]) / 2 for w in row])
+    typical = np.median(gaps) if len(gaps) else 0.0
+    runs = [[row[0]]]
+    for prev, w, gap in zip(row, row[1:], gaps):
+        if int(w[4]) <= int(prev[4]) or gap > 2.5 * typical:
+            runs.append([])
+        runs[-1].append(w)
+    return [run for run in runs if len(run) >= 2]
+
+
+def _y_axis(numbers, left, right, top, bottom):
+    """Largest aligned (right or left edge) column of numeric labels between `left` and `right`."""
+    cands = [w for w in numbers if left <= w[0] and w[2] <= right and top <= (w[1] + w[3]) / 2 <= bottom]
+    groups = {}
+    for w in cands:
+        groups.setdefault(("r", round(w[2] / 3)), []).append(w)
+        groups.setdefault(("l", round(w[0] / 3)), []).append(w)
+    groups = [g for g in groups.values() if len(g) >= 2]
+    if not groups:
+        return None
+    return max(groups, key=lambda g: (len(g), max(w[2] for w in g)))
+
+
+def _legend(paths, words):
+    """[(colour, (cx, cy), label)] from small filled swatches followed by text on the same line."""
+    entries = []
+    for path in paths:
+        r = path["rect"]
+        if path.get("fill") is None or r.width > SWATCH_MAX or r.height > SWATCH_MAX:
+            continue
+        cy = (r.y0 + r.y1) / 2
+        right = [w for w in words if w[0] >= r.x1 - 1 and abs((w[1] + w[3]) / 2 - cy) <= max(r.height, 4)]
+        if not right:
+            continue
+        first = min(right, key=lambda w: w[0])
+        if first[0] - r.x1 > 3 * SWATCH_MAX:
+            continue
+        line = sorted((w for w in words if w[5:7] == first[5:7] and w[0] >= first[0]), key=lambda w: w[0])
+        entries.append((_colour(path["fill"]), ((r.x0 + r.x1) / 2, cy), " ".join(w[4] for w in line)))
+    return entries
+
+
+def _distance(point, bbox):
+    x, y = point
+    dx = max(bbox[0] - x, 0.0, x - bbox[2])
+    dy = max(bbox[1] - y, 0.0, y - bbox[3])
+    return np.hypot(dx, dy)
+
+
+def _gridlines(paths):
+    """(y, x0, x1) of every horizontal stroked edge on the page."""
+    lines = [_segments(p) for p in paths if p.get("fill") is None and p.get("color") is not None]
+    segs = np.concatenate(lines) if lines else np.empty((0, 4))
+    segs = segs[segs[:, 1] == segs[:, 3]]
+    return np.column_stack([segs[:, 1], np.minimum(segs[:, 0], segs[:, 2]), np.maximum(segs[:, 0], segs[:, 2])])
+
+
+def _axes(words, paths):
+    """Calibrated axes for every chart on the page, in reading order."""
+    grid = _gridlines(paths)
+    year_words = [w for w in words if YEAR_RE.match(w[4])]
+    numbers = [w for w in words if NUMBER_RE.match(w[4]) and not YEAR_RE.match(w[4])]
+    runs = [run for row in _rows(year_words) for run in _split_axes(row)]
+    runs.sort(key=lambda run: (round(run[0][1]), run[0][0]))
+
+    axes = []
+    for run in runs:
+        xs = np.array([(w[0] + w[2]) / 2 for w in run])
+        axis_y = min(w[1] for w in run)
+        half = (xs[-1] - xs[0]) / (len(xs) - 1) / 2
+
+        # charts above on an overlapping x range bound this one from the top
+        upper = max((max(w[3] for w in r) for r in runs
+                     if min(w[1] for w in r) < axis_y - ROW_TOLERANCE
+                     and r[0][0] < run[-1][2] and r[-1][2] > run[0][0]), default=0.0)
+        # charts to the left on the same row bound the y-axis search
+        left = max((r[-1][2] for r in runs
+                    if abs(min(w[1] for w in r) - axis_y) <= ROW_TOLERANCE and r[-1][2] < run[0][0]), default=0.0)
+
+        y_labels = _y_axis(numbers, left, run[0][0], upper, axis_y)
+        if y_labels is None:
+            continue
+        label_y = np.array([(w[1] + w[3]) / 2 for w in y_labels])
+        # snap tick labels onto their gridline where one starts just right of the label
+        rows = grid[(np.abs(grid[:, 1] - max(w[2] for w in y_labels)) <= 3 * SWATCH_MAX)]
+        if len(rows):
+            dist = np.abs(label_y[:, None] - rows[None, :, 0])
+            near = dist.min(axis=1) <= 2 * ROW_TOLERANCE
+            label_y = np.where(near, rows[dist.argmin(axis=1), 0], label_y)
+        label_v = np.array([_number(w[4]) for w in y_labels])
+        slope, intercept = np.polyfit(label_y, label_v, 1)
+        top = min(w[1] for w in y_labels) - 2 * ROW_TOLERANCE
+        axes.append({
+            "xs": xs,
+            "years": np.array([int(w[4]) for w in run]),
+            "bbox": (xs[0] - half, top, xs[-1] + half, axis_y),
+            "upper": upper,
+            "y_labels": y_labels,
+            "to_value": lambda y, m=slope, c=intercept: m * y + c,
+        })
+    return axes, numbers
+
+
+def snap(xs, segs, tolerance):
+    """Move each x onto the nearest path vertex within `tolerance` pt.
+
+    Year labels are centred on their ticks only to within a point or so; the
+    vertices of an area or line series sit exactly on them.
+    """
+    vertices = np.unique(segs[:, [0, 2]])
+    if not len(vertices):
+        return xs
+    dist = np.abs(xs[:, None] - vertices[None, :])
+    return np.where(dist.min(axis=1) <= tolerance, vertices[dist.argmin(axis=1)], xs)
+
+
+def _read_series(segments, axis, thickness):
+    """Value of a series at each year; NaN where it has no edge there."""
+    segs = np.concatenate(segments)
+    xs = snap(axis["xs"], segs, SNAP_SHARE * np.median(np.diff(axis["xs"])))
+    ys = crossings(segs, xs)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if thickness:
+            values = axis["to_value"](np.nanmin(ys, axis=0)) - axis["to_value"](np.nanmax(ys, axis=0))
+            return np.round(values, 3)
+        return np.round(axis["to_value"](np.nanmean(ys, axis=0)), 3)
+
+
+def digitize_page(page):
+    """Digitize every chart on a pymupdf page; returns a list of chart dicts."""
+    words = page.get_text("words")
+    paths = page.get_drawings()
+    axes, numbers = _axes(words, paths)
+    if not axes:
+        return []
+
+    # each legend entry belongs to the nearest chart
+    legend = _legend(paths, words)
+    names = [{} for _ in axes]
+    for colour, centre, label in legend:
+        nearest = min(range(len(axes)), key=lambda i: _distance(centre, axes[i]["bbox"]))
+        names[nearest][colour] = label
+    swatches = {centre for _, centre, _ in legend}
+
+    charts = []
+    for axis, chart_names in zip(axes, names):
+        x0, top, x1, axis_y = axis["bbox"]
+        plot_area = (x1 - x0) * (axis_y - top)
+
+        # ── series from filled / stroked paths ──
+        bands, levels = {}, {}
+        for path in paths:
+            r = path["rect"]
+            if r.x1 < x0 or r.x0 > x1 or r.y1 < top or r.y0 > axis_y:
+                continue
+            # a filled path with no area (tick marks) is only ever drawn by its stroke
+            if path.get("fill") is not None and r.width and r.height:
+                if ((r.x0 + r.x1) / 2, (r.y0 + r.y1) / 2) in swatches:
+                    continue
+                if r.width * r.height >= BACKGROUND_SHARE * plot_area or all(c > 0.97 for c in path["fill"]):
+                    continue
+                bands.setdefault(_colour(path["fill"]), []).append(_segments(path))
+            elif path.get("color") is not None:
+                segs = _segments(path)
+                # gridlines, ticks and the frame are purely horizontal / vertical
+                if len(segs) and ((segs[:, 1] != segs[:, 3]) & (segs[:, 0] != segs[:, 2])).any():
+                    levels.setdefault(_colour(path["color"]), []).append(segs)
+
+        series = {}
+        for colour, segments in bands.items():
+            series[chart_names.get(colour, colour)] = _read_series(segments, axis, thickness=True)
+        for colour, segments in levels.items():
+            series[chart_names.get(colour, colour)] = _read_series(segments, axis, thickness=False)
+
+        # ── annotations: remaining numbers inside the plot, snapped to the nearest year ──
+        annotations = {}
+        for w in sorted(numbers, key=lambda w: w[1]):
+            cx, cy = (w[0] + w[2]) / 2, (w[1] + w[3]) / 2
+            if w in axis["y_labels"] or not (x0 <= cx <= x1 and top <= cy <= axis_y):
+                continue
+            year = int(axis["years"][np.argmin(np.abs(axis["xs"] - cx))])
+            annotations.setdefault(year, []).append(_number(w[4]))
+
+        # title: nearest row of non-numeric text above the plot; left out when there is none
+        titles = [w for w in words if axis["upper"] <= (w[1] + w[3]) / 2 <= top + ROW_TOLERANCE
+                  and w[0] < x1 and w[2] > x0 - (x1 - x0) / 4 and not NUMBER_RE.match(w[4])]
+        title_rows = _rows(titles)
+
+        chart = {"title": " ".join(w[4] for w in title_rows[-1])} if title_rows else {}
+        charts.append({
+            **chart,
+            "bbox": [float(v) for v in axis["bbox"]],
+            "years": axis["years"].tolist(),
+            "series": {name: [None if np.isnan(v) else v for v in values.tolist()]
+                       for name, values in series.items()},
+            "annotations": dict(sorted(annotations.items())),
+        })
+    return charts
+
+
+def digitize(requests):
+    """Digitize (pdf_path, page_spec) requests; returns {path: {page_no: charts}}."""
+    import pymupdf
+
+    out = {}
+    for pdf_path, spec in requests:
+        with pymupdf.open(pdf_path) as doc:
+            for page_no in parse_pages(spec, len(doc)):
+                out.setdefault(pdf_path, {})[page_no + 1] = digitize_page(doc[page_no])
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Digitize chart series from PDF vector drawings.")
+    parser.add_argument("pdfs", nargs="+", metavar="DOC.pdf[:PAGES]")
+    parser.add_argument("-o", "--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    requests = [parse_request(a) for a in args.pdfs]
+    for _, spec in requests:
+        try:
+            parse_pages(spec, 0)
+        except ValueError as e:
+            parser.error(str(e))
+    result = digitize(requests)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✓ Digitized {sum(len(c) for pages in result.values() for c in pages.values())} charts to {args.output}")
+    else:
+        print(text)
@@ -0,0 +1,530 @@
+"""
+Announcement Search Index
+Persistent inverted index over the page text and tables of extracted ASX
+announcements. A term, phrase or table row is found across hundreds of
+documents in milliseconds, without grepping read_pdf.py dumps by hand.
+
+An index is a directory:
+  index.json          documents (path, SHA-256, pages, segment, deleted) and the live segments
+  seg-NNNN/           one immutable segment per `add` run
+    terms.cols        sorted terms with the start and count of their postings
+    postings.cols     doc, page, token position and character offset, grouped by term
+    pages.cols        doc, page and byte range of the page text in text.bin
+    text.bin          UTF-8 page text, for snippets and compaction
+    row_terms.cols    sorted terms of table rows (cells, caption and header)
+    row_postings.cols table row ids, grouped by term
+    rows.cols         table, doc and row number of every table row
+    tables.json       caption, page and cells of every table
+
+Adding documents is incremental. Files already indexed with the same
+SHA-256 are skipped. New files go into a new segment. A file whose content
+changed is re-indexed into the new segment, and its old copy is marked
+deleted and filtered from results. Once there are more than MAX_SEGMENTS
+segments, all live documents are merged into one and the deleted ones are
+dropped. The merge reads text.bin and tables.json, so no PDF is re-parsed.
+
+PDF text and tables are extracted through read_pdf.py's page cache on a
+process pool. Tables are found with pymupdf's find_tables, and each is
+captioned with the nearest "Table N" line above it. Text files written by
+read_pdf.py ("--- PAGE n ---" markers) are indexed as text only.
+
+Queries are lower-cased and split into the same tokens as the text, e.g.
+"a$/t", "li2o", "1.92%". Every term must appear on the page (or in the
+table row, its caption or header). Quote the query for an exact phrase. A
+trailing * matches a prefix ("recover*").
+
+Usage: python doc_index.py add DOC.pdf|DOC.txt|DIR [...] [--index DIR] [--workers N]
+       python doc_index.py search "processing cost" [--index DIR] [--limit 20]
+       python doc_index.py tables "processing cost a$/t" [--index DIR]
+       python doc_index.py compact|stats [--index DIR]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from collections import defaultdict
+from functools import reduce
+from itertools import count
+
+import numpy as np
+
+from column_store import ColumnStore, write_store
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".doc_index")
+FORMAT_VERSION = 1
+MAX_SEGMENTS = 8
+SNIPPET_CHARS = 80
+
+TOKEN = re.compile(r"[a-z0-9$%](?:[a-z0-9$%/.,]*[a-z0-9$%])?")
+PAGE_MARK = re.compile(r"^--- PAGE (\d+) ---$", re.MULTILINE)
+
+# doc, page and token position packed into one int64 for set operations
+PAGE_BITS = 20
+POS_BITS = 24
+
+
+def tokenize(text):
+    """[(term, character offset)] of lower-cased text."""
+    return [(m.group(), m.start()) for m in TOKEN.finditer(text.lower())]
+
+
+def _page_tokens(text, ids):
+    """(term ids, character offsets) arrays of one page; new terms are added to `ids`."""
+    matches = list(TOKEN.finditer(text.lower()))
+    terms = np.fromiter(map(ids.__getitem__, map(re.Match.group, matches)), np.int64, len(matches))
+    return terms, np.fromiter(map(re.Match.start, matches), np.int32, len(matches))
+
+
+def query_terms(query):
+    """Terms of a query; a word ending in * keeps it as a prefix term."""
+    terms = []
+    for word in query.split():
+        tokens = [term for term, _ in tokenize(word)]
+        if tokens and word.endswith("*"):
+            tokens[-1] += "*"
+        terms.extend(tokens)
+    return terms
+
+
+# ==============================================================================
+# SOURCES
+# ==============================================================================
+
+def _text_pages(path):
+    """[(1-based page, text)] of a read_pdf.py dump, in page order; a file without page
+    markers is page 1.
+
+    A page marker that repeats (concatenated dumps) joins its texts, so every
+    page appears once and postings stay sorted by page.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    parts = PAGE_MARK.split(text)
+    if len(parts) == 1:
+        return [(1, text)]
+    pages = {}
+    for i in range(1, len(parts), 2):
+        page = int(parts[i])
+        pages[page] = f"{pages[page]}\n{parts[i + 1]}" if page in pages else parts[i + 1]
+    return sorted(pages.items())
+
+
+def _read_documents(files, workers=None, cache_dir=None):
+    """{path: (pages [(page, text)], tables [{page, caption, rows}])} for PDF and text files."""
+    import read_pdf
+
+    cache_dir = cache_dir or read_pdf.CACHE_DIR
+    docs = {path: (_text_pages(path), []) for path in files if not path.lower().endswith(".pdf")}
+    pdfs = [path for path in files if path.lower().endswith(".pdf")]
+    if pdfs:
+        jobs = read_pdf.cache_pages([(path, None) for path in pdfs], workers, cache_dir, tables=True)
+        for path, doc_hash, pages, _ in jobs:
+            texts, tables = [], []
+            for page_no in pages:
+                with open(read_pdf.page_path(cache_dir, doc_hash, page_no), encoding="utf-8") as f:
+                    texts.append((page_no + 1, f.read()))
+                with open(read_pdf.tables_path(cache_dir, doc_hash, page_no), encoding="utf-8") as f:
+                    tables.extend({"page": page_no + 1, "caption": t["caption"], "rows": t["rows"]} for t in json.load(f))
+            docs[path] = (texts, tables)
+    return docs
+
+
+def _expand(paths):
+    """Files to index: every given file, plus each directory's *.pdf and *.txt files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith((".pdf", ".txt")))
+        else:
+            files.append(path)
+    return [os.path.abspath(path) for path in files]
+
+
+# ==============================================================================
+# SEGMENTS
+# ==============================================================================
+
+def _write_postings(path, term_ids, vocab, columns):
+    """Write terms.cols / postings.cols (named by `path` prefix), postings grouped by term.
+
+    `columns` arrive in posting order (doc, page, position); the stable sort
+    keeps that order within each term.
+    """
+    vocab = np.array(vocab, dtype=str) if vocab else np.array([], dtype="U1")
+    term_ids = np.asarray(term_ids, dtype=np.int64)
+    order = np.argsort(vocab, kind="stable")
+    rank = np.empty(len(vocab), dtype=np.int64)
+    rank[order] = np.arange(len(vocab))
+    term_rank = rank[term_ids]
+    sort = np.argsort(term_rank, kind="stable")
+    counts = np.bincount(term_rank, minlength=len(vocab))
+    write_store(f"{path}terms.cols", {"term": vocab[order], "start": np.cumsum(counts) - counts, "count": counts})
+    write_store(f"{path}postings.cols", {name: np.asarray(values, dtype=np.int32)[sort]
+                                         for name, values in columns.items()})
+
+
+def write_segment(path, docs):
+    """Write one segment for {doc id: (pages [(page, text)], tables)}."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    ids = defaultdict(count().__next__)
+    term_ids, post = [], {"doc": [], "page": [], "pos": [], "offset": []}
+    pages = {"doc": [], "page": [], "start": [], "end": []}
+    with open(os.path.join(tmp, "text.bin"), "wb") as blob:
+        for doc, (texts, _) in docs.items():
+            for page, text in texts:
+                terms, offsets = _page_tokens(text, ids)
+                term_ids.append(terms)
+                post["doc"].append(np.full(len(terms), doc, dtype=np.int32))
+                post["page"].append(np.full(len(terms), page, dtype=np.int32))
+                post["pos"].append(np.arange(len(terms), dtype=np.int32))
+                post["offset"].append(offsets)
+                data = text.encode("utf-8")
+                pages["doc"].append(doc)
+                pages["page"].append(page)
+                pages["start"].append(blob.tell())
+                blob.write(data)
+                pages["end"].append(blob.tell())
+    _write_postings(os.path.join(tmp, ""), np.concatenate(term_ids or [np.empty(0, np.int64)]), list(ids),
+                    {name: np.concatenate(v or [np.empty(0, np.int32)]) for name, v in post.items()})
+    write_store(os.path.join(tmp, "pages.cols"), {name: np.asarray(v, dtype=np.int64) for name, v in pages.items()})
+
+    # table rows: one posting per distinct term of the row, its caption and its header
+    tables, rows = [], {"table": [], "doc": [], "row": []}
+    ids, term_ids, row_ids = {}, [], []
+    for doc, (_, doc_tables) in docs.items():
+        for table in doc_tables:
+            header = table["rows"][0] if len(table["rows"]) > 1 else []
+            context = {term for cell in [table["caption"]] + header for term, _ in tokenize(cell)}
+            for r, cells in enumerate(table["rows"][1:] if header else table["rows"], 1 if header else 0):
+                terms = context | {term for cell in cells for term, _ in tokenize(cell)}
+                term_ids.extend(ids.setdefault(term, len(ids)) for term in terms)
+                row_ids.extend([len(rows["table"])] * len(terms))
+                rows["table"].append(len(tables))
+                rows["doc"].append(doc)
+                rows["row"].append(r)
+            tables.append({"doc": doc, "page": table["page"], "caption": table["caption"], "rows": table["rows"]})
+    _write_postings(os.path.join(tmp, "row_"), term_ids, list(ids), {"row": row_ids})
+    write_store(os.path.join(tmp, "rows.cols"), {name: np.asarray(v, dtype=np.int32) for name, v in rows.items()})
+    with open(os.path.join(tmp, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump(tables, f)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return path
+
+
+class Segment:
+    """Read side of a segment; every column is memory-mapped on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self.terms = ColumnStore(os.path.join(path, "terms.cols"))
+        self.postings = ColumnStore(os.path.join(path, "postings.cols"))
+        self.pages = ColumnStore(os.path.join(path, "pages.cols"))
+        self.row_terms = ColumnStore(os.path.join(path, "row_terms.cols"))
+        self.row_postings = ColumnStore(os.path.join(path, "row_postings.cols"))
+        self.rows = ColumnStore(os.path.join(path, "rows.cols"))
+        self._tables = None
+        self._text = None
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            with open(os.path.join(self.path, "tables.json"), encoding="utf-8") as f:
+                self._tables = json.load(f)
+        return self._tables
+
+    @staticmethod
+    def _lookup(terms, term):
+        """Posting rows of `term` (a trailing * matches a prefix)."""
+        vocab = terms["term"]
+        if term.endswith("*"):
+            lo, hi = np.searchsorted(vocab, [term[:-1], term[:-1] + "\U0010ffff"])
+        else:
+            lo = np.searchsorted(vocab, term)
+            hi = lo + 1 if lo < len(vocab) and vocab[lo] == term else lo
+        if lo == hi:
+            return np.empty(0, dtype=np.int64)
+        start, count = terms["start"][lo:hi], terms["count"][lo:hi]
+        return np.concatenate([np.arange(s, s + c) for s, c in zip(start.tolist(), count.tolist())])
+
+    def term_postings(self, term):
+        """{doc, page, pos, offset} arrays of `term` on every page, sorted by doc, page and position."""
+        rows = self._lookup(self.terms, term)
+        post = {name: np.asarray(self.postings[name][rows]) for name in self.postings.columns}
+        if term.endswith("*"):
+            # several terms' postings, each sorted on its own
+            order = np.lexsort((post["pos"], post["page"], post["doc"]))
+            post = {name: values[order] for name, values in post.items()}
+        return post
+
+    def row_hits(self, term):
+        """Table row ids whose cells, caption or header contain `term`."""
+        rows = self._lookup(self.row_terms, term)
+        return np.unique(self.row_postings["row"][rows])
+
+    def _slice(self, i):
+        if self._text is None:
+            file = os.path.join(self.path, "text.bin")
+            self._text = np.memmap(file, dtype=np.uint8, mode="r") if os.path.getsize(file) \
+                else np.zeros(0, dtype=np.uint8)
+        return bytes(self._text[self.pages["start"][i]:self.pages["end"][i]]).decode("utf-8")
+
+    def page_text(self, doc, page):
+        return self._slice(np.flatnonzero((self.pages["doc"] == doc) & (self.pages["page"] == page))[0])
+
+    def documents(self, docs):
+        """{doc id: (pages, tables)} for `docs`, rebuilt from the stored text and tables."""
+        out = {doc: ([], []) for doc in docs}
+        for i, (doc, page) in enumerate(zip(self.pages["doc"].tolist(), self.pages["page"].tolist())):
+            if doc in out:
+                out[doc][0].append((page, self._slice(i)))
+        for table in self.tables:
+            if table["doc"] in out:
+                out[table["doc"]][1].append({k: table[k] for k in ("page", "caption", "rows")})
+        return out
+
+
+# ==============================================================================
+# INDEX
+# ==============================================================================
+
+class DocIndex:
+    """A search index directory; see the module docstring for the layout."""
+
+    def __init__(self, path=INDEX_DIR):
+        self.path = path
+        try:
+            with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            self.meta = {"format": FORMAT_VERSION, "next_doc": 0, "next_segment": 0, "segments": [], "docs": {}}
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported index format {self.meta.get('format')!r}")
+        self._segments = {}
+
+    def _save(self):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, f"index.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    def segment(self, name):
+        if name not in self._segments:
+            self._segments[name] = Segment(os.path.join(self.path, name))
+        return self._segments[name]
+
+    @property
+    def live(self):
+        """{doc id: document entry} of documents not deleted."""
+        return {int(doc): d for doc, d in self.meta["docs"].items() if not d["deleted"]}
+
+    def _deleted(self):
+        return np.array([int(doc) for doc, d in self.meta["docs"].items() if d["deleted"]], dtype=np.int32)
+
+    def _new_segment(self, docs):
+        name = f"seg-{self.meta['next_segment']:04d}"
+        self.meta["next_segment"] += 1
+        write_segment(os.path.join(self.path, name), docs)
+        self.meta["segments"].append(name)
+        return name
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def add(self, paths, workers=None, cache_dir=None):
+        """Index new and changed files under `paths`; returns (added, replaced, unchanged) paths."""
+        from read_pdf import file_hash
+
+        live = {d["path"]: d for d in self.live.values()}
+        hashes = {d["hash"] for d in live.values()}
+        added, replaced, unchanged, files = [], [], [], {}
+        for path in _expand(paths):
+            digest = file_hash(path)
+            old = live.get(path)
+            if (old and old["hash"] == digest) or (not old and digest in hashes) or path in files:
+                unchanged.append(path)
+                continue
+            if old:
+                old["deleted"] = True
+                replaced.append(path)
+            else:
+                added.append(path)
+            files[path] = digest
+        if not files:
+            return added, replaced, unchanged
+
+        read = _read_documents(list(files), workers, cache_dir)
+        docs = {}
+        for path, digest in files.items():
+            doc = self.meta["next_doc"]
+            self.meta["next_doc"] += 1
+            docs[doc] = read[path]
+            self.meta["docs"][str(doc)] = {"path": path, "hash": digest, "pages": len(read[path][0]),
+                                           "tables": len(read[path][1]), "deleted": False}
+        name = self._new_segment(docs)
+        for doc in docs:
+            self.meta["docs"][str(doc)]["segment"] = name
+        if len(self.meta["segments"]) > MAX_SEGMENTS:
+            self.compact()
+        else:
+            self._save()
+        return added, replaced, unchanged
+
+    def compact(self):
+        """Merge every live document into one segment and drop the deleted ones.
+
+        index.json is saved before the old segments are removed, so a crash
+        in between leaves unused directories, never an index that points at
+        missing ones.
+        """
+        old = list(self.meta["segments"])
+        live = self.live
+        docs = {}
+        for name in old:
+            docs.update(self.segment(name).documents([doc for doc, d in live.items() if d["segment"] == name]))
+        self.meta["segments"] = []
+        name = self._new_segment(docs)
+        self.meta["docs"] = {str(doc): {**d, "segment": name} for doc, d in live.items()}
+        self._save()
+        self._segments.clear()
+        for seg in old:
+            shutil.rmtree(os.path.join(self.path, seg), ignore_errors=True)
+        return name
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def search(self, query, limit=20):
+        """Pages containing every query term (or the quoted phrase), best first.
+
+        Returns [{"path", "page", "score", "snippet"}]; score is the number of
+        term (or phrase) hits on the page.
+        """
+        phrase = len(query) > 1 and query[0] == query[-1] == '"'
+        terms = query_terms(query.strip('"'))
+        if not terms:
+            return []
+        deleted = self._deleted()
+        hits = []
+        for s, name in enumerate(self.meta["segments"]):
+            seg = self.segment(name)
+            post = [seg.term_postings(term) for term in terms]
+            if any(not len(p["doc"]) for p in post):
+                continue
+            # keys are sorted, so a page's hits are contiguous and the first is its earliest
+            keys = [(p["doc"].astype(np.int64) << PAGE_BITS) | p["page"] for p in post]
+            pages = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True),
+                           [k[np.r_[True, k[1:] != k[:-1]]] for k in keys])
+            pages = pages[~np.isin(pages >> PAGE_BITS, deleted)]
+            first_keys, first_offsets = keys[0], post[0]["offset"]
+            if phrase:
+                starts = (keys[0] << POS_BITS) | post[0]["pos"]
+                ok = np.isin(keys[0], pages)
+                for i, (k, p) in enumerate(zip(keys[1:], post[1:]), 1):
+                    ok &= np.isin(starts + i, (k << POS_BITS) | p["pos"])
+                first_keys, first_offsets = keys[0][ok], post[0]["offset"][ok]
+                pages = np.unique(first_keys)
+            if not len(pages):
+                continue
+            # hits of every term, or of the phrase itself
+            score = sum(np.searchsorted(k, pages, side="right") - np.searchsorted(k, pages)
+                        for k in ([first_keys] if phrase else keys))
+            first = first_offsets[np.searchsorted(first_keys, pages)]
+            hits.append(np.stack([score, np.full(len(pages), s), pages, first]))
+        if not hits:
+            return []
+
+        score, segment, key, offset = np.concatenate(hits, axis=1)
+        top = np.lexsort((key, -score))[:limit]
+        results = []
+        for score, s, key, offset in zip(score[top].tolist(), segment[top].tolist(), key[top].tolist(),
+                                         offset[top].tolist()):
+            doc, page = key >> PAGE_BITS, key & ((1 << PAGE_BITS) - 1)
+            text = self.segment(self.meta["segments"][s]).page_text(doc, page)
+            snippet = text[max(offset - SNIPPET_CHARS // 2, 0):offset + SNIPPET_CHARS]
+            results.append({"path": self.meta["docs"][str(doc)]["path"], "page": page, "score": score,
+                            "snippet": " ".join(snippet.split())})
+        return results
+
+    def tables(self, query, limit=200):
+        """Table rows matching every query term, in document then page order.
+
+        Returns [{"path", "page", "caption", "header", "row"}].
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        deleted = self._deleted()
+        results = []
+        for name in self.meta["segments"]:
+            seg = self.segment(name)
+            rows = reduce(np.intersect1d, [seg.row_hits(term) for term in terms])
+            rows = rows[~np.isin(seg.rows["doc"][rows], deleted)]
+            for r in rows.tolist():
+                table = seg.tables[int(seg.rows["table"][r])]
+                header = table["rows"][0] if len(table["rows"]) > 1 else []
+                results.append({"path": self.meta["docs"][str(table["doc"])]["path"], "page": table["page"],
+                                "caption": table["caption"], "header": header,
+                                "row": table["rows"][int(seg.rows["row"][r])]})
+        results.sort(key=lambda r: (r["path"], r["page"]))
+        return results[:limit]
+
+    def stats(self):
+        live = self.live
+        return {"documents": len(live), "pages": sum(d["pages"] for d in live.values()),
+                "tables": sum(d["tables"] for d in live.values()),
+                "deleted": len(self.meta["docs"]) - len(live), "segments": len(self.meta["segments"]),
+                "terms": sum(len(self.segment(name).terms) for name in self.meta["segments"])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the announcement search index.")
+    parser.add_argument("command", choices=("add", "search", "tables", "compact", "stats"))
+    parser.add_argument("args", nargs="*", help="add: PDFs, text dumps or directories; search/tables: the query")
+    parser.add_argument("--index", default=INDEX_DIR, help="Index directory (default: .doc_index next to this script)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for PDF extraction")
+    parser.add_argument("--cache-dir", default=None, help="read_pdf.py page cache (default: its own)")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = DocIndex(args.index)
+    start = time.perf_counter()
+    if args.command == "add":
+        if not args.args:
+            parser.error("add needs at least one file or directory")
+        added, replaced, unchanged = index.add(args.args, args.workers, args.cache_dir)
+        print(f"{len(added)} added, {len(replaced)} replaced, {len(unchanged)} unchanged "
+              f"in {time.perf_counter() - start:.2f}s")
+        print(", ".join(f"{k} {v:,}" for k, v in index.stats().items()))
+    elif args.command in ("search", "tables"):
+        query = " ".join(args.args)
+        if args.command == "search":
+            results = index.search(query, args.limit)
+            elapsed = time.perf_counter() - start
+            for r in results:
+                print(f"{os.path.basename(r['path'])} p{r['page']} ({r['score']}): ...{r['snippet']}...")
+        else:
+            results = index.tables(query, args.limit)
+            elapsed = time.perf_counter() - start
+            for r in results:
+                print(f"{os.path.basename(r['path'])} p{r['page']} {r['caption'] or '(no caption)'}: "
+                      + " | ".join(f"{h}={v}" if h else v for h, v in zip(r["header"] or [""] * len(r["row"]), r["row"])))
+        print(f"\n{len(results)} result(s) in {elapsed * 1000:.1f} ms")
+    elif args.command == "compact":
+        index.compact()
+        print(", ".join(f"{k} {v:,}" for k, v in index.stats().items()))
+    else:
+        print(", ".join(f"{k} {v:,}" for k, v in index.stats().items()))
+    return index
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,185 @@ Graph Data Extraction Tool
 This script helps extract data points from graphs in the IGO Limited Annual Report
 (Page 28) and export them to CSV/Excel format.
 
+Points are held per graph in a columnar PointSeries (year and value arrays plus
+a year -> slot index), and can be bulk-loaded from CSV, JSON, stdin or a
+column store (see column_store.py).
+
 Usage: python extract_graph_data.py
+       python extract_graph_data.py --load points.csv [--load more.json] [--export csv|excel|store]
+       cat points.csv | python extract_graph_data.py --load - --export csv
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import csv
+import io
+import json
+import os
 from datetime import datetime
 import sys
 
+import numpy as np
+
+import profiling
+from profiling import count, stage
+
+MIN_YEAR, MAX_YEAR = 1900, 2200
+
+
+class PointSeries:
+    """Year/value points for one graph.
+
+    Years and values live in growable int64/float64 arrays; `index` maps a
+    year to its slot so lookup, update and delete are O(1). Deleting moves the
+    last point into the freed slot, so slot order is not year order - use
+    `sorted_arrays()` for display and export.
+    """
+
+    def __init__(self, capacity=16):
+        self.years = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.index = {}
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, n):
+        if n > len(self.years):
+            capacity = max(n, 2 * len(self.years))
+            self.years = np.resize(self.years, capacity)
+            self.values = np.resize(self.values, capacity)
+
+    def get(self, year):
+        slot = self.index.get(year)
+        return None if slot is None else float(self.values[slot])
+
+    def set(self, year, value):
+        slot = self.index.get(year)
+        if slot is None:
+            self._reserve(self.size + 1)
+            slot = self.size
+            self.years[slot] = year
+            self.index[year] = slot
+            self.size += 1
+        self.values[slot] = value
+
+    def delete(self, year):
+        """Remove `year` and return its value, or None if it is absent."""
+        slot = self.index.pop(year, None)
+        if slot is None:
+            return None
+        value = float(self.values[slot])
+        last = self.size - 1
+        if slot != last:
+            moved = int(self.years[last])
+            self.years[slot] = moved
+            self.values[slot] = self.values[last]
+            self.index[moved] = slot
+        self.size = last
+        return value
+
+    def extend(self, years, values):
+        """Bulk insert/update; within `years` the last duplicate wins.
+
+        Returns the number of distinct years stored.
+        """
+        years = np.asarray(years, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        # keep the last occurrence of each year
+        rev_unique, rev_pos = np.unique(years[::-1], return_index=True)
+        keep = len(years) - 1 - rev_pos
+        years, values = rev_unique, values[keep]
+
+        slots = np.fromiter((self.index.get(y, -1) for y in years.tolist()), dtype=np.int64, count=len(years))
+        existing = slots >= 0
+        self.values[slots[existing]] = values[existing]
+
+        new_years, new_values = years[~existing], values[~existing]
+        start = self.size
+        self._reserve(start + len(new_years))
+        self.years[start:start + len(new_years)] = new_years
+        self.values[start:start + len(new_years)] = new_values
+        self.index.update(zip(new_years.tolist(), range(start, start + len(new_years))))
+        self.size += len(new_years)
+        return len(years)
+
+    def sorted_arrays(self):
+        order = np.argsort(self.years[:self.size], kind="stable")
+        return self.years[:self.size][order], self.values[:self.size][order]
+
+
+def validate_points(years, values):
+    """Vectorized check of raw year/value columns.
+
+    Returns (years int64, values float64, ok mask); rows where either field is
+    not numeric, the year is not a whole number in range or the value is not
+    finite are masked out.
+    """
+    years = _to_float(years)
+    values = _to_float(values)
+    ok = (np.isfinite(years) & np.isfinite(values)
+          & (years == np.round(years)) & (years >= MIN_YEAR) & (years <= MAX_YEAR))
+    return np.where(ok, years, 0).astype(np.int64), values, ok
+
+
+def _to_float(column):
+    try:
+        return np.asarray(column, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(column), np.nan)
+        for i, v in enumerate(column):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def read_points(source, fmt=None):
+    """Read (graph, year, value) columns from a CSV or JSON file path, "-" for
+    stdin, or a column store directory written by export_to_store.
+
+    CSV needs Graph, Year and Value columns. JSON is either a list of
+    {"Graph", "Year", "Value"} records or {graph: [[year, value], ...]}.
+    Graph may be the menu number or the graph name.
+    """
+    if fmt == "store" or (fmt is None and source != "-" and os.path.isdir(source)):
+        from column_store import load_points
+
+        return load_points(source)
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        with open(source, encoding="utf-8-sig") as f:
+            text = f.read()
+    if fmt is None:
+        fmt = "json" if source.lower().endswith(".json") or text.lstrip()[:1] in "[{" else "csv"
+
+    if fmt == "json":
+        data = json.loads(text)
+        if isinstance(data, dict):
+            bad = [g for g, points in data.items()
+                   if not isinstance(points, list) or not all(isinstance(p, list) and len(p) == 2 for p in points)]
+            if bad:
+                raise ValueError(f"{source}: graph {bad[0]!r} must map to a list of [year, value] pairs")
+            rows = [(g, p[0], p[1]) for g, points in data.items() for p in points]
+        elif isinstance(data, list):
+            if not all(isinstance(r, dict) for r in data):
+                raise ValueError(f"{source}: a JSON list must hold {{\"Graph\", \"Year\", \"Value\"}} records")
+            rows = [(r.get("Graph"), r.get("Year"), r.get("Value")) for r in data]
+        else:
+            raise ValueError(f"{source}: expected a JSON object or list, not {type(data).__name__}")
+        graphs, years, values = (list(c) for c in zip(*rows)) if rows else ([], [], [])
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        cols = {name: [] for name in ("Graph", "Year", "Value")}
+        for row in reader:
+            for name in cols:
+                cols[name].append(row.get(name))
+        graphs, years, values = cols["Graph"], cols["Year"], cols["Value"]
+    return graphs, years, values
+
 
 class GraphDataExtractor:
     def __init__(self):
@@ -20,7 +191,7 @@ class GraphDataExtractor:
             '3': 'Ore Processing (tonnes)',
             '4': 'Recovery Rate (%)'
         }
-        self.data = {graph: [] for graph in self.graphs.values()}
+        self.data = {graph: PointSeries() for graph in self.graphs.values()}
     
     def display_menu(self):
         print("\n" + "="*60)
@@ -31,9 +202,11 @@ class GraphDataExtractor:
             print(f"{key}. {value}")
         print("\nOptions:")
         print("A. Add data point")
+        print("B. Bulk import (CSV/JSON file, - for stdin)")
         print("D. Display current data")
         print("E. Export to CSV")
         print("X. Export to Excel")
+        print("S. Export to column store")
         print("R. Remove data point")
         print("Q. Quit")
         print("="*60)
@@ -49,55 +222,119 @@ class GraphDataExtractor:
         graph_name = self.graphs[graph_choice]
         
         try:
-            year = input("Enter year (e.g., 2024): ").strip()
+            year = int(input("Enter year (e.g., 2024): ").strip())
             value = float(input(f"Enter value for {graph_name}: ").strip())
             
-            self.data[graph_name].append({
-                'Year': year,
-                'Value': value
-            })
+            self.data[graph_name].set(year, value)
             print(f"✓ Data point added to {graph_name}")
         except ValueError:
             print("Invalid value entered! Please enter a numeric value.")
     
+    def resolve_graph(self, graph):
+        """Graph name for a menu number or a graph name, else None."""
+        graph = str(graph).strip()
+        if graph in self.graphs:
+            return self.graphs[graph]
+        return graph if graph in self.data else None
+    
+    def ingest(self, graphs, years, values):
+        """Bulk-load parallel columns; returns (stored, merged, rejected) counts.
+
+        `stored` counts distinct (graph, year) points; `merged` counts valid
+        rows whose year repeated an earlier row and so were folded into it.
+        """
+        with stage("ingest"):
+            return self._ingest(graphs, years, values)
+    
+    def _ingest(self, graphs, years, values):
+        years, values, ok = validate_points(years, values)
+        names = np.array([self.resolve_graph(g) or "" for g in graphs], dtype=object)
+        ok &= names != ""
+        stored = 0
+        for graph_name in self.data:
+            mask = ok & (names == graph_name)
+            if mask.any():
+                stored += self.data[graph_name].extend(years[mask], values[mask])
+        count(points=int(ok.sum()))
+        return stored, int(ok.sum()) - stored, int((~ok).sum())
+    
+    def bulk_import(self, source=None, fmt=None):
+        if source is None:
+            source = input("File path (- for stdin): ").strip()
+        try:
+            with stage("read"):
+                columns = read_points(source, fmt)
+            stored, merged, rejected = self.ingest(*columns)
+        except (OSError, ValueError) as e:
+            print(f"Import failed: {e}")
+            return
+        notes = [f"{merged} duplicate-year rows merged" if merged else "",
+                 f"{rejected} invalid rows skipped" if rejected else ""]
+        notes = "; ".join(n for n in notes if n)
+        print(f"✓ Imported {stored} data points" + (f" ({notes})" if notes else ""))
+    
     def display_data(self):
         print("\n" + "="*60)
         print("Current Data")
         print("="*60)
         
-        for graph_name, points in self.data.items():
-            if points:
+        for graph_name, series in self.data.items():
+            if len(series):
                 print(f"\n{graph_name}:")
-                df = pd.DataFrame(points)
-                print(df.to_string(index=False))
+                years, values = series.sorted_arrays()
+                print(f"{'Year':>6}  {'Value':>12}")
+                print("\n".join(f"{y:>6}  {v:>12g}" for y, v in zip(years.tolist(), values.tolist())))
             else:
                 print(f"\n{graph_name}: No data points yet")
     
     def export_to_csv(self):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        for graph_name, points in self.data.items():
-            if points:
-                df = pd.DataFrame(points)
+        for graph_name, series in self.data.items():
+            if len(series):
                 filename = f"{graph_name.replace(' ', '_').replace('(', '').replace(')', '')}_{timestamp}.csv"
-                df.to_csv(filename, index=False)
+                with stage("export_csv"):
+                    years, values = series.sorted_arrays()
+                    with open(filename, "w", newline="", encoding="utf-8") as f:
+                        f.write("Year,Value\n")
+                        # repr is the shortest string that round-trips, as pandas wrote it
+                        f.writelines(f"{y},{v!r}\n" for y, v in zip(years.tolist(), values.tolist()))
+                    count(cells=2 * len(years))
                 print(f"✓ Exported {graph_name} to {filename}")
         
         print("\n✓ All data exported to CSV files!")
     
     def export_to_excel(self):
+        from openpyxl import Workbook
+        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"mine_plan_data_{timestamp}.xlsx"
         
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            for graph_name, points in self.data.items():
-                if points:
-                    df = pd.DataFrame(points)
-                    sheet_name = graph_name[:31]  # Excel sheet name limit
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+        wb = Workbook(write_only=True)
+        with stage("export_excel"):
+            for graph_name, series in self.data.items():
+                if len(series):
+                    with stage(f"sheet:{graph_name}"):
+                        ws = wb.create_sheet(graph_name[:31])  # Excel sheet name limit
+                        ws.append(["Year", "Value"])
+                        years, values = series.sorted_arrays()
+                        for row in zip(years.tolist(), values.tolist()):
+                            ws.append(row)
+                        count(cells=2 * (len(years) + 1))
+            with stage("save"):
+                wb.save(filename)
         
         print(f"\n✓ All data exported to {filename}!")
     
+    def export_to_store(self, path=None, compress=False):
+        from column_store import SUFFIX, save_points
+        
+        path = path or f"mine_plan_points_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SUFFIX}"
+        with stage("export_store"):
+            save_points(path, {g: s for g, s in self.data.items() if len(s)}, compress)
+            count(cells=3 * sum(len(s) for s in self.data.values()))
+        print(f"\n✓ All data exported to {path}")
+    
     def remove_data_point(self):
         self.display_data()
         
@@ -110,18 +347,18 @@ class GraphDataExtractor:
         
         graph_name = self.graphs[graph_choice]
         
-        if not self.data[graph_name]:
+        if not len(self.data[graph_name]):
             print("No data points to remove!")
             return
         
         try:
-            index = int(input(f"Enter index to remove (0-{len(self.data[graph_name])-1}): "))
-            if 0 <= index < len(self.data[graph_name]):
-                removed = self.data[graph_name].pop(index)
-                print(f"✓ Removed: {removed}")
+            year = int(input("Enter year to remove: "))
+            removed = self.data[graph_name].delete(year)
+            if removed is None:
+                print("No data point for that year!")
             else:
-                print("Invalid index!")
-        except (ValueError, IndexError):
+                print(f"✓ Removed: {{'Year': {year}, 'Value': {removed}}}")
+        except ValueError:
             print("Invalid input!")
     
     def run(self):
@@ -134,12 +371,16 @@ class GraphDataExtractor:
             
             if choice == 'A':
                 self.add_data_point()
+            elif choice == 'B':
+                self.bulk_import()
             elif choice == 'D':
                 self.display_data()
             elif choice == 'E':
                 self.export_to_csv()
             elif choice == 'X':
                 self.export_to_excel()
+            elif choice == 'S':
+                self.export_to_store()
             elif choice == 'R':
                 self.remove_data_point()
             elif choice == 'Q':
@@ -149,6 +390,41 @@ class GraphDataExtractor:
                 print("Invalid choice! Please try again.")
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract graph data points to CSV/Excel.")
+    parser.add_argument("--load", action="append", default=[], metavar="FILE",
+                        help="Bulk-load points from CSV/JSON (- for stdin); repeatable")
+    parser.add_argument("--format", choices=["csv", "json", "store"],
+                        help="Input format (default: by extension; directories are column stores)")
+    parser.add_argument("--export", choices=["csv", "excel", "store"],
+                        help="Export loaded points and exit instead of starting the menu")
+    parser.add_argument("--store-path", help="Column store directory for --export store (default: timestamped)")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress column store columns")
+    parser.add_argument("--profile", metavar="REPORT.json", help="Write a per-stage profile of the run")
+    parser.add_argument("--flame", metavar="STACKS.txt", help="Also write folded stacks for flame-graph tools")
+    args = parser.parse_args(argv)
+
+    if args.profile or args.flame:
+        profiling.enable()
     extractor = GraphDataExtractor()
-    extractor.run()
\ No newline at end of file
+    for source in args.load:
+        extractor.bulk_import(source, args.format)
+    if args.export == "csv":
+        extractor.export_to_csv()
+    elif args.export == "excel":
+        extractor.export_to_excel()
+    elif args.export == "store":
+        extractor.export_to_store(args.store_path, args.compress)
+    else:
+        extractor.run()
+    prof = profiling.disable()
+    if prof is not None:
+        if args.profile:
+            prof.save_json(args.profile)
+        if args.flame:
+            prof.save_folded(args.flame)
+    return extractor
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Greenbushes LoM Key Metrics - Figure 14 (Page 28) data
+CY25 ORE - IGO Limited Annual Report
+
+The series read from all 4 graphs, as plain lists. Importing this module is
+cheap (no numpy, no openpyxl); load_schedule() builds the columnar schedule.
+"""
+
+# ==============================================================================
+# DATA EXTRACTED FROM FIGURE 14
+# ==============================================================================
+
+FIGURE_14 = {
+    # Years with annotations (biannual from 2026, even-numbered years)
+    "mining_years": [2026, 2028, 2030, 2032, 2034, 2036, 2038, 2040, 2042, 2044, 2046, 2048],
+    "years":        [2026, 2028, 2030, 2032, 2034, 2036, 2038, 2040, 2042, 2044, 2046, 2048, 2050, 2052],
+
+    # ── GRAPH 1: Mining (Mt) ──
+    # Strip ratios are annotated directly on the chart
+    "strip_ratio": [3.2, 3.1, 4.3, 5.8, 11.5, 5.0, 4.5, 5.5, 3.4, 1.9, 1.4, 0.8],
+
+    # Total movement re-read from chart against y-axis gridlines (0, 20, 40, 60, 80 Mt)
+    # 2026=42, 2028=42, 2030=50, 2032=60, 2034=75(peak), 2036=50, 2038=55, 2040=45, 2042=31, 2044=18, 2046=12, 2048=8
+    "total_movement": [42.0, 42.0, 50.0, 60.0, 75.0, 50.0, 55.0, 45.0, 31.0, 18.0, 12.0, 8.0],
+
+    # ── GRAPH 2: Stockpiles (Mt) ──
+    # Values annotated directly on graph
+    "stockpile": [8.2, 17.6, 21.1, 23.4, 17.0, 16.7, 20.7, 16.2, 14.6, 14.2, 11.2, 9.5, 2.7, 0.5],
+
+    # ── GRAPH 3: Processing (Mt) ──
+    # Mean lithia feed grade (%Li2O) annotated on chart
+    "li2o_grade": [2.11, 2.12, 2.22, 2.04, 2.18, 2.04, 1.97, 1.95, 1.95, 2.03, 1.95, 2.21, 1.19, 1.79],
+
+    # Plant-by-plant processing estimated from stacked area chart (y-axis 0-12 Mt)
+    "proc_cgp3": [0.3, 1.0, 1.2, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 0.3, 0.0],
+    "proc_cgp2": [2.7, 2.5, 3.0, 3.0, 2.5, 2.5, 2.5, 2.5, 2.5, 2.5, 2.5, 3.0, 1.2, 0.2],
+    "proc_cgp1": [2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 1.0, 0.3],
+    "proc_tgp":  [2.0, 2.5, 1.8, 1.5, 1.5, 2.0, 2.0, 2.0, 1.5, 1.5, 1.5, 1.5, 1.0, 0.5],
+
+    # ── GRAPH 4: Concentrate (Mt) ──
+    # Total values annotated directly on chart
+    "conc_total": [1.5, 2.0, 2.0, 1.7, 1.8, 1.7, 1.6, 1.6, 1.6, 1.7, 1.6, 1.9, 0.4, 0.1],
+
+    # Plant-by-plant concentrate estimated from stacked area chart (y-axis 0-3.0 Mt)
+    "conc_cgp3": [0.05, 0.20, 0.25, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.05, 0.00],
+    "conc_cgp2": [0.45, 0.60, 0.65, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.70, 0.15, 0.03],
+    "conc_cgp1": [0.50, 0.50, 0.50, 0.40, 0.50, 0.40, 0.40, 0.40, 0.40, 0.50, 0.40, 0.50, 0.12, 0.04],
+    "conc_tgp":  [0.50, 0.70, 0.60, 0.50, 0.50, 0.50, 0.40, 0.40, 0.40, 0.40, 0.40, 0.40, 0.08, 0.03],
+}
+
+
+def load_schedule(inputs=None):
+    """Columnar LomSchedule for `inputs` (default Figure 14).
+
+    Ore, waste, processing total and recovery proxy are derived column-wise.
+    """
+    from lom_schedule import LomSchedule
+
+    return LomSchedule.from_inputs(FIGURE_14 if inputs is None else inputs)
@@ -2,60 +2,45 @@
 Greenbushes LoM Key Metrics - Data Extraction from Figure 14 (Page 28)
 CY25 ORE - IGO Limited Annual Report
 
-Extracts data from all 4 graphs and creates a comprehensive Excel workbook.
-Data is for even-numbered years as annotated in the charts.
+Builds a comprehensive Excel workbook from the data read off all 4 graphs
+(figure14.py). Data is for even-numbered years as annotated in the charts.
+Importing this module does no work; main() is the command line.
+
+Usage: python generate_mine_plan_excel.py [-o OUTPUT] [--streaming] [--reconcile] [--charts] [--profile REPORT.json]
+       python generate_mine_plan_excel.py --store SCHEDULES.cols [--scenario NAME]
+       python generate_mine_plan_excel.py --block-model BLOCKS.csv|BLOCKS.cols [--cutoff 0.5] [--grade-tonnage [CUTOFF ...]]
 """
 
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import numpy as np
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import column_index_from_string, get_column_letter
+from copy import copy
+from functools import lru_cache, partial
+import argparse
+import hashlib
+import json
 import os
 
-# ==============================================================================
-# DATA EXTRACTED FROM FIGURE 14
-# ==============================================================================
-
-# Years with annotations (biannual from 2026, even-numbered years)
-mining_years = [2026, 2028, 2030, 2032, 2034, 2036, 2038, 2040, 2042, 2044, 2046, 2048]
-full_years   = [2026, 2028, 2030, 2032, 2034, 2036, 2038, 2040, 2042, 2044, 2046, 2048, 2050, 2052]
-
-# ── GRAPH 1: Mining (Mt) ──
-# Strip ratios are annotated directly on the chart
-strip_ratios = [3.2, 3.1, 4.3, 5.8, 11.5, 5.0, 4.5, 5.5, 3.4, 1.9, 1.4, 0.8]
-
-# Total movement re-read from chart against y-axis gridlines (0, 20, 40, 60, 80 Mt)
-# 2026=42, 2028=42, 2030=50, 2032=60, 2034=75(peak), 2036=50, 2038=55, 2040=45, 2042=31, 2044=18, 2046=12, 2048=8
-total_movement = [42.0, 42.0, 50.0, 60.0, 75.0, 50.0, 55.0, 45.0, 31.0, 18.0, 12.0, 8.0]
+from figure14 import load_schedule
+from lom_schedule import PLANTS, safe_ratio
+from metrics import MetricGraph
+import profiling
+from profiling import stage
 
-# Ore and Waste calculated from: Total = Ore * (1 + Strip Ratio)
-ore_mt  = [round(t / (1 + sr), 1) for t, sr in zip(total_movement, strip_ratios)]
-waste_mt = [round(t - o, 1) for t, o in zip(total_movement, ore_mt)]
+# Ore, waste, processing total and recovery proxy are derived column-wise on
+# first use, so importing this module does no work
+_schedule = None
 
-# ── GRAPH 2: Stockpiles (Mt) ──
-# Values annotated directly on graph
-stockpiles = [8.2, 17.6, 21.1, 23.4, 17.0, 16.7, 20.7, 16.2, 14.6, 14.2, 11.2, 9.5, 2.7, 0.5]
 
-# ── GRAPH 3: Processing (Mt) ──
-# Mean lithia feed grade (%Li2O) annotated on chart
-li2o_grade = [2.11, 2.12, 2.22, 2.04, 2.18, 2.04, 1.97, 1.95, 1.95, 2.03, 1.95, 2.21, 1.19, 1.79]
+def default_schedule():
+    """The Figure 14 schedule, built once per process."""
+    global _schedule
+    if _schedule is None:
+        _schedule = load_schedule()
+    return _schedule
 
-# Plant-by-plant processing estimated from stacked area chart (y-axis 0-12 Mt)
-proc_cgp3 = [0.3, 1.0, 1.2, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 0.3, 0.0]
-proc_cgp2 = [2.7, 2.5, 3.0, 3.0, 2.5, 2.5, 2.5, 2.5, 2.5, 2.5, 2.5, 3.0, 1.2, 0.2]
-proc_cgp1 = [2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 1.0, 0.3]
-proc_tgp  = [2.0, 2.5, 1.8, 1.5, 1.5, 2.0, 2.0, 2.0, 1.5, 1.5, 1.5, 1.5, 1.0, 0.5]
-proc_total = [round(a+b+c+d, 1) for a,b,c,d in zip(proc_cgp3, proc_cgp2, proc_cgp1, proc_tgp)]
-
-# ── GRAPH 4: Concentrate (Mt) ──
-# Total values annotated directly on chart
-conc_total_annotated = [1.5, 2.0, 2.0, 1.7, 1.8, 1.7, 1.6, 1.6, 1.6, 1.7, 1.6, 1.9, 0.4, 0.1]
-
-# Plant-by-plant concentrate estimated from stacked area chart (y-axis 0-3.0 Mt)
-conc_cgp3 = [0.05, 0.20, 0.25, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.30, 0.05, 0.00]
-conc_cgp2 = [0.45, 0.60, 0.65, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 0.70, 0.15, 0.03]
-conc_cgp1 = [0.50, 0.50, 0.50, 0.40, 0.50, 0.40, 0.40, 0.40, 0.40, 0.50, 0.40, 0.50, 0.12, 0.04]
-conc_tgp  = [0.50, 0.70, 0.60, 0.50, 0.50, 0.50, 0.40, 0.40, 0.40, 0.40, 0.40, 0.40, 0.08, 0.03]
 
 # ==============================================================================
 # STYLING
@@ -68,6 +53,7 @@ SUBTITLE_FONT = Font(name="Calibri", bold=True, size=11, color="2F5496")
 DATA_FONT = Font(name="Calibri", size=11)
 TOTAL_FILL = PatternFill(start_color="D6E4F0", end_color="D6E4F0", fill_type="solid")
 TOTAL_FONT = Font(name="Calibri", bold=True, size=11)
+FLAG_FILL = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
 NOTE_FONT = Font(name="Calibri", italic=True, size=10, color="666666")
 THIN_BORDER = Border(
     left=Side(style="thin", color="B4C6E7"),
@@ -76,302 +62,199 @@ THIN_BORDER = Border(
     bottom=Side(style="thin", color="B4C6E7"),
 )
 
-
-def style_header_row(ws, row, max_col):
-    for col in range(1, max_col + 1):
-        cell = ws.cell(row=row, column=col)
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = THIN_BORDER
+# Named styles are registered once per workbook and referenced by name from
+# every cell, so no per-cell Font/Alignment/Border objects are created.
+TITLE = "LoM Title"
+SUBTITLE = "LoM Subtitle"
+NOTE = "LoM Note"
+BODY = "LoM Body"
+HEADER = "LoM Header"
+DATA = "LoM Data"
+TOTAL = "LoM Total"
+METRIC = "LoM Metric"
+DETAIL = "LoM Detail"
+FLAG = "LoM Flag"
+
+NAMED_STYLES = [
+    NamedStyle(name=TITLE, font=TITLE_FONT),
+    NamedStyle(name=SUBTITLE, font=SUBTITLE_FONT),
+    NamedStyle(name=NOTE, font=NOTE_FONT),
+    NamedStyle(name=BODY, font=DATA_FONT),
+    NamedStyle(name=HEADER, font=HEADER_FONT, fill=HEADER_FILL, border=THIN_BORDER,
+               alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+    NamedStyle(name=DATA, font=DATA_FONT, border=THIN_BORDER,
+               alignment=Alignment(horizontal="center", vertical="center")),
+    NamedStyle(name=TOTAL, font=TOTAL_FONT, fill=TOTAL_FILL, border=THIN_BORDER,
+               alignment=Alignment(horizontal="center", vertical="center")),
+    NamedStyle(name=METRIC, font=TOTAL_FONT, border=THIN_BORDER,
+               alignment=Alignment(vertical="top")),
+    NamedStyle(name=DETAIL, font=DATA_FONT, border=THIN_BORDER,
+               alignment=Alignment(wrap_text=True, vertical="top")),
+    NamedStyle(name=FLAG, font=TOTAL_FONT, fill=FLAG_FILL, border=THIN_BORDER,
+               alignment=Alignment(horizontal="center", vertical="center")),
+]
 
 
-def style_data_cell(ws, row, col, is_total_row=False):
-    cell = ws.cell(row=row, column=col)
-    cell.font = TOTAL_FONT if is_total_row else DATA_FONT
-    if is_total_row:
-        cell.fill = TOTAL_FILL
-    cell.alignment = Alignment(horizontal="center", vertical="center")
-    cell.border = THIN_BORDER
+def register_named_styles(wb):
+    for style in NAMED_STYLES:
+        if style.name not in wb.style_names:
+            wb.add_named_style(copy(style))
 
 
-def auto_width(ws, max_col, min_width=12):
-    for col in range(1, max_col + 1):
-        ws.column_dimensions[get_column_letter(col)].width = max(min_width, 15)
+def auto_width(max_col, min_width=12):
+    return {get_column_letter(col): max(min_width, 15) for col in range(1, max_col + 1)}
 
 
 # ==============================================================================
-# CREATE WORKBOOK
+# SHEET ROWS
 # ==============================================================================
-
-wb = Workbook()
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 1: Mining
-# ──────────────────────────────────────────────────────────────
-ws1 = wb.active
-ws1.title = "Mining"
-
-ws1.merge_cells("A1:G1")
-ws1["A1"] = "MINING (Mt) - Greenbushes LoM Schedule (CY25 ORE)"
-ws1["A1"].font = TITLE_FONT
-
-ws1.merge_cells("A2:G2")
-ws1["A2"] = "Strip Ratio = Waste / Ore. Mining ends in 2049. Even-year data from Figure 14, Page 28."
-ws1["A2"].font = NOTE_FONT
-
-headers = ["Year", "Ore (Mt)", "Waste (Mt)", "Total Movement (Mt)", "Strip Ratio", "Ore %", "Waste %"]
-for col, h in enumerate(headers, 1):
-    ws1.cell(row=4, column=col, value=h)
-style_header_row(ws1, 4, len(headers))
-
-for i, year in enumerate(mining_years):
-    row = 5 + i
-    ore_pct = round(ore_mt[i] / total_movement[i] * 100, 1)
-    waste_pct = round(waste_mt[i] / total_movement[i] * 100, 1)
-    values = [year, ore_mt[i], waste_mt[i], total_movement[i], strip_ratios[i], ore_pct, waste_pct]
-    for col, v in enumerate(values, 1):
-        ws1.cell(row=row, column=col, value=v)
-        style_data_cell(ws1, row, col)
-
-# Totals row
-total_row = 5 + len(mining_years)
-ws1.cell(row=total_row, column=1, value="LoM TOTAL")
-ws1.cell(row=total_row, column=2, value=round(sum(ore_mt), 1))
-ws1.cell(row=total_row, column=3, value=round(sum(waste_mt), 1))
-ws1.cell(row=total_row, column=4, value=round(sum(total_movement), 1))
-ws1.cell(row=total_row, column=5, value=round(sum(waste_mt) / sum(ore_mt), 1))
-ws1.cell(row=total_row, column=6, value=round(sum(ore_mt) / sum(total_movement) * 100, 1))
-ws1.cell(row=total_row, column=7, value=round(sum(waste_mt) / sum(total_movement) * 100, 1))
-for col in range(1, len(headers) + 1):
-    style_data_cell(ws1, total_row, col, is_total_row=True)
-
-# Notes
-note_row = total_row + 2
-ws1.merge_cells(f"A{note_row}:G{note_row}")
-ws1[f"A{note_row}"] = "Notes: Values are for even-numbered years (biannual snapshots). Ore & Waste derived from total movement and strip ratio."
-ws1[f"A{note_row}"].font = NOTE_FONT
-ws1.merge_cells(f"A{note_row+1}:G{note_row+1}")
-ws1[f"A{note_row+1}"] = "Total movement estimated from chart. Strip ratios are directly annotated on the graph. Mining ceases at end of 2049."
-ws1[f"A{note_row+1}"].font = NOTE_FONT
-
-auto_width(ws1, len(headers))
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 2: Stockpiles
-# ──────────────────────────────────────────────────────────────
-ws2 = wb.create_sheet("Stockpiles")
-
-ws2.merge_cells("A1:D1")
-ws2["A1"] = "STOCKPILES (Mt) - Greenbushes LoM Schedule (CY25 ORE)"
-ws2["A1"].font = TITLE_FONT
-
-ws2.merge_cells("A2:D2")
-ws2["A2"] = "Stockpiles (mostly off-RoM). Values annotated directly on Figure 14. Stockpiles exhausted by ~2053."
-ws2["A2"].font = NOTE_FONT
-
-headers2 = ["Year", "Stockpile (Mt)", "Change vs Prior (Mt)", "Change (%)"]
-for col, h in enumerate(headers2, 1):
-    ws2.cell(row=4, column=col, value=h)
-style_header_row(ws2, 4, len(headers2))
-
-for i, year in enumerate(full_years):
-    row = 5 + i
-    change = round(stockpiles[i] - stockpiles[i-1], 1) if i > 0 else 0
-    pct = round(change / stockpiles[i-1] * 100, 1) if i > 0 and stockpiles[i-1] != 0 else 0
-    values = [year, stockpiles[i], change, pct]
-    for col, v in enumerate(values, 1):
-        ws2.cell(row=row, column=col, value=v)
-        style_data_cell(ws2, row, col)
-
-# Peak stockpile info
-peak_row = 5 + len(full_years) + 1
-ws2.merge_cells(f"A{peak_row}:D{peak_row}")
-peak_val = max(stockpiles)
-peak_yr = full_years[stockpiles.index(peak_val)]
-ws2[f"A{peak_row}"] = f"Peak Stockpile: {peak_val} Mt in {peak_yr}"
-ws2[f"A{peak_row}"].font = SUBTITLE_FONT
-
-auto_width(ws2, len(headers2))
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 3: Processing
-# ──────────────────────────────────────────────────────────────
-ws3 = wb.create_sheet("Processing")
-
-ws3.merge_cells("A1:H1")
-ws3["A1"] = "PROCESSING (Mt) BY PLANT - Greenbushes LoM Schedule (CY25 ORE)"
-ws3["A1"].font = TITLE_FONT
-
-ws3.merge_cells("A2:H2")
-ws3["A2"] = "Plants: TGP, CGP1, CGP2, CGP3. Processing continues through 2053 to exhaust stockpiles."
-ws3["A2"].font = NOTE_FONT
-
-headers3 = ["Year", "CGP3 (Mt)", "CGP2 (Mt)", "CGP1 (Mt)", "TGP (Mt)", "Total Processing (Mt)", "Li2O Grade (%)", "Notes"]
-for col, h in enumerate(headers3, 1):
-    ws3.cell(row=4, column=col, value=h)
-style_header_row(ws3, 4, len(headers3))
-
-for i, year in enumerate(full_years):
-    row = 5 + i
-    note = "Post-mining (stockpile feed)" if year >= 2050 else ""
-    values = [year, proc_cgp3[i], proc_cgp2[i], proc_cgp1[i], proc_tgp[i], proc_total[i], li2o_grade[i], note]
-    for col, v in enumerate(values, 1):
-        ws3.cell(row=row, column=col, value=v)
-        style_data_cell(ws3, row, col)
-
-# Totals
-total_row3 = 5 + len(full_years)
-ws3.cell(row=total_row3, column=1, value="LoM TOTAL")
-ws3.cell(row=total_row3, column=2, value=round(sum(proc_cgp3), 1))
-ws3.cell(row=total_row3, column=3, value=round(sum(proc_cgp2), 1))
-ws3.cell(row=total_row3, column=4, value=round(sum(proc_cgp1), 1))
-ws3.cell(row=total_row3, column=5, value=round(sum(proc_tgp), 1))
-ws3.cell(row=total_row3, column=6, value=round(sum(proc_total), 1))
-ws3.cell(row=total_row3, column=7, value=round(sum(li2o_grade) / len(li2o_grade), 2))
-ws3.cell(row=total_row3, column=8, value="Avg Grade")
-for col in range(1, len(headers3) + 1):
-    style_data_cell(ws3, total_row3, col, is_total_row=True)
-
-auto_width(ws3, len(headers3))
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 4: Concentrate
-# ──────────────────────────────────────────────────────────────
-ws4 = wb.create_sheet("Concentrate")
-
-ws4.merge_cells("A1:G1")
-ws4["A1"] = "CONCENTRATE (Mt) BY PLANT - Greenbushes LoM Schedule (CY25 ORE)"
-ws4["A1"].font = TITLE_FONT
-
-ws4.merge_cells("A2:G2")
-ws4["A2"] = "Concentrate produced by each processing plant. Total values annotated on Figure 14."
-ws4["A2"].font = NOTE_FONT
-
-headers4 = ["Year", "CGP3 (Mt)", "CGP2 (Mt)", "CGP1 (Mt)", "TGP (Mt)", "Total Concentrate (Mt)", "Recovery Proxy (%)"]
-for col, h in enumerate(headers4, 1):
-    ws4.cell(row=4, column=col, value=h)
-style_header_row(ws4, 4, len(headers4))
-
-for i, year in enumerate(full_years):
-    row = 5 + i
-    recovery = round(conc_total_annotated[i] / proc_total[i] * 100, 1) if proc_total[i] > 0 else 0
-    values = [year, conc_cgp3[i], conc_cgp2[i], conc_cgp1[i], conc_tgp[i], conc_total_annotated[i], recovery]
-    for col, v in enumerate(values, 1):
-        ws4.cell(row=row, column=col, value=v)
-        style_data_cell(ws4, row, col)
-
-# Totals
-total_row4 = 5 + len(full_years)
-ws4.cell(row=total_row4, column=1, value="LoM TOTAL")
-ws4.cell(row=total_row4, column=2, value=round(sum(conc_cgp3), 2))
-ws4.cell(row=total_row4, column=3, value=round(sum(conc_cgp2), 2))
-ws4.cell(row=total_row4, column=4, value=round(sum(conc_cgp1), 2))
-ws4.cell(row=total_row4, column=5, value=round(sum(conc_tgp), 2))
-ws4.cell(row=total_row4, column=6, value=round(sum(conc_total_annotated), 1))
-avg_recovery = round(sum(conc_total_annotated) / sum(proc_total) * 100, 1)
-ws4.cell(row=total_row4, column=7, value=avg_recovery)
-for col in range(1, len(headers4) + 1):
-    style_data_cell(ws4, total_row4, col, is_total_row=True)
-
-auto_width(ws4, len(headers4))
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 5: Summary & Analysis
-# ──────────────────────────────────────────────────────────────
-ws5 = wb.create_sheet("Summary & Analysis")
-
-ws5.merge_cells("A1:I1")
-ws5["A1"] = "COMPREHENSIVE SUMMARY - Greenbushes LoM Key Metrics (CY25 ORE)"
-ws5["A1"].font = TITLE_FONT
-
-ws5.merge_cells("A2:I2")
-ws5["A2"] = "All metrics combined for the even-numbered years. Source: Figure 14, Page 28."
-ws5["A2"].font = NOTE_FONT
-
-headers5 = [
-    "Year",
-    "Ore Mined (Mt)", "Waste Mined (Mt)", "Total Movement (Mt)", "Strip Ratio",
-    "Stockpile (Mt)",
-    "Total Processing (Mt)", "Li2O Grade (%)",
-    "Total Concentrate (Mt)"
-]
-for col, h in enumerate(headers5, 1):
-    ws5.cell(row=4, column=col, value=h)
-style_header_row(ws5, 4, len(headers5))
-
-for i, year in enumerate(full_years):
-    row = 5 + i
-    if year in mining_years:
-        mi = mining_years.index(year)
-        ore_v, waste_v, total_v, sr_v = ore_mt[mi], waste_mt[mi], total_movement[mi], strip_ratios[mi]
-    else:
-        ore_v, waste_v, total_v, sr_v = 0, 0, 0, "N/A"
-
-    values = [year, ore_v, waste_v, total_v, sr_v,
-              stockpiles[i], proc_total[i], li2o_grade[i], conc_total_annotated[i]]
-    for col, v in enumerate(values, 1):
-        ws5.cell(row=row, column=col, value=v)
-        style_data_cell(ws5, row, col)
-
-auto_width(ws5, len(headers5))
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 6: Key Insights
-# ──────────────────────────────────────────────────────────────
-ws6 = wb.create_sheet("Key Insights")
-
-ws6.merge_cells("A1:B1")
-ws6["A1"] = "KEY INSIGHTS & DEEP ANALYSIS"
-ws6["A1"].font = TITLE_FONT
-
-insights = [
-    ("LoM Duration", "Mining: 2026-2049 (24 years). Processing continues to ~2053 to exhaust stockpiles."),
-    ("Peak Mining Year", f"2034 - Total movement ~{max(total_movement)} Mt with highest strip ratio of {max(strip_ratios)}. This is a massive waste stripping campaign."),
-    ("Total Ore Mined (even yrs)", f"{round(sum(ore_mt), 1)} Mt across even-year snapshots"),
-    ("Total Waste Mined (even yrs)", f"{round(sum(waste_mt), 1)} Mt across even-year snapshots"),
-    ("Average Strip Ratio", f"{round(sum(waste_mt)/sum(ore_mt), 2)} (waste:ore) - Very high waste burden, especially in 2034"),
-    ("Peak Stockpile", f"{max(stockpiles)} Mt in {full_years[stockpiles.index(max(stockpiles))]}"),
-    ("Stockpile Strategy", "Build-up phase 2026-2032 (peaks 23.4 Mt). Drawn down through mid-LoM. Second smaller peak of 20.7 Mt in 2038. Exhausted by 2053."),
-    ("Processing Capacity", "~7-8 Mt/year across 4 plants (CGP3, CGP2, CGP1, TGP) during steady state operations"),
-    ("Average Li2O Grade", f"{round(sum(li2o_grade)/len(li2o_grade), 2)}% - Grades decline significantly in tail years (1.19% in 2050, 1.79% in 2052)"),
-    ("Total Concentrate (even yrs)", f"{round(sum(conc_total_annotated), 1)} Mt across even-year snapshots"),
-    ("Concentrate Recovery Proxy", f"~{avg_recovery}% (concentrate / feed) - relatively stable through mine life"),
-    ("Mining Wind-Down", "Strip ratio drops from 11.5 (2034 peak) to 0.8 (2048), transition to lower waste. Less material moved but higher ore proportion."),
-    ("2034 Anomaly", "Highest total movement (~69 Mt) but only ~5.5 Mt ore - massive waste stripping campaign with strip ratio 11.5x. This is the most capital-intensive mining year."),
-    ("Post-Mining Phase", "2050-2053: Processing from stockpiles only. Grade drops significantly (1.19-1.79% Li2O). Concentrate output collapses to 0.1-0.4 Mt."),
-    ("CGP2 Dominance", "CGP2 is the largest processing plant, handling ~2.5-3.0 Mt/year. It contributes the most concentrate output across the LoM."),
-    ("CGP3 Ramp-Up", "CGP3 starts small (0.3 Mt in 2026) and ramps to 1.5 Mt by 2032, suggesting a newer plant coming online."),
-    ("Production Plateau", "Concentrate production is remarkably stable at 1.6-2.0 Mt/year from 2028-2048, providing consistent spodumene supply."),
-    ("Grade Risk", "Li2O grade trends downward from 2.22% peak (2030) toward ~1.95% by 2042-2046. Post-mining grades drop sharply. Lower grades mean higher processing costs per tonne of concentrate."),
-]
-
-for col, h in enumerate(["Metric", "Detail"], 1):
-    ws6.cell(row=3, column=col, value=h)
-style_header_row(ws6, 3, 2)
-
-for i, (metric, detail) in enumerate(insights):
-    row = 4 + i
-    ws6.cell(row=row, column=1, value=metric)
-    ws6.cell(row=row, column=2, value=detail)
-    ws6.cell(row=row, column=1).font = Font(name="Calibri", bold=True, size=11)
-    ws6.cell(row=row, column=2).font = DATA_FONT
-    ws6.cell(row=row, column=1).border = THIN_BORDER
-    ws6.cell(row=row, column=2).border = THIN_BORDER
-    ws6.cell(row=row, column=1).alignment = Alignment(vertical="top")
-    ws6.cell(row=row, column=2).alignment = Alignment(wrap_text=True, vertical="top")
-
-ws6.column_dimensions["A"].width = 30
-ws6.column_dimensions["B"].width = 100
-
-# ──────────────────────────────────────────────────────────────
-# SHEET 7: Data Notes
-# ──────────────────────────────────────────────────────────────
-ws7 = wb.create_sheet("Data Notes")
-ws7["A1"] = "DATA SOURCE & METHODOLOGY NOTES"
-ws7["A1"].font = TITLE_FONT
-
-notes_text = [
+# Each sheet is a generator of (values, style, merge_cols) rows, written top to
+# bottom starting at row 1. `style` is one named style for the whole row or a
+# list with one entry per value; `merge_cols` > 0 merges the row from column A.
+
+BLANK = ((), None, 0)
+
+
+def mining_rows(sched):
+    yield ["MINING (Mt) - Greenbushes LoM Schedule (CY25 ORE)"], TITLE, 7
+    yield ["Strip Ratio = Waste / Ore. Mining ends in 2049. Even-year data from Figure 14, Page 28."], NOTE, 7
+    yield BLANK
+    yield ["Year", "Ore (Mt)", "Waste (Mt)", "Total Movement (Mt)", "Strip Ratio", "Ore %", "Waste %"], HEADER, 0
+
+    table = sched.table(["ore", "waste", "total_movement", "strip_ratio", "ore_pct", "waste_pct"], mining_only=True)
+    for year, values in zip(sched.mining_years.tolist(), table):
+        yield [year] + values.tolist(), DATA, 0
+
+    ore = sched.lom_total("ore")
+    waste = sched.lom_total("waste")
+    total = sched.lom_total("total_movement")
+    yield [
+        "LoM TOTAL",
+        round(ore, 1),
+        round(waste, 1),
+        round(total, 1),
+        round(waste / ore, 1),
+        round(ore / total * 100, 1),
+        round(waste / total * 100, 1),
+    ], TOTAL, 0
+
+    yield BLANK
+    yield ["Notes: Values are for even-numbered years (biannual snapshots). Ore & Waste derived from total movement and strip ratio."], NOTE, 7
+    yield ["Total movement estimated from chart. Strip ratios are directly annotated on the graph. Mining ceases at end of 2049."], NOTE, 7
+    yield [lom_total_note(sched, "2026-2049")], NOTE, 7
+
+
+def stockpile_rows(sched):
+    yield ["STOCKPILES (Mt) - Greenbushes LoM Schedule (CY25 ORE)"], TITLE, 4
+    yield ["Stockpiles (mostly off-RoM). Values annotated directly on Figure 14. Stockpiles exhausted by ~2053."], NOTE, 4
+    yield BLANK
+    yield ["Year", "Stockpile (Mt)", "Change vs Prior (Mt)", "Change (%)"], HEADER, 0
+
+    stock = sched["stockpile"]
+    change = np.round(np.diff(stock, prepend=stock[:1]), 1)
+    prior = np.concatenate([[0.0], stock[:-1]])
+    pct = np.round(safe_ratio(change, prior, 100), 1)
+    table = np.column_stack([stock, change, pct])
+    for year, values in zip(sched.years.tolist(), table):
+        yield [year] + values.tolist(), DATA, 0
+
+    # Peak stockpile info
+    peak_val, peak_yr = sched.peak("stockpile")
+    yield BLANK
+    yield [f"Peak Stockpile: {peak_val} Mt in {peak_yr}"], SUBTITLE, 4
+
+
+def processing_rows(sched):
+    yield ["PROCESSING (Mt) BY PLANT - Greenbushes LoM Schedule (CY25 ORE)"], TITLE, 8
+    yield ["Plants: TGP, CGP1, CGP2, CGP3. Processing continues through 2053 to exhaust stockpiles."], NOTE, 8
+    yield BLANK
+    yield ["Year", "CGP3 (Mt)", "CGP2 (Mt)", "CGP1 (Mt)", "TGP (Mt)", "Total Processing (Mt)", "Li2O Grade (%)", "Notes"], HEADER, 0
+
+    table = sched.table([f"proc_{p}" for p in PLANTS] + ["proc_total", "li2o_grade"])
+    for year, values in zip(sched.years.tolist(), table):
+        note = "Post-mining (stockpile feed)" if year >= 2050 else ""
+        yield [year] + values.tolist() + [note], DATA, 0
+
+    yield (
+        ["LoM TOTAL"]
+        + [round(sched.lom_total(f"proc_{p}"), 1) for p in PLANTS]
+        + [round(sched.lom_total("proc_total"), 1), round(lom_grade(sched), 2), "Avg Grade"]
+    ), TOTAL, 0
+    yield BLANK
+    yield [lom_total_note(sched, "2026-2053")], NOTE, 8
+
+
+def concentrate_rows(sched):
+    yield ["CONCENTRATE (Mt) BY PLANT - Greenbushes LoM Schedule (CY25 ORE)"], TITLE, 7
+    yield ["Concentrate produced by each processing plant. Total values annotated on Figure 14."], NOTE, 7
+    yield BLANK
+    yield ["Year", "CGP3 (Mt)", "CGP2 (Mt)", "CGP1 (Mt)", "TGP (Mt)", "Total Concentrate (Mt)", "Recovery Proxy (%)"], HEADER, 0
+
+    table = sched.table([f"conc_{p}" for p in PLANTS] + ["conc_total", "recovery"])
+    for year, values in zip(sched.years.tolist(), table):
+        yield [year] + values.tolist(), DATA, 0
+
+    yield (
+        ["LoM TOTAL"]
+        + [round(sched.lom_total(f"conc_{p}"), 2) for p in PLANTS]
+        + [round(sched.lom_total("conc_total"), 1), avg_recovery(sched)]
+    ), TOTAL, 0
+    yield BLANK
+    yield [lom_total_note(sched, "2026-2053")], NOTE, 7
+
+
+def summary_rows(sched):
+    yield ["COMPREHENSIVE SUMMARY - Greenbushes LoM Key Metrics (CY25 ORE)"], TITLE, 9
+    yield ["All metrics combined for the even-numbered years. Source: Figure 14, Page 28."], NOTE, 9
+    yield BLANK
+    yield [
+        "Year",
+        "Ore Mined (Mt)", "Waste Mined (Mt)", "Total Movement (Mt)", "Strip Ratio",
+        "Stockpile (Mt)",
+        "Total Processing (Mt)", "Li2O Grade (%)",
+        "Total Concentrate (Mt)"
+    ], HEADER, 0
+
+    # Mining columns are already aligned onto the full year axis (zero outside mining years)
+    table = sched.table(["ore", "waste", "total_movement", "strip_ratio",
+                         "stockpile", "proc_total", "li2o_grade", "conc_total"])
+    for year, mined, values in zip(sched.years.tolist(), sched.mining.tolist(), table):
+        values = values.tolist()
+        if not mined:
+            values[3] = "N/A"
+        yield [year] + values, DATA, 0
+
+
+def avg_recovery(sched):
+    return round(sched.lom_total("conc_total") / sched.lom_total("proc_total") * 100, 1)
+
+
+def lom_grade(sched):
+    """Mean feed grade over every year of the LoM."""
+    return sched.resample().mean("li2o_grade")
+
+
+def lom_total_note(sched, span):
+    return (f"LoM TOTAL covers every year {span}: odd years filled by {sched.lom_method} "
+            f"interpolation between the even-year snapshots.")
+
+
+def key_insights(sched):
+    """[(label, text)]; see metrics.INSIGHTS for what each insight depends on."""
+    return MetricGraph.from_schedule(sched).insights()
+
+
+def insight_rows(sched):
+    yield ["KEY INSIGHTS & DEEP ANALYSIS"], TITLE, 2
+    yield BLANK
+    yield ["Metric", "Detail"], HEADER, 0
+    with stage("key_insights"):
+        insights = key_insights(sched)
+    for metric, detail in insights:
+        yield [metric, detail], [METRIC, DETAIL], 0
+
+
+NOTES_TEXT = [
     "Source: Figure 14, Page 28 - 'Greenbushes by year LoM key metrics for the CY25 ORE' (IGO Limited Annual Report)",
     "",
     "GRAPH 1 - MINING (Mt):",
@@ -397,34 +280,565 @@ notes_text = [
     "GENERAL NOTES:",
     "  - Data is for even-numbered years only (biannual snapshots starting 2026)",
     "  - These values are the values associated with the even-numbered years, NOT two-year means",
+    "  - LoM totals and averages cover every year: odd years are interpolated between snapshots (step, linear",
+    "    or mass-conserving; see resample.py), so they are not twice the even-year sums",
     "  - Plant breakdown for Processing and Concentrate are visual estimates from stacked area charts",
     "  - Annotated values (strip ratios, stockpiles, grades, concentrate totals) are exact as shown on graph",
     "  - Total movement (Mining chart) is estimated from the chart and may have +/- 2-3 Mt margin of error",
 ]
 
-for i, line in enumerate(notes_text):
-    ws7.cell(row=3 + i, column=1, value=line)
-    if line.endswith(":"):
-        ws7.cell(row=3 + i, column=1).font = SUBTITLE_FONT
-    elif line.startswith("  -"):
-        ws7.cell(row=3 + i, column=1).font = NOTE_FONT
+
+def notes_rows(sched):
+    yield ["DATA SOURCE & METHODOLOGY NOTES"], TITLE, 0
+    yield BLANK
+    for line in NOTES_TEXT:
+        if line.endswith(":"):
+            yield [line], SUBTITLE, 0
+        elif line.startswith("  -"):
+            yield [line], NOTE, 0
+        else:
+            yield [line], BODY, 0
+
+
+def uncertainty_rows(sched, summary, n_samples):
+    yield ["UNCERTAINTY - Monte Carlo P10 / P50 / P90 of LoM Totals"], TITLE, 5
+    yield [f"{n_samples:,} perturbed schedules. Chart-read series (total movement, plant splits) carry reading error; annotated values are exact."], NOTE, 5
+    yield BLANK
+    yield ["Metric", "Point Estimate", "P10", "P50", "P90"], HEADER, 0
+    for label, *values in summary:
+        yield [label] + [round(v, 2) for v in values], [METRIC] + [DATA] * 4, 0
+
+
+def valuation_rows(sched, result):
+    rates = result["rates"].tolist()
+    width = 3 + len(rates)
+    basis = "100% basis" if result["share"] == 1.0 else f"{result['share']:.2%} share"
+    yield ["VALUATION - After-tax NPV (A$M, real) by SC6 Price, FX and Discount Rate"], TITLE, width
+    yield [f"Table 5 unit costs and LoM capital, {basis}. Annual cash flows, {result['lom_method']} interpolation between even-year snapshots. Mid-year discounting."], NOTE, width
+    yield BLANK
+    yield ["SC6 Price (US$/t)", "FX (US$/A$)"] + [f"NPV @ {r:.2%}" for r in rates] + ["IRR (%)"], HEADER, 0
+    for pi, price in enumerate(result["prices"].tolist()):
+        for fi, fx in enumerate(result["fx"].tolist()):
+            irr = result["irr"][pi, fi]
+            yield ([price, fx] + np.round(result["npv"][pi, fi], 0).tolist()
+                   + [round(float(irr) * 100, 1) if np.isfinite(irr) else "n/a"]), DATA, 0
+    yield BLANK
+    yield ["Breakeven SC6 Price (US$/t)", "FX (US$/A$)"] + [f"@ {r:.2%}" for r in rates], HEADER, 0
+    for fi, fx in enumerate(result["fx"].tolist()):
+        yield ["", fx] + [round(float(v)) if np.isfinite(v) else "n/a" for v in result["breakeven"][fi]], DATA, 0
+    yield BLANK
+    years = result["development_years"]
+    timing = "all mining years" if not years else "the first year" if years == 1 else f"the first {years} years"
+    yield [f"Development capex spread over {timing}. IRR is n/a where the first year is not an outflow or NPV has no root between 0% and 5,000%; breakeven is n/a above US$20,000/t."], NOTE, width
+
+
+def reconciliation_rows(sched, result):
+    from reconcile import PLAUSIBLE_SIGMA, SOLVED, reconciliation_table
+
+    yield ["RECONCILIATION - Stockpile Mass Balance and Back-solved Chart Readings"], TITLE, 7
+    yield [f"Stockpile change vs ore mined - ore processed per period (Mt), {sched.lom_method} interpolation between even-year snapshots."], NOTE, 7
+    yield BLANK
+    yield ["Period", "Stockpile Change", "Ore Mined", "Processed", "Imbalance",
+           "Total Movement (read)", "Total Movement (solved)"], HEADER, 0
+    for period, *values in reconciliation_table(sched, result):
+        yield [period] + [round(v, 2) for v in values], [METRIC] + [DATA] * len(values), 0
+    yield BLANK
+    yield ["Back-solved series (Mt/year)"], SUBTITLE, 7
+    yield ["Series"] + sched.years.tolist() + ["Max Move (sigma)"], HEADER, 0
+    for name in SOLVED:
+        deviation = result["deviation"][name]
+        yield [name] + np.round(result["solved"][name], 2).tolist() + [round(deviation, 1)], \
+            [METRIC] + [DATA] * len(sched) + [FLAG if name in result["implausible"] else DATA], 0
+    yield BLANK
+    yield ["Least squares weighted by each series' chart-reading error (sigma); strip ratios, stockpiles and "
+           "concentrate totals held exactly. The solve is not bounded: a series moved more than "
+           f"{PLAUSIBLE_SIGMA:g} sigma (highlighted) means the annotations cannot be met within reading error."], NOTE, 7
+
+
+def sensitivity_rows(sched, rows, rel):
+    yield [f"SENSITIVITY - One-at-a-time Tornado, Each Input Series +/-{rel:.0%}"], TITLE, 6
+    yield ["Each input series is scaled down and up with every other input held; only the metrics downstream of it are recomputed."], NOTE, 6
+    yield BLANK
+    yield ["LoM Metric", "Input", "Low", "Base", "High", "Swing"], HEADER, 0
+    for name, out, low, base, high in rows:
+        if high != low:
+            yield [out, name, round(low, 2), round(base, 2), round(high, 2), round(high - low, 2)], [METRIC, DATA, DATA, DATA, DATA, DATA], 0
+
+
+def allocation_rows(sched, result, objective):
+    width = len(PLANTS) + 5
+    unit = "Mt concentrate" if objective == "concentrate" else "A$M discounted processing margin"
+    yield [f"PLANT ALLOCATION - Feed Optimised for {'Concentrate' if objective == 'concentrate' else 'NPV'}"], TITLE, width
+    yield [f"Annual feed (Mt) within plant capacity and ore available (mined + stockpile), {sched.lom_method} interpolation between even-year snapshots."], NOTE, width
+    yield BLANK
+    yield ["Year"] + [p.upper() for p in PLANTS] + ["Total Feed", "Concentrate", "Stockpile (end)", "Chart Feed"], HEADER, 0
+    chart = sched.resample("annual")["proc_total"]
+    for t, year in enumerate(result["years"].tolist()):
+        feed = result["feed"][:, t]
+        yield ([year] + np.round(feed, 2).tolist()
+               + [round(float(feed.sum()), 2), round(float(result["concentrate"][t]), 2),
+                  round(float(result["stockpile"][t]), 2), round(float(chart[t]), 2)]), [METRIC] + [DATA] * (width - 1), 0
+    yield (["LoM TOTAL"] + np.round(result["feed"].sum(axis=1), 1).tolist()
+           + [round(float(result["feed"].sum()), 1), round(float(result["concentrate"].sum()), 1), "", round(float(chart.sum()), 1)]), TOTAL, 0
+    yield BLANK
+    yield ["Plant", "Capacity (Mt/yr)", "Recovery (%)"], HEADER, 0
+    for p, cap, rec in zip(PLANTS, result["capacity"].tolist(), result["recovery"].tolist()):
+        yield [p.upper(), round(cap, 2), round(rec * 100, 1)], [METRIC, DATA, DATA], 0
+    yield BLANK
+    yield [f"Optimised: {result['objective']:,.1f} {unit}; chart plant bands: {result['as_read']:,.1f}."], NOTE, width
+
+
+def block_model_rows(sched, table, cutoff, source):
+    yield ["BLOCK MODEL - Mining by Period"], TITLE, 7
+    yield [f"Aggregated from {os.path.basename(source)}: ore at or above {cutoff}% Li2O, everything else waste. "
+           "The Mining sheet shows each snapshot's average annual rate over its period."], NOTE, 7
+    yield BLANK
+    yield ["Period", "Ore (Mt)", "Waste (Mt)", "Total Movement (Mt)", "Strip Ratio", "Ore Li2O (%)", "Blocks"], HEADER, 0
+    for period, ore, waste, total, strip, grade, blocks in zip(*(table[k].tolist() for k in (
+            "period", "ore", "waste", "total_movement", "strip_ratio", "ore_grade", "blocks"))):
+        yield [period, round(ore, 2), round(waste, 2), round(total, 2), round(strip, 2), round(grade, 2), blocks], \
+            [METRIC] + [DATA] * 6, 0
+    ore, waste = float(table["ore"].sum()), float(table["waste"].sum())
+    yield ["TOTAL", round(ore, 1), round(waste, 1), round(ore + waste, 1), round(safe_ratio(waste, ore).item(), 2),
+           round(safe_ratio(float(table["ore"] @ table["ore_grade"]), ore).item(), 2), int(table["blocks"].sum())], TOTAL, 0
+
+
+def grade_tonnage_rows(sched, curve, source, scale=1.0):
+    from block_model import CUTOFF
+    from grade_tonnage import BREAKEVEN
+
+    marks = {BREAKEVEN: "Breakeven grade (investment analysis)", CUTOFF: "ORE reporting cut-off"}
+    yield ["GRADE-TONNAGE - Tonnes and Grade Above Cut-off"], TITLE, 7
+    yield [f"{source}. Tonnes and contained Li2O at or above each cut-off grade."], NOTE, 7
+    yield BLANK
+    yield ["Cut-off (% Li2O)", "Tonnes (Mt)", "Li2O Grade (%)", "Contained Li2O (kt)", "Tonnes (% of Total)",
+           "Li2O (% of Total)", "Note"], HEADER, 0
+    for cutoff, tonnes, grade, metal, tonnes_pct, metal_pct in zip(*(curve[k].tolist() for k in (
+            "cutoff", "tonnes", "grade", "metal", "tonnes_pct", "metal_pct"))):
+        yield [cutoff, round(tonnes / scale, 2), round(grade, 2), round(metal / scale * 1000, 1),
+               round(tonnes_pct, 1), round(metal_pct, 1), marks.get(round(cutoff, 6), "")], \
+            [METRIC] + [DATA] * 6, 0
+
+
+PROC_COLUMNS = tuple(f"proc_{p}" for p in PLANTS)
+CONC_COLUMNS = tuple(f"conc_{p}" for p in PLANTS)
+
+# (sheet title, row generator, column widths, schedule columns the sheet reads)
+SHEETS = [
+    ("Mining", mining_rows, auto_width(7),
+     ("ore", "waste", "total_movement", "strip_ratio", "ore_pct", "waste_pct")),
+    ("Stockpiles", stockpile_rows, auto_width(4), ("stockpile",)),
+    ("Processing", processing_rows, auto_width(8), PROC_COLUMNS + ("proc_total", "li2o_grade")),
+    ("Concentrate", concentrate_rows, auto_width(7), CONC_COLUMNS + ("conc_total", "recovery", "proc_total")),
+    ("Summary & Analysis", summary_rows, auto_width(9),
+     ("ore", "waste", "total_movement", "strip_ratio", "stockpile", "proc_total", "li2o_grade", "conc_total")),
+    ("Key Insights", insight_rows, {"A": 30, "B": 100},
+     ("ore", "waste", "total_movement", "strip_ratio", "stockpile", "li2o_grade", "conc_total", "proc_total")
+     + PROC_COLUMNS + CONC_COLUMNS),
+    ("Data Notes", notes_rows, {"A": 120}, ()),
+]
+
+
+# ==============================================================================
+# CREATE WORKBOOK
+# ==============================================================================
+
+def _row_styles(values, style):
+    return style if isinstance(style, list) else [style] * len(values)
+
+
+def write_sheet(ws, rows, widths):
+    """Fill an in-memory worksheet cell by cell."""
+    for letter, width in widths.items():
+        ws.column_dimensions[letter].width = width
+
+    cells = row_idx = 0
+    for row_idx, (values, style, merge_cols) in enumerate(profiling.iterate("rows", rows), 1):
+        for col, (v, s) in enumerate(zip(values, _row_styles(values, style)), 1):
+            cell = ws.cell(row=row_idx, column=col, value=v)
+            cell.style = s
+        cells += len(values)
+        if merge_cols:
+            with stage("merge_cells"):
+                ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=merge_cols)
+    profiling.count(cells=cells, rows=row_idx)
+
+
+def stream_sheet(ws, rows, widths):
+    """Append rows to a write-only worksheet; only the current row is held in memory."""
+    for letter, width in widths.items():
+        ws.column_dimensions[letter].width = width
+
+    written = row_idx = 0
+    for row_idx, (values, style, merge_cols) in enumerate(profiling.iterate("rows", rows), 1):
+        cells = []
+        for v, s in zip(values, _row_styles(values, style)):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.style = s
+            cells.append(cell)
+        ws.append(cells)
+        written += len(cells)
+        if merge_cols:
+            with stage("merge_cells"):
+                ws.merged_cells.add(f"A{row_idx}:{get_column_letter(merge_cols)}{row_idx}")
+    profiling.count(cells=written, rows=row_idx)
+
+
+def add_chart(ws, path, widths):
+    """Anchor the PNG at `path` to the right of the sheet's table."""
+    from openpyxl.drawing.image import Image
+    from charts import ANCHOR_GAP
+
+    col = max(column_index_from_string(letter) for letter in widths) + ANCHOR_GAP + 1
+    ws.add_image(Image(path), f"{get_column_letter(col)}2")
+
+
+@lru_cache(maxsize=None)
+def _code_version():
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in (os.path.basename(__file__), "lom_schedule.py", "resample.py", "metrics.py"):
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+
+def _hash_value(h, value):
+    """Feed `value` into hash `h`, hashing arrays by content rather than repr."""
+    if isinstance(value, np.ndarray):
+        h.update(repr((value.dtype.str, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            h.update(repr(key).encode())
+            _hash_value(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _hash_value(h, item)
     else:
-        ws7.cell(row=3 + i, column=1).font = DATA_FONT
+        h.update(repr(value).encode())
+
+
+def sheet_fingerprints(sched, sheets, charts=None):
+    """{title: sha256 of everything the sheet is built from}.
+
+    Covers the sheet's schedule columns, the year axis, any arguments bound to
+    the row generator, the LoM interpolation method and the schedule code, so a
+    code change rebuilds all. An embedded chart is covered by its path, which
+    is the content hash of its series (see charts.py).
+    """
+    base = hashlib.sha256(_code_version().encode())
+    base.update(sched.lom_method.encode())
+    base.update(sched.years.tobytes())
+    base.update(sched.mining.tobytes())
+    prints = {}
+    for title, rows, widths, inputs in sheets:
+        h = base.copy()
+        _hash_value(h, (title, widths, getattr(rows, "keywords", None)))
+        for name in inputs:
+            h.update(name.encode())
+            h.update(sched[name].tobytes())
+        if charts and title in charts:
+            h.update(os.path.basename(charts[title]).encode())
+        prints[title] = h.hexdigest()
+    return prints
+
+
+def manifest_path(output_path):
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+
+def _load_manifest(output_path):
+    """Previous fingerprints, or None when the output no longer matches the manifest."""
+    try:
+        with open(manifest_path(output_path), encoding="utf-8") as f:
+            manifest = json.load(f)
+        stat = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("size") != stat.st_size or manifest.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return manifest.get("sheets")
+
+
+def _save_manifest(output_path, fingerprints):
+    stat = os.stat(output_path)
+    with open(manifest_path(output_path), "w", encoding="utf-8") as f:
+        json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sheets": fingerprints}, f, indent=2)
+
+
+def build_workbook(output_path, sched=None, streaming=False, sheets=SHEETS, incremental=False, charts=None):
+    """Build sheets from `sched` (default Figure 14), save to `output_path` and
+    return the titles written.
+
+    With `streaming=True` the workbook is write-only: rows are serialised as
+    they are generated, so memory stays flat regardless of schedule length.
+
+    With `incremental=True` the previous workbook is reused: only sheets whose
+    fingerprint differs from the manifest saved next to it are rebuilt, and
+    nothing is written at all when every sheet is unchanged. Only incremental
+    builds write the manifest.
+
+    `charts` maps sheet title -> PNG path (see charts.py); each is embedded
+    to the right of its sheet's table.
+    """
+    if sched is None:
+        sched = default_schedule()
+    charts = charts or {}
+    previous = fingerprints = None
+    if incremental:
+        with stage("fingerprints"):
+            fingerprints = sheet_fingerprints(sched, sheets, charts)
+        previous = _load_manifest(output_path)
+
+    if previous is not None and list(previous) == list(fingerprints):
+        changed = [title for title in fingerprints if previous[title] != fingerprints[title]]
+        if not changed:
+            return []
+        with stage("load_workbook"):
+            wb = load_workbook(output_path)
+        for index, (title, rows, widths, _) in enumerate(sheets):
+            if title in changed:
+                with stage(f"sheet:{title}"):
+                    wb.remove(wb[title])
+                    ws = wb.create_sheet(title, index)
+                    write_sheet(ws, rows(sched), widths)
+                    if title in charts:
+                        add_chart(ws, charts[title], widths)
+        with stage("save"):
+            wb.save(output_path)
+        _save_manifest(output_path, fingerprints)
+        return changed
+
+    wb = Workbook(write_only=streaming)
+    with stage("styles"):
+        register_named_styles(wb)
+    if not streaming:
+        wb.remove(wb.active)
+
+    for title, rows, widths, _ in sheets:
+        with stage(f"sheet:{title}"):
+            ws = wb.create_sheet(title)
+            if streaming:
+                stream_sheet(ws, rows(sched), widths)
+            else:
+                write_sheet(ws, rows(sched), widths)
+            if title in charts:
+                add_chart(ws, charts[title], widths)
+
+    with stage("save"):
+        wb.save(output_path)
+    if incremental:
+        _save_manifest(output_path, fingerprints)
+    return [title for title, *_ in sheets]
 
-ws7.column_dimensions["A"].width = 120
 
 # ==============================================================================
 # SAVE
 # ==============================================================================
 
-output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Greenbushes_LoM_Analysis.xlsx")
-wb.save(output_path)
-print(f"Excel workbook saved to: {output_path}")
-print(f"\nSheets created:")
-print(f"  1. Mining - Ore, Waste, Total Movement, Strip Ratio")
-print(f"  2. Stockpiles - Stockpile levels with changes")
-print(f"  3. Processing - Plant-by-plant processing with Li2O grades")
-print(f"  4. Concentrate - Plant-by-plant concentrate output")
-print(f"  5. Summary & Analysis - All metrics combined")
-print(f"  6. Key Insights - Deep analysis and observations")
-print(f"  7. Data Notes - Source and methodology documentation")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Greenbushes LoM analysis workbook.")
+    parser.add_argument("-o", "--output",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Greenbushes_LoM_Analysis.xlsx"))
+    parser.add_argument("--streaming", action="store_true",
+                        help="Write-only mode for long (monthly / per-pit) schedules")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild sheets whose inputs changed since the last run")
+    parser.add_argument("--lom-method", choices=("step", "linear", "mass"), default=None,
+                        help="Interpolation between even-year snapshots for LoM totals "
+                             "(default: the store's, else linear)")
+    parser.add_argument("--store", metavar="SCHEDULES.cols",
+                        help="Read the schedule from a column store instead of Figure 14")
+    parser.add_argument("--scenario", help="Scenario in --store (default: the first)")
+    parser.add_argument("--block-model", metavar="BLOCKS.csv|BLOCKS.cols",
+                        help="Derive the Mining series from a block model and add a Block Model sheet")
+    parser.add_argument("--cutoff", type=float, default=None, help="Ore cut-off for --block-model (default 0.5%% Li2O)")
+    parser.add_argument("--block-columns", nargs="+", metavar="ROLE=NAME",
+                        help="Block model column names for tonnes, li2o and period")
+    parser.add_argument("--grade-tonnage", type=float, nargs="*", metavar="CUTOFF", default=None,
+                        help="Add a Grade-Tonnage sheet at these cut-offs (default 0-3%% Li2O by 0.1, 0.43, 0.5); "
+                             "from --block-model if given, else the processing feed")
+    parser.add_argument("--simulate", type=int, metavar="N", default=0,
+                        help="Add an Uncertainty sheet from N Monte Carlo draws")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Process pool size for --simulate, --charts and --block-model (0 = all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--valuation", action="store_true",
+                        help="Add a Valuation sheet (NPV / IRR / breakeven grid)")
+    parser.add_argument("--prices", type=float, nargs="+", default=[800, 1200, 1600, 2000],
+                        help="Flat SC6 prices for --valuation (US$/t)")
+    parser.add_argument("--fx", type=float, nargs="+", default=[0.65], help="US$ per A$ for --valuation")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.05, 0.0732, 0.10],
+                        help="Discount rates for --valuation")
+    parser.add_argument("--development-years", type=int, default=1,
+                        help="Spread development capex over this many first years for --valuation (0: all mining years)")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Add a Reconciliation sheet (stockpile mass balance + back-solve)")
+    parser.add_argument("--tornado", type=float, nargs="?", const=0.10, metavar="REL",
+                        help="Add a Sensitivity sheet, each input moved by +/-REL (default 0.10)")
+    parser.add_argument("--optimize", choices=("concentrate", "npv"),
+                        help="Add a Plant Allocation sheet (npv uses the first --prices, --fx and --rates)")
+    parser.add_argument("--capacity", nargs="+", metavar="PLANT=MT",
+                        help="Plant capacities for --optimize (default: highest chart reading)")
+    parser.add_argument("--charts", action="store_true",
+                        help="Embed the Mining, Stockpiles, Processing and Concentrate charts (needs matplotlib)")
+    parser.add_argument("--chart-cache", metavar="DIR", default=None,
+                        help="Rendered chart cache for --charts (default: .chart_cache next to this script)")
+    parser.add_argument("--profile", metavar="REPORT.json",
+                        help="Write per-stage wall time, calls, cells and memory to a JSON report")
+    parser.add_argument("--flame", metavar="STACKS.txt",
+                        help="Also write folded stacks for flame-graph tools (implies profiling)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Record tracemalloc memory deltas per stage (slows the run)")
+    args = parser.parse_args(argv)
+
+    if args.profile or args.flame:
+        profiling.enable(memory=args.profile_memory)
+    if args.store and args.block_model:
+        parser.error("--store and --block-model are mutually exclusive")
+    if args.development_years < 0:
+        parser.error("--development-years must be 0 or more")
+    block_table = None
+    with stage("load"):
+        if args.block_model:
+            from block_model import CUTOFF, aggregate, parse_columns, schedule_inputs
+            args.cutoff = CUTOFF if args.cutoff is None else args.cutoff
+            try:
+                with stage("block_model"):
+                    block_table = aggregate(args.block_model, args.cutoff, parse_columns(args.block_columns),
+                                            args.workers or None)
+                schedule = load_schedule(schedule_inputs(block_table))
+            except ValueError as e:
+                parser.error(str(e))
+        elif args.store:
+            from column_store import ScheduleStore
+            store = ScheduleStore(args.store)
+            try:
+                schedule = store.schedule(args.scenario or 0)
+            except ValueError:
+                parser.error(f"--scenario {args.scenario!r} not in {args.store}")
+        else:
+            schedule = load_schedule()
+    schedule.lom_method = args.lom_method or schedule.lom_method
+
+    sheets = SHEETS
+    if block_table is not None:
+        sheets = sheets + [("Block Model", partial(block_model_rows, table=block_table, cutoff=args.cutoff,
+                                                    source=args.block_model),
+                            auto_width(7), ())]
+    if args.grade_tonnage is not None:
+        from block_model import TONNES_PER_MT, parse_columns
+        from grade_tonnage import CUTOFFS, from_block_model, from_schedule
+        with stage("grade_tonnage"):
+            if args.block_model:
+                gt = from_block_model(args.block_model, parse_columns(args.block_columns), workers=args.workers or None)
+                source, scale, cols = f"{len(gt):,} blocks of {os.path.basename(args.block_model)}", TONNES_PER_MT, ()
+            else:
+                gt = from_schedule(schedule)
+                source, scale, cols = (f"Processing feed, one parcel per year at its Li2O grade "
+                                       f"({len(gt)} years; a feed-grade curve, not a resource)"), 1.0, \
+                    ("proc_total", "li2o_grade")
+            curve = gt.curve(args.grade_tonnage or CUTOFFS)
+        sheets = sheets + [("Grade-Tonnage", partial(grade_tonnage_rows, curve=curve, source=source, scale=scale),
+                            auto_width(6) | {"A": 18, "G": 36}, cols)]
+    if args.simulate:
+        from uncertainty import simulate, summarize
+        with stage("simulate"):
+            samples = simulate(schedule, args.simulate, seed=args.seed, workers=args.workers or os.cpu_count())
+            summary = summarize(schedule, samples)
+        sheets = sheets + [("Uncertainty", partial(uncertainty_rows, summary=summary, n_samples=args.simulate),
+                            {"A": 34, "B": 16, "C": 12, "D": 12, "E": 12}, ())]
+    if args.valuation:
+        from valuation import evaluate_grid
+        with stage("valuation"):
+            result = evaluate_grid(schedule, args.prices, args.fx, args.rates,
+                                   development_years=args.development_years)
+        sheets = sheets + [("Valuation", partial(valuation_rows, result=result),
+                            auto_width(3 + len(args.rates)) | {"A": 26},
+                            ("conc_total", "proc_total", "total_movement"))]
+    if args.reconcile:
+        from reconcile import SOLVED, reconcile
+        with stage("reconcile"):
+            result = reconcile([("base", schedule)])["base"]
+        sheets = sheets + [("Reconciliation", partial(reconciliation_rows, result=result),
+                            auto_width(1 + len(schedule)) | {"A": 18},
+                            SOLVED + ("strip_ratio", "stockpile", "conc_total"))]
+    if args.tornado:
+        from metrics import TORNADO_INPUTS, tornado
+        with stage("tornado"):
+            rows = tornado(MetricGraph.from_schedule(schedule), rel=args.tornado)
+        sheets = sheets + [("Sensitivity", partial(sensitivity_rows, rows=rows, rel=args.tornado),
+                            auto_width(6) | {"A": 20, "B": 18}, TORNADO_INPUTS + ("strip_ratio",))]
+    if args.optimize:
+        from allocation import optimize, parse_capacity
+        with stage("optimize"):
+            try:
+                result = optimize([("base", schedule)], args.optimize, parse_capacity(args.capacity),
+                                  args.prices[0], args.fx[0], args.rates[0])["base"]
+            except ValueError as e:
+                parser.error(str(e))
+        sheets = sheets + [("Plant Allocation", partial(allocation_rows, result=result, objective=args.optimize),
+                            auto_width(len(PLANTS) + 5),
+                            ("total_movement", "strip_ratio", "stockpile")
+                            + tuple(f"{k}_{p}" for k in ("proc", "conc") for p in PLANTS))]
+
+    charts = None
+    if args.charts:
+        from charts import CACHE_DIR, schedule_charts
+        with stage("charts"):
+            charts = schedule_charts(schedule, args.workers or os.cpu_count(), args.chart_cache or CACHE_DIR)
+
+    written = build_workbook(args.output, schedule, streaming=args.streaming, sheets=sheets,
+                             incremental=args.incremental, charts=charts)
+    prof = profiling.disable()
+    if prof is not None:
+        if args.profile:
+            prof.save_json(args.profile)
+            print(f"Profile saved to: {args.profile}")
+        if args.flame:
+            prof.save_folded(args.flame)
+            print(f"Folded stacks saved to: {args.flame}")
+    if args.incremental and len(written) < len(sheets):
+        print(f"Excel workbook up to date: {args.output}")
+        print(f"Rebuilt {len(written)} of {len(sheets)} sheets: {', '.join(written) or 'none'}")
+        return written
+    print(f"Excel workbook saved to: {args.output}")
+    print(f"\nSheets created:")
+    print(f"  1. Mining - Ore, Waste, Total Movement, Strip Ratio")
+    print(f"  2. Stockpiles - Stockpile levels with changes")
+    print(f"  3. Processing - Plant-by-plant processing with Li2O grades")
+    print(f"  4. Concentrate - Plant-by-plant concentrate output")
+    print(f"  5. Summary & Analysis - All metrics combined")
+    print(f"  6. Key Insights - Deep analysis and observations")
+    print(f"  7. Data Notes - Source and methodology documentation")
+    extra = 8
+    if block_table is not None:
+        print(f"  {extra}. Block Model - Ore and waste by period at a {args.cutoff}% Li2O cut-off")
+        extra += 1
+    if args.grade_tonnage is not None:
+        print(f"  {extra}. Grade-Tonnage - Tonnes and grade above {len(curve['cutoff'])} cut-off grades")
+        extra += 1
+    if args.simulate:
+        print(f"  {extra}. Uncertainty - P10/P50/P90 of LoM totals")
+        extra += 1
+    if args.valuation:
+        print(f"  {extra}. Valuation - NPV / IRR / breakeven over price, FX and discount-rate grids")
+        extra += 1
+    if args.reconcile:
+        print(f"  {extra}. Reconciliation - Stockpile mass balance and back-solved chart readings")
+        extra += 1
+    if args.tornado:
+        print(f"  {extra}. Sensitivity - Tornado of LoM metrics, each input +/-{args.tornado:.0%}")
+        extra += 1
+    if args.optimize:
+        print(f"  {extra}. Plant Allocation - Feed optimised for {args.optimize} within plant capacities")
+    if charts:
+        print(f"\nCharts embedded in: {', '.join(charts)}")
+    return written
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Grade-Tonnage Curves
+Tonnes, mean grade and contained Li2O above any cut-off grade, for thousands
+of cut-offs at once.
+
+Block (or parcel) grades are sorted once. Suffix sums of tonnes and metal
+over the sorted grades then give, for every cut-off, the tonnes and metal at
+or above it from one binary search (np.searchsorted). A curve over thousands
+of cut-offs takes a millisecond or two, and never rescans the blocks.
+
+Sources:
+  - a block model CSV or column store (see block_model.py), read in chunks.
+    By default every block is kept and sorted, which is exact. With
+    `resolution` the blocks are instead summed into grade parcels of that
+    width as they stream past, so memory holds one slot per parcel. Curves
+    are then exact at parcel edges, and a cut-off inside a parcel takes the
+    whole parcel when its mean grade is at or above the cut-off.
+  - the schedule: each resampled period of processing feed is one parcel at
+    that period's Li2O grade. This is a feed-grade curve, not a resource.
+
+A block with no grade counts as 0% Li2O, like waste in block_model.py. The
+investment analysis quotes a 0.43% Li2O breakeven against the 0.5% ORE
+reporting cut-off; both are always on the workbook's curve.
+
+Usage: python grade_tonnage.py [BLOCKS.csv|BLOCKS.cols] [--cutoffs C ...] [--range LO HI STEP]
+                               [--resolution R] [--columns tonnes=TONNES li2o=LI2O] [-o CURVE.csv]
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from block_model import (
+    CHUNK_BYTES, CHUNK_ROWS, COLUMNS, CUTOFF, TONNES_PER_MT,
+    _csv_header, _csv_ranges, _read_range, parse_columns, store_chunks,
+)
+from column_store import is_store
+from lom_schedule import safe_ratio
+
+BREAKEVEN = 0.43                # % Li2O, investment-analysis.md
+CUTOFFS = np.union1d(np.round(np.arange(0.0, 3.0 + 1e-9, 0.1), 2), [BREAKEVEN, CUTOFF])
+
+
+# ==============================================================================
+# CURVE
+# ==============================================================================
+
+class GradeTonnage:
+    """Tonnes and metal at or above any cut-off, from grades sorted once.
+
+    `metal` defaults to tonnes x grade / 100, in the units of `tonnes`.
+    """
+
+    def __init__(self, grades, tonnes, metal=None):
+        grades = np.nan_to_num(np.asarray(grades, dtype=np.float64))
+        tonnes = np.nan_to_num(np.asarray(tonnes, dtype=np.float64))
+        metal = tonnes * grades / 100 if metal is None else np.asarray(metal, dtype=np.float64)
+        order = np.argsort(grades, kind="stable")
+        self.grades = grades[order]
+        # suffix sums: index i holds everything from sorted block i upward; one
+        # trailing zero for cut-offs above the highest grade
+        self.tonnes_above = np.append(np.cumsum(tonnes[order][::-1])[::-1], 0.0)
+        self.metal_above = np.append(np.cumsum(metal[order][::-1])[::-1], 0.0)
+
+    def __len__(self):
+        return len(self.grades)
+
+    @property
+    def tonnes(self):
+        return float(self.tonnes_above[0])
+
+    @property
+    def metal(self):
+        return float(self.metal_above[0])
+
+    def curve(self, cutoffs=CUTOFFS):
+        """{cutoff, tonnes, grade (%), metal, tonnes_pct, metal_pct} at or above each cut-off."""
+        cutoffs = np.atleast_1d(np.asarray(cutoffs, dtype=np.float64))
+        i = np.searchsorted(self.grades, cutoffs, side="left")
+        tonnes, metal = self.tonnes_above[i], self.metal_above[i]
+        return {
+            "cutoff": cutoffs,
+            "tonnes": tonnes,
+            "grade": safe_ratio(metal, tonnes, 100),
+            "metal": metal,
+            "tonnes_pct": safe_ratio(tonnes, self.tonnes_above[0], 100),
+            "metal_pct": safe_ratio(metal, self.metal_above[0], 100),
+        }
+
+
+class GradeBins:
+    """Running tonnes and metal per grade parcel of width `resolution` (% Li2O)."""
+
+    def __init__(self, resolution):
+        self.resolution = resolution
+        self.tonnes = np.zeros(0)
+        self.metal = np.zeros(0)
+
+    def _grow(self, n):
+        if n > len(self.tonnes):
+            self.tonnes = np.append(self.tonnes, np.zeros(n - len(self.tonnes)))
+            self.metal = np.append(self.metal, np.zeros(n - len(self.metal)))
+
+    def add(self, grades, tonnes):
+        """Add one chunk of blocks."""
+        if not len(grades):
+            return self
+        grades = np.maximum(np.nan_to_num(np.asarray(grades, dtype=np.float64)), 0.0)
+        tonnes = np.nan_to_num(np.asarray(tonnes, dtype=np.float64))
+        slot = (grades / self.resolution).astype(np.int64)
+        n = int(slot.max()) + 1
+        self._grow(n)
+        self.tonnes[:n] += np.bincount(slot, tonnes, n)
+        self.metal[:n] += np.bincount(slot, tonnes * grades / 100, n)
+        return self
+
+    def merge(self, other):
+        self._grow(len(other.tonnes))
+        self.tonnes[:len(other.tonnes)] += other.tonnes
+        self.metal[:len(other.metal)] += other.metal
+        return self
+
+    def curve(self):
+        """GradeTonnage over the non-empty parcels, each at its own mean grade."""
+        keep = self.tonnes > 0
+        grades = self.metal[keep] * 100 / self.tonnes[keep]
+        return GradeTonnage(grades, self.tonnes[keep], self.metal[keep])
+
+
+# ==============================================================================
+# SOURCES
+# ==============================================================================
+
+def _csv_part(args):
+    path, start, end, usecols, resolution = args
+    tonnes, li2o = _read_range(path, start, end, usecols).T
+    return GradeBins(resolution).add(li2o, tonnes) if resolution else (li2o, tonnes)
+
+
+def from_block_model(path, columns=None, resolution=None, workers=None, chunk_rows=CHUNK_ROWS,
+                     chunk_bytes=CHUNK_BYTES):
+    """GradeTonnage (tonnes in t) of a block model CSV or column store.
+
+    Only the tonnes and Li2O columns are read. With `resolution` the blocks
+    are binned into grade parcels while streaming (see GradeBins).
+    """
+    columns = {role: name for role, name in {**COLUMNS, **(columns or {})}.items() if role != "period"}
+    if is_store(path):
+        parts = ((chunk["li2o"], chunk["tonnes"]) for chunk in store_chunks(path, columns, chunk_rows))
+        if resolution:
+            bins = GradeBins(resolution)
+            for li2o, tonnes in parts:
+                bins.add(li2o, tonnes)
+            return bins.curve()
+        parts = list(parts)
+    else:
+        # columns keeps COLUMNS' order: tonnes, li2o
+        usecols, start = _csv_header(path, columns)
+        tasks = [(path, lo, hi, usecols, resolution) for lo, hi in _csv_ranges(path, start, chunk_bytes)]
+        if workers == 1 or len(tasks) <= 1:
+            parts = [_csv_part(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_csv_part, tasks))
+        if resolution:
+            bins = GradeBins(resolution)
+            for part in parts:
+                bins.merge(part)
+            return bins.curve()
+    if not parts:
+        return GradeTonnage([], [])
+    return GradeTonnage(np.concatenate([g for g, _ in parts]), np.concatenate([t for _, t in parts]))
+
+
+def from_schedule(sched, freq="annual"):
+    """GradeTonnage (tonnes in Mt) of the processing feed, one parcel per resampled period."""
+    view = sched.resample(freq)
+    return GradeTonnage(view["li2o_grade"], view["proc_total"])
+
+
+def cutoff_range(lo, hi, step):
+    """Cut-offs lo, lo + step, ... up to and including hi."""
+    return np.round(np.arange(lo, hi + step / 2, step), 6)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tonnes and grade above many cut-off grades at once.")
+    parser.add_argument("source", nargs="?", help="Block model CSV or column store (default: the schedule's feed)")
+    parser.add_argument("--cutoffs", type=float, nargs="+", help="Cut-off grades, %% Li2O")
+    parser.add_argument("--range", type=float, nargs=3, metavar=("LO", "HI", "STEP"),
+                        help="Evenly spaced cut-offs instead of --cutoffs")
+    parser.add_argument("--resolution", type=float, default=None,
+                        help="Bin blocks into grade parcels of this width (%% Li2O) instead of sorting every block")
+    parser.add_argument("--columns", nargs="+", metavar="ROLE=NAME",
+                        help="Column names for tonnes and li2o (default: those names)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for CSV (default: all cores)")
+    parser.add_argument("-o", "--output", metavar="CURVE.csv", help="Write the curve as CSV")
+    args = parser.parse_args()
+
+    cutoffs = cutoff_range(*args.range) if args.range else CUTOFFS if args.cutoffs is None else args.cutoffs
+    start = time.perf_counter()
+    if args.source:
+        try:
+            gt = from_block_model(args.source, parse_columns(args.columns), args.resolution, args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+        scale, unit = TONNES_PER_MT, "blocks" if args.resolution is None else "parcels"
+    else:
+        from figure14 import load_schedule
+
+        gt, scale, unit = from_schedule(load_schedule()), 1.0, "feed parcels"
+    built = time.perf_counter()
+    curve = gt.curve(cutoffs)
+    queried = time.perf_counter()
+
+    if args.output:
+        header = ["cutoff", "tonnes_mt", "li2o_pct", "li2o_kt", "tonnes_pct", "li2o_pct_of_total"]
+        np.savetxt(args.output, np.column_stack([
+            curve["cutoff"], curve["tonnes"] / scale, curve["grade"], curve["metal"] / scale * 1000,
+            curve["tonnes_pct"], curve["metal_pct"]]), fmt="%.6g", delimiter=",", header=",".join(header),
+            comments="")
+        print(f"Curve saved to: {args.output}")
+    else:
+        print(f"{'Cut-off':>8}{'Mt':>10}{'Li2O %':>8}{'Li2O kt':>10}{'% t':>7}{'% Li2O':>8}")
+        for c, t, g, m, tp, mp in zip(*(curve[k] for k in ("cutoff", "tonnes", "grade", "metal",
+                                                          "tonnes_pct", "metal_pct"))):
+            print(f"{c:>8.2f}{t / scale:>10.2f}{g:>8.2f}{m / scale * 1000:>10.1f}{tp:>7.1f}{mp:>8.1f}")
+    print(f"\n{len(gt):,} {unit} read and sorted in {built - start:.2f}s; "
+          f"{len(curve['cutoff']):,} cut-offs in {(queried - built) * 1000:.2f} ms")
@@ -0,0 +1,158 @@
+"""
+Year-indexed columnar LoM schedule.
+
+Holds every Figure 14 series as a float64 column on one shared year axis.
+Series that only exist while mining (strip ratio, total movement) are aligned
+onto the full processing axis by index; derived columns (ore, waste, totals,
+recovery proxy, ore/waste %) are computed as whole-array operations.
+"""
+
+import numpy as np
+
+from profiling import stage
+
+PLANTS = ("cgp3", "cgp2", "cgp1", "tgp")
+
+# Inputs reported against the mining years only
+MINING_INPUTS = ("strip_ratio", "total_movement")
+
+# Inputs reported against the full (processing) year axis
+FULL_INPUTS = (
+    ("stockpile", "li2o_grade", "conc_total")
+    + tuple(f"proc_{p}" for p in PLANTS)
+    + tuple(f"conc_{p}" for p in PLANTS)
+)
+
+
+def safe_ratio(num, den, scale=1.0):
+    out = np.zeros(np.broadcast(num, den).shape)
+    np.divide(num * scale, den, out=out, where=den != 0)
+    return out
+
+
+# Derived columns: name -> (columns it is computed from, function of those
+# columns), in dependency order. metrics.py builds its dependency graph on
+# this table.
+DERIVED = {
+    # Ore and Waste calculated from: Total = Ore * (1 + Strip Ratio)
+    "ore": (("total_movement", "strip_ratio"), lambda total, strip: total / (1 + strip)),
+    "waste": (("total_movement", "ore"), lambda total, ore: total - ore),
+    "ore_pct": (("ore", "total_movement"), lambda ore, total: safe_ratio(ore, total, 100)),
+    "waste_pct": (("waste", "total_movement"), lambda waste, total: safe_ratio(waste, total, 100)),
+    "proc_total": (tuple(f"proc_{p}" for p in PLANTS), lambda *plants: sum(plants)),
+    "recovery": (("conc_total", "proc_total"), lambda conc, proc: safe_ratio(conc, proc, 100)),
+}
+
+
+def derive_columns(c, decimals=1):
+    """Add derived columns to the dict `c` in place and return it.
+
+    Works on any array shape whose last axis is the year axis, so a batch of
+    (n_samples, n_years) draws goes through the same code as one schedule.
+    `decimals=None` skips the report rounding.
+    """
+    rnd = (lambda a: a) if decimals is None else (lambda a: np.round(a, decimals))
+    for name, (inputs, fn) in DERIVED.items():
+        c[name] = rnd(fn(*(c[i] for i in inputs)))
+    return c
+
+
+class LomSchedule:
+    def __init__(self, years, mining, columns):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.mining = np.asarray(mining, dtype=bool)
+        self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        # interpolation used for full-period LoM totals (see resample.py)
+        self.lom_method = "linear"
+        self._resampled = {}
+        self.derive()
+
+    @classmethod
+    def from_inputs(cls, inputs):
+        """Build from a dict of plain sequences.
+
+        `inputs` holds `years`, `mining_years` and one sequence per name in
+        MINING_INPUTS (aligned to `mining_years`) and FULL_INPUTS (aligned to
+        `years`).
+        """
+        years = np.asarray(inputs["years"], dtype=np.int64)
+        mining_years = np.asarray(inputs["mining_years"], dtype=np.int64)
+        if years.ndim != 1 or (np.diff(years) <= 0).any():
+            raise ValueError("years must be strictly increasing")
+
+        idx = np.searchsorted(years, mining_years)
+        if (idx >= len(years)).any() or (years[np.minimum(idx, len(years) - 1)] != mining_years).any():
+            raise ValueError("mining_years must be a subset of years")
+        mining = np.zeros(len(years), dtype=bool)
+        mining[idx] = True
+
+        columns = {}
+        for name in MINING_INPUTS:
+            values = np.asarray(inputs[name], dtype=np.float64)
+            if values.shape != mining_years.shape:
+                raise ValueError(f"{name}: expected {len(mining_years)} values, got {values.size}")
+            col = np.zeros(len(years))
+            col[idx] = values
+            columns[name] = col
+        for name in FULL_INPUTS:
+            col = np.asarray(inputs[name], dtype=np.float64)
+            if col.shape != years.shape:
+                raise ValueError(f"{name}: expected {len(years)} values, got {col.size}")
+            columns[name] = col
+
+        return cls(years, mining, columns)
+
+    def derive(self):
+        with stage("derive"):
+            derive_columns(self.columns)
+        self._resampled = {}
+
+    def __len__(self):
+        return len(self.years)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def mining_years(self):
+        return self.years[self.mining]
+
+    def mined(self, name):
+        """Column restricted to the mining years."""
+        return self.columns[name][self.mining]
+
+    def table(self, names, mining_only=False):
+        """2-D float array with one column per name, rows in year order."""
+        table = np.column_stack([self.columns[n] for n in names])
+        return table[self.mining] if mining_only else table
+
+    def total(self, name, mining_only=False):
+        values = self.mined(name) if mining_only else self.columns[name]
+        return float(values.sum())
+
+    def mean(self, name):
+        return float(self.columns[name].mean())
+
+    def resample(self, freq="annual", method=None):
+        """Lazy view at `freq` resolution; columns are interpolated on first access."""
+        from resample import Resampled
+
+        key = (freq, method or self.lom_method)
+        if key not in self._resampled:
+            self._resampled[key] = Resampled(self, *key)
+        return self._resampled[key]
+
+    def lom_total(self, name):
+        """Total of a flow over every year of the LoM, not just the snapshot years.
+
+        Same as self.resample().total(name), as one O(n_years) dot product.
+        """
+        from resample import MINING_FLOWS, total_weights
+
+        mask = self.mining if name in MINING_FLOWS + ("total_movement",) else None
+        return float(self.columns[name] @ total_weights(self.years, self.lom_method, mask))
+
+    def peak(self, name):
+        """(value, year) of the column maximum; earliest year wins ties."""
+        i = int(np.argmax(self.columns[name]))
+        return float(self.columns[name][i]), int(self.years[i])
@@ -0,0 +1,377 @@
+"""
+Metric dependency graph with memoised, incremental recompute.
+
+Every quantity the workbook reports is a node with declared inputs:
+  - schedule inputs (Figure 14 series), the year axis, mining mask and LoM
+    interpolation method;
+  - derived columns (lom_schedule.DERIVED: ore, waste, proc_total, ...);
+  - LoM metrics (totals, averages, peaks);
+  - Key Insights text, one node per insight.
+
+A node is computed the first time it is read and cached. set() replaces an
+input and drops only the nodes downstream of it. perturb() does the same,
+then restores the cached values on exit. A one-at-a-time sensitivity sweep
+therefore recomputes only what depends on the input it moves. Nodes work on
+any leading batch shape, so one sweep can move an input through thousands
+of values in a single evaluation.
+
+Usage: python metrics.py [--rel 0.1] [--inputs total_movement strip_ratio ...] [--outputs lom_ore ...]
+"""
+
+import argparse
+import contextlib
+
+import numpy as np
+
+from lom_schedule import DERIVED, FULL_INPUTS, MINING_INPUTS, PLANTS
+from resample import period_end, resample_array, total_weights
+
+CONTEXT = ("years", "mining", "lom_method")
+INPUTS = CONTEXT + MINING_INPUTS + FULL_INPUTS
+_MISSING = object()
+
+
+def _rounded(fn):
+    return lambda *columns: np.round(fn(*columns), 1)
+
+
+def _peak(values, years):
+    """(value, year) of the maximum over the last axis; earliest year wins ties."""
+    i = np.argmax(values, axis=-1)
+    value, year = np.take_along_axis(values, i[..., None], -1)[..., 0], years[i]
+    return (float(value), int(year)) if np.ndim(value) == 0 else (value, year)
+
+
+def _level_mean(values, years, method):
+    """Mean of a level series over every year of the LoM (sched.resample().mean())."""
+    method = "linear" if method == "mass" else method
+    starts = np.arange(years[0], period_end(years))
+    return resample_array(values, years, starts, 1.0, method).mean(axis=-1)
+
+
+def _scalar(value):
+    return float(value) if np.ndim(value) == 0 else value
+
+
+# ==============================================================================
+# NODES
+# ==============================================================================
+# name -> (input nodes, function of those inputs). Report columns are rounded
+# as in the workbook (lom_schedule.derive_columns).
+
+NODES = {name: (inputs, _rounded(fn)) for name, (inputs, fn) in DERIVED.items()}
+
+NODES.update({
+    "w_mining": (("years", "lom_method", "mining"), total_weights),
+    "w_flow": (("years", "lom_method"), total_weights),
+})
+for _name in ("ore", "waste", "total_movement"):
+    NODES[f"lom_{_name}"] = ((_name, "w_mining"), lambda v, w: _scalar(v @ w))
+for _name in ("proc_total", "conc_total") + tuple(f"{k}_{p}" for k in ("proc", "conc") for p in PLANTS):
+    NODES[f"lom_{_name}"] = ((_name, "w_flow"), lambda v, w: _scalar(v @ w))
+
+NODES.update({
+    "lom_strip_ratio": (("lom_waste", "lom_ore"), lambda waste, ore: waste / ore),
+    "lom_grade": (("li2o_grade", "years", "lom_method"), lambda g, y, m: _scalar(_level_mean(g, y, m))),
+    "lom_recovery": (("lom_conc_total", "lom_proc_total"), lambda conc, proc: np.round(conc / proc * 100, 1)),
+    "peak_total_movement": (("total_movement", "years"), _peak),
+    "peak_strip_ratio": (("strip_ratio", "years"), _peak),
+    "peak_stockpile": (("stockpile", "years"), _peak),
+})
+
+_LOM = "interpolation between even-year snapshots"
+
+
+def _span(years, mask=None):
+    """"first-last" calendar years covered by the snapshots in `mask` (default all)."""
+    years = years if mask is None else years[mask]
+    return f"{int(years[0])}-{int(period_end(years)) - 1}"
+
+
+def _range(values, fmt="g"):
+    return f"{min(values):{fmt}}-{max(values):{fmt}}"
+
+
+def _duration(years, mining):
+    first, last = int(years[mining][0]), int(period_end(years[mining])) - 1
+    return (f"Mining: {first}-{last} ({last - first + 1} years). Processing continues to "
+            f"~{int(period_end(years)) - 1} to exhaust stockpiles.")
+
+
+def _peak_year(tm, sr):
+    strip = f"with highest strip ratio of {sr[0]}" if sr[1] == tm[1] else \
+        f"while strip ratio peaks at {sr[0]} in {sr[1]}"
+    return f"{tm[1]} - Total movement ~{tm[0]} Mt {strip}. This is a massive waste stripping campaign."
+
+
+def _stockpile_strategy(stockpile, years):
+    i = int(np.argmax(stockpile))
+    text = f"Build-up phase {int(years[0])}-{int(years[i])} (peaks {stockpile[i]} Mt). Drawn down through mid-LoM."
+    # later local peaks, the highest of which is the second peak
+    later = [j for j in range(i + 1, len(years) - 1) if stockpile[j - 1] < stockpile[j] >= stockpile[j + 1]]
+    if later:
+        j = max(later, key=lambda j: stockpile[j])
+        text += f" Second smaller peak of {stockpile[j]} Mt in {int(years[j])}."
+    return text + f" Exhausted by {int(period_end(years)) - 1}."
+
+
+def _processing_capacity(proc_total, mining):
+    steady = np.round(proc_total[mining], 1)
+    return (f"~{_range(steady)} Mt/year across {len(PLANTS)} plants ({', '.join(p.upper() for p in PLANTS)}) "
+            "during steady state operations")
+
+
+def _grade(g, grade, years, mining):
+    tail = ", ".join(f"{v}% in {int(y)}" for v, y in zip(grade[~mining].tolist(), years[~mining]))
+    if not tail:
+        return f"{round(g, 2)}%"
+    trend = "Grades decline significantly in" if (grade[~mining] < g).all() else "Grades in"
+    return f"{round(g, 2)}% - {trend} tail years ({tail})"
+
+
+def _wind_down(sr, strip_ratio, years, mining):
+    last = int(np.flatnonzero(mining)[-1])
+    return (f"Strip ratio drops from {sr[0]} ({sr[1]} peak) to {strip_ratio[last]} ({int(years[last])}), "
+            "transition to lower waste. Less material moved but higher ore proportion.")
+
+
+def _anomaly(tm, ore, strip_ratio, years):
+    i = int(np.flatnonzero(years == tm[1])[0])
+    return f"{tm[1]} Anomaly", (
+        f"Highest total movement (~{tm[0]:g} Mt) but only ~{ore[i]:.1f} Mt ore - massive waste stripping campaign "
+        f"with strip ratio {strip_ratio[i]}x. This is the most capital-intensive mining year.")
+
+
+def _post_mining(grade, conc_total, years, mining):
+    if mining.all():
+        return "None: mining continues to the end of the schedule."
+    tail = ~mining
+    return (f"{_span(years, tail)}: Processing from stockpiles only. Grade drops significantly "
+            f"({_range(grade[tail].tolist())}% Li2O). Concentrate output collapses to "
+            f"{_range(conc_total[tail].tolist())} Mt.")
+
+
+def _dominance(mining, *columns):
+    n = len(PLANTS)
+    lom_proc, lom_conc, proc = columns[:n], columns[n:2 * n], columns[2 * n:]
+    i, j = int(np.argmax(lom_proc)), int(np.argmax(lom_conc))
+    conc = "It contributes" if i == j else f"{PLANTS[j].upper()} contributes"
+    return f"{PLANTS[i].upper()} Dominance", (
+        f"{PLANTS[i].upper()} is the largest processing plant, handling ~{_range(proc[i][mining].tolist(), '.1f')} "
+        f"Mt/year. {conc} the most concentrate output across the LoM.")
+
+
+def _ramp_up(proc, years):
+    i = int(np.argmax(proc))
+    if i == 0:
+        return f"CGP3 runs at {proc[0]} Mt/year from {int(years[0])}."
+    return (f"CGP3 starts small ({proc[0]} Mt in {int(years[0])}) and ramps to {proc[i]} Mt by {int(years[i])}, "
+            "suggesting a newer plant coming online.")
+
+
+def _plateau(conc_total, years, mining):
+    # mining years after the first (ramp-up) snapshot
+    steady = np.flatnonzero(mining)[1:]
+    if not len(steady):
+        return "No steady-state mining years after ramp-up."
+    values = conc_total[steady].tolist()
+    span = f"{int(years[steady[0]])}-{int(years[steady[-1]])}"
+    if max(values) - min(values) <= 0.25 * max(values):
+        return (f"Concentrate production is remarkably stable at {_range(values, '.1f')} Mt/year from {span}, "
+                "providing consistent spodumene supply.")
+    return f"Concentrate production ranges {_range(values, '.1f')} Mt/year over {span}."
+
+
+def _grade_risk(grade, years, mining):
+    mined = np.flatnonzero(mining)
+    i = int(mined[np.argmax(grade[mined])])
+    after = mined[mined > i]
+    text = f"Li2O grade peaks at {grade[i]}% ({int(years[i])})."
+    if len(after):
+        low = grade[after].min()
+        at = years[after][grade[after] == low]
+        text = (f"Li2O grade trends downward from {grade[i]}% peak ({int(years[i])}) toward ~{low}% by "
+                f"{int(at[0])}" + (f"-{int(at[-1])}." if len(at) > 1 else "."))
+    if (~mining).any() and grade[~mining].mean() < grade[mined].min():
+        text += " Post-mining grades drop sharply."
+    return text + " Lower grades mean higher processing costs per tonne of concentrate."
+
+
+_PLANT_INPUTS = tuple(f"lom_proc_{p}" for p in PLANTS) + tuple(f"lom_conc_{p}" for p in PLANTS) \
+    + tuple(f"proc_{p}" for p in PLANTS)
+
+# Key Insights, in sheet order: (node label, input nodes, text function). A
+# function returns (label, text) where the sheet label itself depends on the
+# schedule, e.g. the year of the peak.
+INSIGHTS = [
+    ("LoM Duration", ("years", "mining"), _duration),
+    ("Peak Mining Year", ("peak_total_movement", "peak_strip_ratio"), _peak_year),
+    ("Total Ore Mined (LoM)", ("lom_ore", "lom_method", "years", "mining"),
+     lambda ore, m, y, mining: f"{round(ore, 1)} Mt over {_span(y, mining)} ({m} {_LOM})"),
+    ("Total Waste Mined (LoM)", ("lom_waste", "lom_method", "years", "mining"),
+     lambda waste, m, y, mining: f"{round(waste, 1)} Mt over {_span(y, mining)} ({m} {_LOM})"),
+    ("Average Strip Ratio", ("lom_strip_ratio", "peak_strip_ratio"),
+     lambda sr, peak: f"{round(sr, 2)} (waste:ore) - Very high waste burden, especially in {peak[1]}"),
+    ("Peak Stockpile", ("peak_stockpile",), lambda peak: f"{peak[0]} Mt in {peak[1]}"),
+    ("Stockpile Strategy", ("stockpile", "years"), _stockpile_strategy),
+    ("Processing Capacity", ("proc_total", "mining"), _processing_capacity),
+    ("Average Li2O Grade", ("lom_grade", "li2o_grade", "years", "mining"), _grade),
+    ("Total Concentrate (LoM)", ("lom_conc_total", "lom_method", "years"),
+     lambda conc, m, y: f"{round(conc, 1)} Mt over {_span(y)} ({m} {_LOM})"),
+    ("Concentrate Recovery Proxy", ("lom_recovery",),
+     lambda r: f"~{r}% (concentrate / feed) - relatively stable through mine life"),
+    ("Mining Wind-Down", ("peak_strip_ratio", "strip_ratio", "years", "mining"), _wind_down),
+    ("Peak Movement Anomaly", ("peak_total_movement", "ore", "strip_ratio", "years"), _anomaly),
+    ("Post-Mining Phase", ("li2o_grade", "conc_total", "years", "mining"), _post_mining),
+    ("Plant Dominance", ("mining",) + _PLANT_INPUTS, _dominance),
+    ("CGP3 Ramp-Up", ("proc_cgp3", "years"), _ramp_up),
+    ("Production Plateau", ("conc_total", "years", "mining"), _plateau),
+    ("Grade Risk", ("li2o_grade", "years", "mining"), _grade_risk),
+]
+NODES.update({f"insight:{label}": (inputs, fn) for label, inputs, fn in INSIGHTS})
+
+# Tornado defaults: chart-read and annotated series, against the headline LoM metrics
+TORNADO_INPUTS = ("total_movement", "strip_ratio", "stockpile", "li2o_grade", "conc_total") + tuple(
+    f"proc_{p}" for p in PLANTS)
+TORNADO_OUTPUTS = ("lom_ore", "lom_waste", "lom_strip_ratio", "lom_proc_total", "lom_conc_total",
+                   "lom_recovery", "lom_grade")
+
+
+# ==============================================================================
+# GRAPH
+# ==============================================================================
+
+class MetricGraph:
+    """Memoised evaluation of NODES over one set of inputs."""
+
+    def __init__(self, inputs, nodes=NODES):
+        missing = set(INPUTS) - set(inputs)
+        if missing:
+            raise ValueError(f"missing inputs: {', '.join(sorted(missing))}")
+        self.nodes = nodes
+        self._values = dict(inputs)
+        self.evaluations = 0                # node computations, for sweep accounting
+        self._dependents = {}
+        for name, (deps, _) in nodes.items():
+            for dep in deps:
+                self._dependents.setdefault(dep, []).append(name)
+        self._downstream = {}
+
+    @classmethod
+    def from_schedule(cls, sched):
+        inputs = {"years": sched.years, "mining": sched.mining, "lom_method": sched.lom_method}
+        inputs.update({name: sched[name] for name in MINING_INPUTS + FULL_INPUTS})
+        return cls(inputs)
+
+    def __getitem__(self, name):
+        value = self._values.get(name, _MISSING)
+        if value is _MISSING:
+            deps, fn = self.nodes[name]
+            value = fn(*(self[d] for d in deps))
+            self._values[name] = value
+            self.evaluations += 1
+        return value
+
+    def downstream(self, name):
+        """Every node that depends on `name`, directly or not."""
+        if name not in self._downstream:
+            seen, stack = [], list(self._dependents.get(name, ()))
+            while stack:
+                node = stack.pop()
+                if node not in seen:
+                    seen.append(node)
+                    stack.extend(self._dependents.get(node, ()))
+            self._downstream[name] = tuple(seen)
+        return self._downstream[name]
+
+    def set(self, name, value):
+        """Replace input `name` and drop the cached nodes downstream of it."""
+        if name in self.nodes:
+            raise KeyError(f"{name} is computed, not an input")
+        self._values[name] = value
+        for node in self.downstream(name):
+            self._values.pop(node, None)
+
+    @contextlib.contextmanager
+    def perturb(self, name, value):
+        """set(name, value) for the duration of the block, then put back the
+        original input and every cached value it invalidated."""
+        saved = {n: self._values.get(n, _MISSING) for n in (name,) + self.downstream(name)}
+        self.set(name, value)
+        try:
+            yield self
+        finally:
+            for n, v in saved.items():
+                if v is _MISSING:
+                    self._values.pop(n, None)
+                else:
+                    self._values[n] = v
+
+    def insights(self):
+        """[(label, text)] for the Key Insights sheet."""
+        out = []
+        for label, _, _ in INSIGHTS:
+            value = self[f"insight:{label}"]
+            out.append(value if isinstance(value, tuple) else (label, value))
+        return out
+
+
+# ==============================================================================
+# SENSITIVITY
+# ==============================================================================
+
+def sweep(graph, name, values, outputs=TORNADO_OUTPUTS):
+    """{output: array} with input `name` moved through `values`, shape (n, ...).
+
+    Evaluated as one batch: the input becomes an (n, n_years) array and only
+    its downstream nodes are recomputed.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    moved = graph.downstream(name)
+    with graph.perturb(name, values):
+        # outputs that do not depend on `name` keep their one base value
+        return {out: np.asarray(graph[out]) if out in moved
+                else np.broadcast_to(graph[out], (len(values),) + np.shape(graph[out]))
+                for out in outputs}
+
+
+def tornado(graph, inputs=TORNADO_INPUTS, outputs=TORNADO_OUTPUTS, rel=0.10):
+    """[(input, output, low, base, high)] with each input series scaled by
+    1 -/+ `rel`, one input at a time, sorted by swing within each output."""
+    base = {out: graph[out] for out in outputs}
+    rows = []
+    for name in inputs:
+        series = np.asarray(graph[name], dtype=np.float64)
+        moved = sweep(graph, name, np.stack([series * (1 - rel), series * (1 + rel)]), outputs)
+        rows += [(name, out, float(moved[out][0]), float(base[out]), float(moved[out][1])) for out in outputs]
+    return sorted(rows, key=lambda r: (outputs.index(r[1]), -abs(r[4] - r[2])))
+
+
+if __name__ == "__main__":
+    import time
+
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="One-at-a-time tornado sensitivity of the LoM metrics.")
+    parser.add_argument("--rel", type=float, default=0.10, help="Relative move of each input (default 0.10)")
+    parser.add_argument("--inputs", nargs="+", default=list(TORNADO_INPUTS))
+    parser.add_argument("--outputs", nargs="+", default=list(TORNADO_OUTPUTS))
+    parser.add_argument("--lom-method", choices=("step", "linear", "mass"), default="linear")
+    args = parser.parse_args()
+
+    schedule = load_schedule()
+    schedule.lom_method = args.lom_method
+    graph = MetricGraph.from_schedule(schedule)
+    try:
+        start = time.perf_counter()
+        rows = tornado(graph, tuple(args.inputs), tuple(args.outputs), args.rel)
+    except KeyError as e:
+        parser.error(f"unknown input or metric {e}")
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Metric':<18}{'Input':<16}{'Low':>10}{'Base':>10}{'High':>10}{'Swing':>10}")
+    for name, out, low, base, high in rows:
+        if high != low:
+            print(f"{out:<18}{name:<16}{low:>10.2f}{base:>10.2f}{high:>10.2f}{high - low:>10.2f}")
+    print(f"\n{len(args.inputs)} inputs x {len(args.outputs)} metrics at +/-{args.rel:.0%} in "
+          f"{elapsed * 1000:.1f} ms; {graph.evaluations} node evaluations")
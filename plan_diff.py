@@ -0,0 +1,257 @@
+"""
+Plan Version Diff
+Compares two or more generated LoM workbooks (CY24 ORE, CY25 ORE, ...) and
+writes a diff workbook of what changed, by metric, plant and year.
+
+Each workbook is read in openpyxl read-only mode. Only the year tables of
+DIFF_SHEETS are parsed, row by row: from the "Year" header down to the
+first row without a year. A Notes column or the rest of the workbook is never
+loaded. Workbooks are read on a process pool. Every version is aligned onto
+the union of years and metrics as one (versions, metrics, years) array, so
+the deltas between every pair are a few array operations. A metric or year
+a version does not have is NaN, and shows as blank.
+
+Each version is compared with the one before it (or, with --against first,
+with the first). A per-year delta is material when it moves by at least
+THRESHOLD percent and by more than TOLERANCE, which is above the rounding
+of the published values. A value that appears or disappears between versions
+is always material. Material cells are highlighted.
+
+Sheets:
+  Diff Summary   per comparison and metric: mean over the years both versions
+                 have, delta, largest yearly change and the years that changed
+  <B> vs <A>     one sheet per comparison: the yearly deltas of every metric
+
+Usage: python plan_diff.py OLD.xlsx NEW.xlsx [MORE.xlsx ...] [-o Plan_Diff.xlsx] [--labels CY24 CY25 ...]
+                           [--against previous|first] [--threshold 5] [--workers N]
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from generate_mine_plan_excel import (
+    BLANK, DATA, FLAG, HEADER, METRIC, NOTE, TITLE,
+    auto_width, register_named_styles, write_sheet,
+)
+
+DIFF_SHEETS = ("Mining", "Stockpiles", "Processing", "Concentrate")
+THRESHOLD = 5.0                 # % change that is material
+TOLERANCE = 0.05                # absolute change below which nothing is material
+
+
+# ==============================================================================
+# READ
+# ==============================================================================
+
+def read_tables(path, sheets=DIFF_SHEETS):
+    """{"Sheet: Header": {year: value}} for the numeric year columns of a generated workbook."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    metrics = {}
+    try:
+        for title in sheets:
+            if title not in wb.sheetnames:
+                continue
+            header = None
+            for row in wb[title].iter_rows(values_only=True):
+                if header is None:
+                    header = row if row and row[0] == "Year" else None
+                    continue
+                if not row or not isinstance(row[0], int):
+                    break
+                for name, value in zip(header[1:], row[1:]):
+                    if name and isinstance(value, (int, float)):
+                        metrics.setdefault(f"{title}: {name}", {})[row[0]] = float(value)
+    finally:
+        wb.close()
+    return metrics
+
+
+def read_versions(paths, workers=None):
+    """[read_tables(path)] for every path, read `workers` at a time."""
+    if workers == 1 or len(paths) <= 1:
+        return [read_tables(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_tables, paths))
+
+
+def align(tables):
+    """(metric names, years, (versions, metrics, years) array) over the union of every version."""
+    names = list(dict.fromkeys(name for table in tables for name in table))
+    years = np.array(sorted({year for table in tables for values in table.values() for year in values}),
+                     dtype=np.int64)
+    cube = np.full((len(tables), len(names), len(years)), np.nan)
+    for v, table in enumerate(tables):
+        for m, name in enumerate(names):
+            values = table.get(name)
+            if values:
+                cube[v, m, np.searchsorted(years, list(values))] = list(values.values())
+    return names, years, cube
+
+
+# ==============================================================================
+# DIFF
+# ==============================================================================
+
+def diff(cube, against="previous", threshold=THRESHOLD, tolerance=TOLERANCE):
+    """Deltas of each version against the previous (or first) one.
+
+    Returns {ref, new (version indices), old, delta, pct, material}, each
+    (comparisons, metrics, years) except the indices. pct is NaN where the
+    reference is zero or missing.
+    """
+    new = np.arange(1, len(cube))
+    ref = new - 1 if against == "previous" else np.zeros_like(new)
+    old, cur = cube[ref], cube[new]
+    delta = cur - old
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(old != 0, delta / np.abs(old) * 100, np.nan)
+    moved = (np.abs(delta) > tolerance) & ~(np.abs(pct) < threshold)   # NaN pct: reference is 0
+    material = moved | (np.isnan(old) != np.isnan(cur))
+    return {"ref": ref, "new": new, "old": old, "delta": delta, "pct": pct, "material": material}
+
+
+def summarize(result, years):
+    """Per comparison and metric: means over shared years, their change, largest |delta| and changed years."""
+    old, delta, material = result["old"], result["delta"], result["material"]
+    both = ~np.isnan(delta)
+    count = both.sum(axis=2)
+    with np.errstate(invalid="ignore"):
+        old_mean = np.where(both, old, 0.0).sum(axis=2) / count
+        new_mean = old_mean + np.where(both, delta, 0.0).sum(axis=2) / count
+        mean_pct = np.where(old_mean != 0, (new_mean - old_mean) / np.abs(old_mean) * 100, np.nan)
+    size = np.where(both, np.abs(delta), -1.0)
+    peak = size.argmax(axis=2)
+    return {
+        "old_mean": old_mean,
+        "new_mean": new_mean,
+        "mean_pct": mean_pct,
+        "max_delta": np.take_along_axis(np.where(both, delta, np.nan), peak[..., None], axis=2)[..., 0],
+        "max_year": np.where(size.max(axis=2) > 0, years[peak], 0),      # 0: nothing moved
+        "changed": material.sum(axis=2),
+    }
+
+
+# ==============================================================================
+# DIFF WORKBOOK
+# ==============================================================================
+
+def _cell(value, decimals=2):
+    return "" if np.isnan(value) else round(float(value), decimals)
+
+
+def summary_rows(labels, names, result, summary, threshold):
+    width = 10
+    yield ["PLAN VERSION DIFF - Change in LoM Metrics Between Versions"], TITLE, width
+    yield [f"Versions: {', '.join(labels)}. Means are over the years both versions report. "
+           f"Highlighted: changed by at least {threshold:g}% in the mean or in some year."], NOTE, width
+    yield BLANK
+    yield ["Comparison", "Metric", "Old Mean", "New Mean", "Change", "Change (%)", "Largest Yearly Change",
+           "Year of Largest", "Years Changed", "Years Compared"], HEADER, 0
+    both = ~np.isnan(result["delta"])
+    for c, (r, n) in enumerate(zip(result["ref"], result["new"])):
+        for m, name in enumerate(names):
+            pct = summary["mean_pct"][c, m]
+            flag = FLAG if summary["changed"][c, m] else DATA
+            yield [f"{labels[n]} vs {labels[r]}", name, _cell(summary["old_mean"][c, m]),
+                   _cell(summary["new_mean"][c, m]),
+                   _cell(summary["new_mean"][c, m] - summary["old_mean"][c, m]),
+                   "N/A" if np.isnan(pct) else round(float(pct), 1), _cell(summary["max_delta"][c, m]),
+                   int(summary["max_year"][c, m]) or "", int(summary["changed"][c, m]),
+                   int(both[c, m].sum())], \
+                [METRIC, METRIC] + [DATA] * 3 + [FLAG if abs(pct) >= threshold else DATA, flag, DATA, flag, DATA], 0
+
+
+def delta_rows(label, names, years, delta, pct, material):
+    yield [f"PLAN VERSION DIFF - {label}: Change by Year"], TITLE, 1 + len(names)
+    yield ["New minus old. Highlighted: material change, or a value only one version has "
+           "(blank change)."], NOTE, 1 + len(names)
+    yield BLANK
+    yield ["Year"] + names, HEADER, 0
+    for y, year in enumerate(years.tolist()):
+        yield [year] + [_cell(d) for d in delta[:, y]], [METRIC] + [FLAG if f else DATA for f in material[:, y]], 0
+    yield BLANK
+    yield ["Change (%)"] + names, HEADER, 0
+    for y, year in enumerate(years.tolist()):
+        yield [year] + [_cell(p, 1) for p in pct[:, y]], [METRIC] + [FLAG if f else DATA for f in material[:, y]], 0
+
+
+def sheet_title(label, used):
+    """Excel-safe sheet title of at most 31 characters, unique within `used`."""
+    title = re.sub(r"[\[\]:*?/\\]", "-", label)[:31]
+    base, n = title, 2
+    while title in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title)
+    return title
+
+
+def build_diff(path, labels, names, years, result, threshold=THRESHOLD):
+    """Write the diff workbook to `path` and return the titles written.
+
+    The sheets come from the diff alone, so this is a plain write: no
+    schedule is loaded and no manifest is kept.
+    """
+    from openpyxl import Workbook
+
+    summary = summarize(result, years)
+    used = {"Diff Summary"}
+    sheets = [("Diff Summary", summary_rows(labels, names, result, summary, threshold),
+               auto_width(10) | {"A": 24, "B": 36})]
+    for c, (r, n) in enumerate(zip(result["ref"], result["new"])):
+        label = f"{labels[n]} vs {labels[r]}"
+        sheets.append((sheet_title(label, used),
+                       delta_rows(label, names, years, result["delta"][c], result["pct"][c], result["material"][c]),
+                       auto_width(1 + len(names))))
+    wb = Workbook()
+    register_named_styles(wb)
+    wb.remove(wb.active)
+    for title, rows, widths in sheets:
+        write_sheet(wb.create_sheet(title), rows, widths)
+    wb.save(path)
+    return [title for title, *_ in sheets]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two or more generated LoM workbooks by metric, plant and year.")
+    parser.add_argument("workbooks", nargs="+", metavar="PLAN.xlsx", help="Oldest first")
+    parser.add_argument("-o", "--output", default="Plan_Diff.xlsx")
+    parser.add_argument("--labels", nargs="+", help="Version labels (default: file names)")
+    parser.add_argument("--against", choices=("previous", "first"), default="previous",
+                        help="Compare each version with the one before it, or with the first")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Material change, %% (default 5)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Smallest absolute change that can be material (default 0.05)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    args = parser.parse_args(argv)
+    if len(args.workbooks) < 2:
+        parser.error("need at least two workbooks")
+    labels = args.labels or [os.path.splitext(os.path.basename(p))[0] for p in args.workbooks]
+    if len(labels) != len(args.workbooks):
+        parser.error(f"{len(labels)} labels for {len(args.workbooks)} workbooks")
+
+    start = time.perf_counter()
+    names, years, cube = align(read_versions(args.workbooks, args.workers))
+    if not names:
+        parser.error("no year tables found; are these generated LoM workbooks?")
+    result = diff(cube, args.against, args.threshold, args.tolerance)
+    build_diff(args.output, labels, names, years, result, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    for c, (r, n) in enumerate(zip(result["ref"], result["new"])):
+        changed = result["material"][c].any(axis=1)
+        print(f"{labels[n]} vs {labels[r]}: {int(changed.sum())} of {len(names)} metrics changed materially")
+    print(f"\n{len(args.workbooks)} versions, {len(names)} metrics x {len(years)} years in {elapsed:.2f}s; "
+          f"diff saved to: {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Opt-in stage profiling for the workbook pipeline and GraphDataExtractor.
+
+Code marks its stages with `with stage("name"):`, wraps lazy row generators
+with `iterate("rows", rows)` and reports work done with `count(cells=n)`.
+While no profiler is enabled these are constant-time no-ops: stage() returns
+one shared null context, iterate() returns its argument and count() returns
+immediately.
+
+An enabled Profiler keys every stage by its full stack path and records
+calls, inclusive and self wall time, counters (added to every open stage,
+so they are inclusive too) and, with memory=True, the tracemalloc delta.
+
+Reports:
+  report()       JSON-ready dict, one entry per stack path
+  save_folded()  folded stacks ("a;b;c <self microseconds>") for
+                 flamegraph.pl, speedscope or inferno
+
+Usage: python generate_mine_plan_excel.py --profile REPORT.json [--flame STACKS.txt] [--profile-memory]
+"""
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+_NULL = contextlib.nullcontext()
+_profiler = None
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stats = {}             # path tuple -> {"calls", "seconds", "child_seconds", counters...}
+        self._stack = []            # [(path, start, start_memory, child_seconds)]
+        self._start = time.perf_counter()
+        self._started_tracing = False
+
+    # ── recording ──
+
+    def push(self, name):
+        parent = self._stack[-1][0] if self._stack else ()
+        mem = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        self._stack.append([parent + (name,), time.perf_counter(), mem, 0.0])
+
+    def pop(self):
+        path, start, mem, child = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        entry = self.stats.setdefault(path, {"calls": 0, "seconds": 0.0, "child_seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += elapsed
+        entry["child_seconds"] += child
+        if self.memory:
+            delta = tracemalloc.get_traced_memory()[0] - mem
+            entry["memory_delta"] = entry.get("memory_delta", 0) + delta
+        if self._stack:
+            self._stack[-1][3] += elapsed
+
+    def count(self, counters):
+        for path, *_ in self._stack:
+            entry = self.stats.setdefault(path, {"calls": 0, "seconds": 0.0, "child_seconds": 0.0})
+            for key, n in counters.items():
+                entry[key] = entry.get(key, 0) + n
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.push(name)
+        try:
+            yield
+        finally:
+            self.pop()
+
+    def iterate(self, name, iterable):
+        """Yield from `iterable`, timing each next() as a call of stage `name`
+        (so calls is one more than the items yielded)."""
+        it = iter(iterable)
+        while True:
+            self.push(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.pop()
+            yield item
+
+    # ── reporting ──
+
+    def report(self):
+        stages = []
+        for path, entry in self.stats.items():
+            row = {
+                "path": ";".join(path),
+                "name": path[-1],
+                "depth": len(path) - 1,
+                "calls": entry["calls"],
+                "seconds": round(entry["seconds"], 6),
+                "self_seconds": round(entry["seconds"] - entry["child_seconds"], 6),
+            }
+            if "memory_delta" in entry:
+                row["memory_delta_kb"] = round(entry["memory_delta"] / 1024, 1)
+            row.update({k: v for k, v in entry.items()
+                        if k not in ("calls", "seconds", "child_seconds", "memory_delta")})
+            stages.append(row)
+        return {
+            "wall_seconds": round(time.perf_counter() - self._start, 6),
+            "memory": self.memory,
+            "stages": stages,
+        }
+
+    def save_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def save_folded(self, path):
+        """Folded stacks weighted by self time in microseconds."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, entry in self.stats.items():
+                us = int((entry["seconds"] - entry["child_seconds"]) * 1e6)
+                if us > 0:
+                    f.write(f"{';'.join(stack)} {us}\n")
+
+
+# ==============================================================================
+# MODULE SWITCH
+# ==============================================================================
+
+def enable(memory=False):
+    """Start a new profiler and return it."""
+    global _profiler
+    disable()
+    _profiler = Profiler(memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _profiler._started_tracing = True
+    return _profiler
+
+
+def disable():
+    """Stop profiling; returns the profiler that was running, if any."""
+    global _profiler
+    prof, _profiler = _profiler, None
+    if prof is not None and prof._started_tracing:
+        tracemalloc.stop()
+    return prof
+
+
+def active():
+    return _profiler
+
+
+def stage(name):
+    return _NULL if _profiler is None else _profiler.stage(name)
+
+
+def iterate(name, iterable):
+    return iterable if _profiler is None else _profiler.iterate(name, iterable)
+
+
+def count(**counters):
+    if _profiler is not None:
+        _profiler.count(counters)
@@ -1,9 +1,211 @@
-import fitz
-doc = fitz.open('IGO_Announcement.pdf')
-print(f'Pages: {len(doc)}')
-# Read pages 1-30 (key data, not the JORC tables at the end)
-for i in range(min(35, len(doc))):
-    page = doc[i]
-    text = page.get_text()
-    print(f'--- PAGE {i+1} ---')
-    print(text)
+"""
+PDF Text Extraction
+Extracts page text from one or more ASX release PDFs into UTF-8 text files.
+
+Pages are split into chunks and extracted on a process pool. Every page is
+written to a cache keyed by the SHA-256 of the PDF's bytes as soon as it is
+extracted, so a document that has not changed is never parsed twice; the
+per-document output file is then streamed from the cache in page order. The
+page count is cached too, so a fully cached document is never opened.
+cache_pages(..., tables=True) also caches each page's tables as JSON, for
+the search index (doc_index.py).
+
+Usage: python read_pdf.py DOC.pdf[:PAGES] [DOC.pdf[:PAGES] ...] [-o OUTDIR] [--workers N]
+       PAGES is 1-based, e.g. "1-35" or "1-5,26,28"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pdf_cache")
+CHUNK_PAGES = 8
+CAPTION = re.compile(r"\s*(Table|Figure)\s+\d+", re.IGNORECASE)
+
+
+def parse_pages(spec, page_count):
+    """Turn "1-5,26" into sorted 0-based page numbers; None/"" means all pages."""
+    if not spec:
+        return list(range(page_count))
+    pages = set()
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        try:
+            first = int(start) if start else 1
+            last = int(end) if end else (page_count if _ else first)
+        except ValueError:
+            raise ValueError(f"invalid page spec {spec!r}: expected pages like 1-5,26") from None
+        if end and first > last:
+            raise ValueError(f"invalid page spec {spec!r}: range {part} runs backwards")
+        pages.update(range(max(first, 1) - 1, min(last, page_count)))
+    return sorted(pages)
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_path(cache_dir, doc_hash, page_no):
+    return os.path.join(cache_dir, doc_hash, f"page-{page_no + 1:04d}.txt")
+
+
+def tables_path(cache_dir, doc_hash, page_no):
+    return os.path.join(cache_dir, doc_hash, f"tables-{page_no + 1:04d}.json")
+
+
+def _write_text(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def page_tables(page):
+    """[{"caption", "bbox", "rows"}] for the tables pymupdf finds on a page.
+
+    The caption is the nearest "Table N" / "Figure N" line above the table,
+    or "" when there is none.
+    """
+    captions = [(b[3], b[4].strip().replace("\n", " ")) for b in page.get_text("blocks")
+                if CAPTION.match(b[4])]
+    tables = []
+    for tab in page.find_tables().tables:
+        above = [(bottom, text) for bottom, text in captions if bottom <= tab.bbox[1] + 2]
+        tables.append({"caption": max(above)[1] if above else "", "bbox": list(tab.bbox),
+                       "rows": [[cell or "" for cell in row] for row in tab.extract()]})
+    return tables
+
+
+def _extract_chunk(args):
+    """Extract a run of pages (text, and tables when asked) from one document into the cache."""
+    import pymupdf
+
+    pdf_path, doc_hash, pages, cache_dir, tables = args
+    with pymupdf.open(pdf_path) as doc:
+        for page_no in pages:
+            _write_text(page_path(cache_dir, doc_hash, page_no), doc[page_no].get_text())
+            if tables:
+                _write_text(tables_path(cache_dir, doc_hash, page_no), json.dumps(page_tables(doc[page_no])))
+    return len(pages)
+
+
+def page_count(pdf_path, cache_dir=None, doc_hash=None):
+    """Number of pages; with a cache directory and hash, read from (or saved to) the cache."""
+    path = os.path.join(cache_dir, doc_hash, "pages.txt") if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return int(f.read())
+    import pymupdf
+
+    with pymupdf.open(pdf_path) as doc:
+        n = len(doc)
+    if path:
+        _write_text(path, str(n))
+    return n
+
+
+def cache_pages(requests, workers=None, cache_dir=CACHE_DIR, chunk_pages=CHUNK_PAGES, tables=False):
+    """Make sure every requested page is in the cache.
+
+    Returns a list of (pdf_path, doc_hash, 0-based pages, pages_extracted);
+    page text is then at page_path(cache_dir, doc_hash, page), and with
+    `tables` the page's tables are at tables_path(...) as JSON.
+    """
+    jobs = []
+    tasks = []
+    scheduled = {}
+    for pdf_path, spec in requests:
+        doc_hash = file_hash(pdf_path)
+        os.makedirs(os.path.join(cache_dir, doc_hash), exist_ok=True)
+        pages = parse_pages(spec, page_count(pdf_path, cache_dir, doc_hash))
+        seen = scheduled.setdefault(doc_hash, set())
+        missing = [p for p in pages
+                   if p not in seen and not (os.path.exists(page_path(cache_dir, doc_hash, p))
+                                             and (not tables or os.path.exists(tables_path(cache_dir, doc_hash, p))))]
+        seen.update(missing)
+        for i in range(0, len(missing), chunk_pages):
+            tasks.append((pdf_path, doc_hash, missing[i:i + chunk_pages], cache_dir, tables))
+        jobs.append((pdf_path, doc_hash, pages, len(missing)))
+
+    if tasks:
+        if workers == 1 or len(tasks) == 1:
+            for task in tasks:
+                _extract_chunk(task)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_extract_chunk, tasks))
+    return jobs
+
+
+def output_name(pdf_path, used):
+    """DOC.txt for DOC.pdf, or DOC-2.txt, DOC-3.txt, ... when that name is in `used`."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    name, n = f"{stem}.txt", 2
+    while name in used:
+        name, n = f"{stem}-{n}.txt", n + 1
+    used.add(name)
+    return name
+
+
+def extract(requests, out_dir=".", workers=None, cache_dir=CACHE_DIR, chunk_pages=CHUNK_PAGES):
+    """Extract every (pdf_path, page_spec) request.
+
+    Each request gets its own output file, named after the PDF; requests
+    whose PDFs share a name (from different directories, or the same PDF
+    with different pages) are numbered DOC-2.txt, DOC-3.txt, ...
+
+    Returns a list of (pdf_path, output_path, pages_extracted, pages_cached).
+    """
+    jobs = cache_pages(requests, workers, cache_dir, chunk_pages)
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    used = set()
+    for pdf_path, doc_hash, pages, extracted in jobs:
+        out_path = os.path.join(out_dir, output_name(pdf_path, used))
+        with open(out_path, "w", encoding="utf-8", newline="\n") as out:
+            for page_no in pages:
+                out.write(f"--- PAGE {page_no + 1} ---\n")
+                with open(page_path(cache_dir, doc_hash, page_no), encoding="utf-8") as f:
+                    out.write(f.read())
+                out.write("\n")
+        results.append((pdf_path, out_path, extracted, len(pages) - extracted))
+    return results
+
+
+def parse_request(arg):
+    """Split "DOC.pdf:1-35" into ("DOC.pdf", "1-35"); a bare path means all pages."""
+    path, sep, spec = arg.rpartition(":")
+    if sep and path and not os.path.exists(arg):
+        return path, spec
+    return arg, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract PDF page text to UTF-8 files.")
+    parser.add_argument("pdfs", nargs="+", metavar="DOC.pdf[:PAGES]")
+    parser.add_argument("-o", "--out-dir", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    requests = [parse_request(a) for a in args.pdfs]
+    for _, spec in requests:
+        try:
+            parse_pages(spec, 0)
+        except ValueError as e:
+            parser.error(str(e))
+    results = extract(requests, args.out_dir, args.workers, args.cache_dir)
+    for pdf_path, out_path, extracted, cached in results:
+        print(f"{pdf_path}: {extracted} pages extracted, {cached} from cache -> {out_path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Stockpile mass-balance reconciliation for the Figure 14 schedule.
+
+Over each snapshot period the annotated stockpile must change by ore mined
+minus ore processed:
+
+    stockpile[k+1] - stockpile[k] = integral over [year k, year k+1) of (ore - proc_total)
+
+The flows between snapshots follow the schedule's LoM interpolation method
+(see resample.py), so the check agrees with the LoM totals. Ore is total
+movement / (1 + strip ratio) over the mining years only.
+
+The back-solver finds the schedule closest to the chart readings that
+satisfies every annotated value exactly. Total movement and the plant bands
+of processing and concentrate are chart-read. Each is weighted by its
+reading error (uncertainty.READING_SIGMA), but nothing bounds how far it
+moves. Every result reports each series' largest move in sigmas. A move
+beyond PLAUSIBLE_SIGMA means the annotations cannot be met within reading
+error. A reading of 0 means the band is absent from the chart and stays at
+0. Strip ratios, stockpiles and concentrate totals are annotated and are
+held fixed. It minimises
+
+    sum ((x - reading) / sigma)^2   subject to   C x = d
+
+where C x = d stacks the period balances and sum(conc_p) = conc_total for
+every year. The solution is x = reading + S C' (C S C')^-1 (d - C reading),
+with S = diag(sigma^2). C depends on the strip ratios, so every scenario
+has its own system. Scenarios that share a year axis are stacked, and each
+shard of them is solved in one batched np.linalg.solve. Values solved below
+0 are pinned at 0 and the shard is solved again (a few active-set passes).
+A period that cannot balance once its series are pinned stays in the
+`after` residual.
+
+Usage: python reconcile.py [SCENARIOS_DIR|MANIFEST.json|STORE.cols] [--lom-method linear]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from lom_schedule import PLANTS, derive_columns
+from resample import period_end, resample_array
+from uncertainty import READING_SIGMA
+
+SHARD_SIZE = 2_000
+ACTIVE_SET_PASSES = 8
+PLAUSIBLE_SIGMA = 3.0           # a solved series moving further than this is flagged
+
+# chart-read series the solver may adjust, in the order of the solution vector
+SOLVED = ("total_movement",) + tuple(f"proc_{p}" for p in PLANTS) + tuple(f"conc_{p}" for p in PLANTS)
+
+
+# ==============================================================================
+# PERIOD BALANCE
+# ==============================================================================
+
+def interval_weights(years, method="linear", mask=None):
+    """(T, T) matrix B with (values @ B.T)[..., k] the integral of a flow over
+    snapshot period k, given its snapshots (..., T).
+
+    With `mask` only the masked snapshots carry the flow (mining-only series),
+    held until one step past the last of them. The interpolation is linear in
+    the snapshots for step and linear, so B is the annual resampling of the
+    identity, summed per period. Mass-conserving interpolation keeps each
+    snapshot's period total exactly but is not linear (the slope limiter
+    depends on the values), so it uses step weights.
+    """
+    years = np.asarray(years)
+    mask = np.ones(len(years), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    B = np.zeros((len(years), len(years)))
+    sub = years[mask]
+    if not len(sub):
+        return B
+    method = "step" if method == "mass" else method
+    starts = np.arange(years[0], period_end(years))
+    rates = resample_array(np.eye(len(sub)), sub, starts, 1.0, method, period_end(sub))
+    period = np.searchsorted(years, starts, side="right") - 1
+    np.add.at(B, (period, np.flatnonzero(mask)[:, None]), rates)
+    return B
+
+
+def balance_residuals(c, years, mining, method="linear"):
+    """Stockpile change minus (ore - processing) per snapshot period, (..., T-1) Mt.
+
+    `c` holds derived columns shaped (..., T); 0 means the period balances.
+    """
+    ore = c["ore"] @ interval_weights(years, method, mining).T
+    proc = c["proc_total"] @ interval_weights(years, method).T
+    return np.diff(c["stockpile"], axis=-1) - (ore - proc)[..., :-1]
+
+
+# ==============================================================================
+# BATCHED BACK-SOLVE
+# ==============================================================================
+
+def _solve_shard(c, Bm, Bf, sigma, passes):
+    n, T = c["stockpile"].shape
+    nv = len(SOLVED) * T
+    reading = np.concatenate([c[name] for name in SOLVED], axis=-1)
+    # a band read as 0 is absent from the chart (plant not running), not misread
+    var = np.concatenate([np.where(c[name] != 0, sigma.get(name, 0.0) ** 2, 0.0) for name in SOLVED], axis=-1)
+
+    # rows 0..T-2: period balances; rows T-1..2T-2: plant concentrate sums
+    C = np.zeros((n, 2 * T - 1, nv))
+    C[:, :T - 1, :T] = (Bm / (1 + c["strip_ratio"])[:, None, :])[:, :T - 1]
+    for i in range(len(PLANTS)):
+        C[:, :T - 1, (1 + i) * T:(2 + i) * T] = -Bf[:T - 1]
+        C[:, T - 1:, (1 + len(PLANTS) + i) * T:(2 + len(PLANTS) + i) * T] = np.eye(T)
+    d = np.concatenate([np.diff(c["stockpile"], axis=-1), c["conc_total"]], axis=-1)
+
+    for _ in range(passes):
+        CS = C * var[:, None, :]
+        M = CS @ C.transpose(0, 2, 1)
+        gap = d - np.einsum("nqv,nv->nq", C, reading)
+        # rows with no free variable left are not solved; they stay in the residual
+        free = np.abs(M).sum(axis=-1) > 0
+        M[~free] = np.eye(M.shape[-1])[np.nonzero(~free)[1]]
+        lam = np.linalg.solve(M, np.where(free, gap, 0.0)[..., None])[..., 0]
+        x = reading + np.einsum("nqv,nq->nv", CS, lam)
+        # active set: pin negative values at 0 and solve again
+        negative = x < -1e-9
+        if not negative.any():
+            break
+        reading = np.where(negative, 0.0, reading)
+        var = np.where(negative, 0.0, var)
+    return {name: x[:, i * T:(i + 1) * T] for i, name in enumerate(SOLVED)}
+
+
+def back_solve(c, years, mining, method="linear", sigma=READING_SIGMA, shard_size=SHARD_SIZE,
+               passes=ACTIVE_SET_PASSES):
+    """Reconciled copy of the input columns `c` (each (n, T) or (T,)).
+
+    The SOLVED series are replaced by their least-squares back-solve and
+    the derived columns are rebuilt from them. The other inputs come back
+    unchanged. A value solved below 0 is pinned at 0 and the shard is solved
+    again, for up to `passes` solves.
+    """
+    mining = np.asarray(mining, dtype=bool)
+    c = {name: np.atleast_2d(np.asarray(v, dtype=np.float64)) for name, v in c.items()}
+    n = max(v.shape[0] for v in c.values())
+    c = {name: np.broadcast_to(v, (n, v.shape[-1])) for name, v in c.items()}
+    Bm = interval_weights(years, method, mining)
+    Bf = interval_weights(years, method)
+
+    parts = [_solve_shard({k: v[i:i + shard_size] for k, v in c.items()}, Bm, Bf, sigma, passes)
+             for i in range(0, n, shard_size)]
+    out = dict(c)
+    for name in SOLVED:
+        out[name] = np.concatenate([p[name] for p in parts])
+    out["total_movement"] = out["total_movement"] * mining
+    return derive_columns(out, decimals=None)
+
+
+# ==============================================================================
+# SCHEDULES
+# ==============================================================================
+
+def reconcile(schedules, sigma=READING_SIGMA, shard_size=SHARD_SIZE):
+    """Reconcile [(name, LomSchedule)]; one batched solve per shared year axis.
+
+    Returns {name: result}. Each result holds:
+      residual    the per-period imbalance of the schedule as read (Mt)
+      solved      the reconciled columns
+      after       the per-period imbalance of the reconciled schedule (about 0)
+      solved_min  the smallest reconciled value of any SOLVED series
+      deviation   {series: largest |solved - read| / sigma}
+      implausible SOLVED series whose deviation exceeds PLAUSIBLE_SIGMA
+    """
+    groups = {}
+    for name, sched in schedules:
+        key = (sched.years.tobytes(), sched.mining.tobytes(), sched.lom_method)
+        groups.setdefault(key, []).append((name, sched))
+
+    results = {}
+    for members in groups.values():
+        first = members[0][1]
+        inputs = {name: np.stack([s[name] for _, s in members]) for name in first.columns}
+        c = derive_columns(dict(inputs), decimals=None)
+        before = balance_residuals(c, first.years, first.mining, first.lom_method)
+        solved = back_solve(inputs, first.years, first.mining, first.lom_method, sigma, shard_size)
+        after = balance_residuals(solved, first.years, first.mining, first.lom_method)
+        low = np.min([solved[name] for name in SOLVED], axis=(0, 2))
+        deviation = {name: np.abs(solved[name] - inputs[name]).max(axis=-1) / sigma[name] for name in SOLVED}
+        for i, (name, _) in enumerate(members):
+            dev = {k: float(v[i]) for k, v in deviation.items()}
+            results[name] = {"residual": before[i], "after": after[i], "solved_min": float(low[i]),
+                             "solved": {k: v[i] for k, v in solved.items()}, "deviation": dev,
+                             "implausible": [k for k, v in dev.items() if v > PLAUSIBLE_SIGMA]}
+    return results
+
+
+def reconciliation_table(sched, result):
+    """[(period, stock change, ore mined, processed, imbalance, total movement read, solved)] rows."""
+    method = sched.lom_method
+    ore = sched["total_movement"] / (1 + sched["strip_ratio"]) @ interval_weights(sched.years, method, sched.mining).T
+    proc = sched["proc_total"] @ interval_weights(sched.years, method).T
+    stock = np.diff(sched["stockpile"])
+    return [(f"{sched.years[k]}-{sched.years[k + 1]}", float(stock[k]), float(ore[k]), float(proc[k]),
+             float(result["residual"][k]), float(sched["total_movement"][k]),
+             float(result["solved"]["total_movement"][k]))
+            for k in range(len(sched) - 1)]
+
+
+if __name__ == "__main__":
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="Check the stockpile mass balance and back-solve the chart-read series.")
+    parser.add_argument("source", nargs="?",
+                        help="Scenario directory, manifest or column store (default: Figure 14 only)")
+    parser.add_argument("--lom-method", choices=("step", "linear", "mass"), default=None,
+                        help="Interpolation between snapshots (default: linear, or each scenario's own)")
+    args = parser.parse_args()
+
+    if args.source:
+        from scenarios import load_scenarios, scenario_schedule
+        schedules = [(name, scenario_schedule(s)) for name, s in load_scenarios(args.source)]
+    else:
+        schedules = [("Figure 14", load_schedule())]
+    for _, sched in schedules:
+        sched.lom_method = args.lom_method or sched.lom_method
+
+    start = time.perf_counter()
+    results = reconcile(schedules)
+    elapsed = time.perf_counter() - start
+
+    if len(schedules) == 1:
+        name, sched = schedules[0]
+        print(f"{name}: stockpile balance per period, {sched.lom_method} interpolation (Mt)")
+        print(f"{'Period':<11}{'Stock Chg':>10}{'Ore':>8}{'Proc':>8}{'Imbal':>8}{'TM Read':>9}{'TM Solved':>11}")
+        for period, *values in reconciliation_table(sched, results[name]):
+            print(f"{period:<11}" + "".join(f"{v:>{w}.2f}" for v, w in zip(values, (10, 8, 8, 8, 9, 11))))
+        for series in results[name]["implausible"]:
+            print(f"  {series} moved {results[name]['deviation'][series]:.1f} sigma from the chart reading "
+                  f"(> {PLAUSIBLE_SIGMA:g}): the annotations cannot be met within reading error")
+    else:
+        print(f"{'Scenario':<30}{'Max |Imbal|':>12}{'Max |After|':>12}{'Solved Min':>12}{'Max Sigma':>11}")
+        for name, r in results.items():
+            print(f"{name:<30}{np.abs(r['residual']).max():>12.2f}{np.abs(r['after']).max():>12.2e}"
+                  f"{r['solved_min']:>12.2f}{max(r['deviation'].values()):>11.1f}")
+    print(f"\nReconciled {len(schedules)} schedule(s) in {elapsed * 1000:.1f} ms")
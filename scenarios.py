@@ -0,0 +1,239 @@
+"""
+Batch Scenario Workbooks
+Builds one LoM workbook per scenario on a process pool, plus a consolidated
+comparison workbook of the LoM totals for every scenario.
+
+A scenario is a JSON object in the Figure 14 input layout (see FIGURE_14 in
+figure14.py). Keys it leaves out are taken from Figure 14, so
+a strip-ratio variant only needs "strip_ratio"; "lom_method" optionally sets
+the interpolation used for LoM totals.
+
+Scenarios come from either
+  - a directory: every *.json file is one scenario, named after the file,
+  - a manifest: one JSON file mapping scenario name -> scenario file path
+    (relative to the manifest) or an inline scenario object, or
+  - a column store of schedules (see column_store.py); only the input columns
+    are read from it.
+
+--save-store writes every scenario schedule into one column store, so later
+analysis can reload them without parsing the workbooks.
+
+--charts renders the four Figure 14 charts of every scenario in one pass over
+a process pool before the workbooks are built, and embeds them. Charts are
+cached by the content hash of their series (see charts.py). A scenario that
+shares a chart's series with another, or with an earlier run, reuses the PNG
+and does not draw it again.
+
+Each worker receives only the scenario inputs and returns only its LoM
+totals, so throughput scales with the number of workers.
+
+Usage: python scenarios.py SCENARIOS_DIR|MANIFEST.json|STORE.cols [-o OUTDIR] [--workers N] [--streaming]
+                          [--incremental] [--charts] [--save-store STORE.cols]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from column_store import ScheduleStore, is_store, save_schedules
+from figure14 import FIGURE_14
+from generate_mine_plan_excel import (
+    HEADER, METRIC, DATA, NOTE, TITLE, BLANK,
+    auto_width, avg_recovery, build_workbook, lom_grade,
+)
+from lom_schedule import LomSchedule
+
+# (label, function of a LomSchedule -> value) for the comparison workbook
+LOM_METRICS = [
+    ("Total Ore Mined (Mt)", lambda s: round(s.lom_total("ore"), 1)),
+    ("Total Waste Mined (Mt)", lambda s: round(s.lom_total("waste"), 1)),
+    ("Total Movement (Mt)", lambda s: round(s.lom_total("total_movement"), 1)),
+    ("Average Strip Ratio", lambda s: round(s.lom_total("waste") / s.lom_total("ore"), 2)),
+    ("Peak Total Movement (Mt)", lambda s: s.peak("total_movement")[0]),
+    ("Peak Stockpile (Mt)", lambda s: s.peak("stockpile")[0]),
+    ("Total Processing (Mt)", lambda s: round(s.lom_total("proc_total"), 1)),
+    ("Average Li2O Grade (%)", lambda s: round(lom_grade(s), 2)),
+    ("Total Concentrate (Mt)", lambda s: round(s.lom_total("conc_total"), 1)),
+    ("Concentrate Recovery Proxy (%)", avg_recovery),
+]
+
+
+# ==============================================================================
+# SCENARIO INPUTS
+# ==============================================================================
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _checked(name, scenario):
+    if not isinstance(scenario, dict):
+        raise ValueError(f"scenario {name!r}: must be a JSON object, not {type(scenario).__name__}")
+    return name, scenario
+
+
+def load_scenarios(source):
+    """[(name, scenario dict)] from a scenario directory, manifest file or column store."""
+    if is_store(source):
+        store = ScheduleStore(source)
+        return [(name, {**store.inputs(i), "lom_method": store.attrs["lom_method"][i]})
+                for i, name in enumerate(store.scenarios)]
+    if os.path.isdir(source):
+        names = sorted(f for f in os.listdir(source) if f.endswith(".json"))
+        return [_checked(os.path.splitext(f)[0], _read_json(os.path.join(source, f))) for f in names]
+
+    manifest = _read_json(source)
+    if not isinstance(manifest, dict):
+        raise ValueError(f"{source}: manifest must map scenario names to files or objects")
+    here = os.path.dirname(os.path.abspath(source))
+    scenarios = []
+    for name, entry in manifest.items():
+        if isinstance(entry, str):
+            entry = _read_json(os.path.join(here, entry))
+        elif not isinstance(entry, dict):
+            raise ValueError(f"scenario {name!r}: must be a file path or a JSON object, not {type(entry).__name__}")
+        scenarios.append(_checked(name, entry))
+    return scenarios
+
+
+def scenario_schedule(scenario):
+    """LomSchedule for a scenario, with missing inputs taken from Figure 14."""
+    if not isinstance(scenario, dict):
+        raise ValueError(f"scenario must be a JSON object, not {type(scenario).__name__}")
+    unknown = set(scenario) - set(FIGURE_14) - {"lom_method"}
+    if unknown:
+        raise ValueError(f"unknown scenario keys: {', '.join(sorted(unknown))}")
+    sched = LomSchedule.from_inputs({**FIGURE_14, **scenario})
+    sched.lom_method = scenario.get("lom_method", sched.lom_method)
+    return sched
+
+
+# ==============================================================================
+# BUILD
+# ==============================================================================
+
+def _build_one(args):
+    """Build one scenario workbook; returns (name, path, metric values, seconds)."""
+    name, scenario, out_dir, streaming, incremental, charts = args
+    start = time.perf_counter()
+    sched = scenario_schedule(scenario)
+    path = os.path.join(out_dir, f"{name}.xlsx")
+    build_workbook(path, sched, streaming=streaming, incremental=incremental, charts=charts)
+    return name, path, [fn(sched) for _, fn in LOM_METRICS], time.perf_counter() - start
+
+
+def render_scenario_charts(schedules, workers=None, cache_dir=None):
+    """[{sheet title: PNG path}] for [LomSchedule]; uncached charts render in one pool pass."""
+    from charts import CACHE_DIR, CHARTS, chart_jobs, render_charts
+
+    jobs = [job for sched in schedules for job in chart_jobs(sched)]
+    paths, _, _ = render_charts(jobs, workers, cache_dir or CACHE_DIR)
+    n = len(CHARTS)
+    return [dict(zip(CHARTS, paths[i:i + n])) for i in range(0, len(paths), n)]
+
+
+def build_scenarios(scenarios, out_dir, workers=None, streaming=False, incremental=False, charts=False,
+                    chart_cache=None):
+    """Build every (name, scenario) workbook into `out_dir`, `workers` at a time.
+
+    Returns [(name, path, metric values, seconds)] in input order. A scenario
+    with bad inputs raises before any workbook is written. With `charts` the
+    charts of every scenario are rendered (or taken from `chart_cache`) first.
+    """
+    schedules = []
+    for name, scenario in scenarios:
+        try:
+            schedules.append(scenario_schedule(scenario))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"scenario {name!r}: {e}") from None
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = render_scenario_charts(schedules, workers, chart_cache) if charts else [None] * len(scenarios)
+    tasks = [(name, scenario, out_dir, streaming, incremental, chart)
+             for (name, scenario), chart in zip(scenarios, paths)]
+    if workers == 1 or len(tasks) <= 1:
+        return [_build_one(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_build_one, tasks))
+
+
+# ==============================================================================
+# COMPARISON WORKBOOK
+# ==============================================================================
+
+def comparison_rows(sched, results):
+    width = 1 + len(LOM_METRICS)
+    yield ["SCENARIO COMPARISON - LoM Totals by Scenario"], TITLE, width
+    yield [f"{len(results)} scenarios. Base case is Figure 14 as published (CY25 ORE)."], NOTE, width
+    yield BLANK
+    yield ["Scenario"] + [label for label, _ in LOM_METRICS], HEADER, 0
+    yield ["Base (Figure 14)"] + [fn(sched) for _, fn in LOM_METRICS], [METRIC] + [DATA] * len(LOM_METRICS), 0
+    for name, _, values, _ in results:
+        yield [name] + values, [METRIC] + [DATA] * len(values), 0
+
+
+def change_rows(sched, results):
+    width = 1 + len(LOM_METRICS)
+    base = [fn(sched) for _, fn in LOM_METRICS]
+    yield ["SCENARIO COMPARISON - Change vs Base Case (%)"], TITLE, width
+    yield ["Percentage change of each LoM total against Figure 14 as published."], NOTE, width
+    yield BLANK
+    yield ["Scenario"] + [label for label, _ in LOM_METRICS], HEADER, 0
+    for name, _, values, _ in results:
+        change = [round((v - b) / b * 100, 1) if b else "N/A" for v, b in zip(values, base)]
+        yield [name] + change, [METRIC] + [DATA] * len(change), 0
+
+
+def build_comparison(path, results, sched=None):
+    widths = auto_width(1 + len(LOM_METRICS)) | {"A": 30}
+    sheets = [
+        ("Comparison", partial(comparison_rows, results=results), widths, ()),
+        ("Change vs Base", partial(change_rows, results=results), widths, ()),
+    ]
+    return build_workbook(path, sched, sheets=sheets)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build one LoM workbook per scenario plus a comparison workbook.")
+    parser.add_argument("source", help="Directory of scenario *.json files, or a manifest JSON file")
+    parser.add_argument("-o", "--out-dir", default="scenario_workbooks")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--streaming", action="store_true", help="Write-only mode for every workbook")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild sheets whose inputs changed since the last run")
+    parser.add_argument("--comparison", default=None,
+                        help="Comparison workbook path (default: OUTDIR/Scenario_Comparison.xlsx)")
+    parser.add_argument("--charts", action="store_true",
+                        help="Embed the four Figure 14 charts in every workbook (needs matplotlib)")
+    parser.add_argument("--chart-cache", metavar="DIR", default=None,
+                        help="Rendered chart cache (default: .chart_cache next to charts.py)")
+    parser.add_argument("--save-store", metavar="STORE.cols", help="Also save every scenario schedule to a column store")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress the --save-store columns")
+    args = parser.parse_args()
+
+    try:
+        scenarios = load_scenarios(args.source)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    try:
+        results = build_scenarios(scenarios, args.out_dir, args.workers, args.streaming, args.incremental,
+                                  args.charts, args.chart_cache)
+    except ValueError as e:
+        parser.error(str(e))
+    comparison = args.comparison or os.path.join(args.out_dir, "Scenario_Comparison.xlsx")
+    build_comparison(comparison, results)
+    if args.save_store:
+        save_schedules(args.save_store, [(name, scenario_schedule(s)) for name, s in scenarios], args.compress)
+    elapsed = time.perf_counter() - start
+
+    for name, path, _, seconds in results:
+        print(f"{name:<30} {seconds:6.2f}s  {path}")
+    print(f"\n{len(results)} scenario workbooks in {elapsed:.1f}s "
+          f"({len(results) / elapsed:.1f}/s); comparison saved to: {comparison}")
+    if args.save_store:
+        print(f"Scenario schedules saved to: {args.save_store}")
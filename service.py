@@ -0,0 +1,323 @@
+"""
+Workbook Build Service
+Resident watch mode for scenario reviews: keeps one warm interpreter,
+watches the scenario inputs and rebuilds only the workbooks whose inputs
+changed.
+
+openpyxl, numpy, the named styles and the Figure 14 schedule are loaded
+once at start-up, and every scenario is built once. After that an asyncio
+task polls the scenario files (*.json in the scenario directory, or next to
+the manifest). A burst of saves is debounced: the rebuild starts once the
+files have been quiet for --debounce seconds. Only scenarios whose inputs
+differ from the last build are rebuilt, incrementally (see build_workbook),
+and the comparison workbook is rebuilt from the cached LoM totals. A file
+that fails to parse or validate, e.g. one caught mid-save, is reported and
+its last good build is kept. A scenario whose file is deleted drops out of
+the comparison; its workbook is left on disk.
+
+Builds run one at a time on a worker thread, so the request API stays
+responsive. The API is plain HTTP on localhost and returns JSON:
+  GET  /status                   scenarios, outputs, errors and the last build
+  POST /build[?scenario=NAME]    rebuild changed (or the named) scenarios now
+  POST /build?force=1            rebuild every scenario
+  POST /base                     rebuild the Figure 14 workbook (incremental)
+  POST /shutdown                 stop the service
+
+Usage: python service.py SCENARIOS_DIR|MANIFEST.json [-o OUTDIR] [--port 8765] [--debounce 0.5] [--charts]
+       python service.py --request status|build|base|shutdown [--scenario NAME] [--force] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+PORT = 8765
+POLL_SECONDS = 0.25
+DEBOUNCE_SECONDS = 0.5
+
+
+def log(message):
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+# ==============================================================================
+# BUILDS
+# ==============================================================================
+
+class BuildService:
+    """Warm build state: the last built inputs and LoM totals of every scenario."""
+
+    def __init__(self, source, out_dir, comparison=None, streaming=False, charts=False, chart_cache=None,
+                 base_output=None):
+        self.source = source
+        self.out_dir = out_dir
+        self.comparison = comparison or os.path.join(out_dir, "Scenario_Comparison.xlsx")
+        self.streaming = streaming
+        self.charts = charts
+        self.chart_cache = chart_cache
+        self.base_output = base_output
+        self.scenarios = {}         # name -> scenario inputs of its last good build
+        self.results = {}           # name -> (name, path, metric values, seconds)
+        self.errors = {}            # name (or the source) -> message
+        self.builds = 0
+        self.last_build = None
+        self._lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def watch_dir(self):
+        return self.source if os.path.isdir(self.source) else os.path.dirname(os.path.abspath(self.source))
+
+    def _load(self):
+        """({name: scenario}, {name: error}); a directory is read file by file so one bad file
+        does not hide the rest."""
+        from scenarios import _read_json, load_scenarios
+
+        if not os.path.isdir(self.source):
+            try:
+                loaded = load_scenarios(self.source)
+            except (OSError, TypeError, ValueError) as e:
+                return None, {self.source: str(e)}
+        else:
+            loaded = []
+            for file in sorted(f for f in os.listdir(self.source) if f.endswith(".json")):
+                try:
+                    loaded.append((os.path.splitext(file)[0], _read_json(os.path.join(self.source, file))))
+                except (OSError, ValueError) as e:
+                    loaded.append((os.path.splitext(file)[0], e))
+        scenarios, errors = {}, {}
+        for name, scenario in loaded:
+            if isinstance(scenario, dict):
+                scenarios[name] = scenario
+            else:
+                errors[name] = str(scenario) if isinstance(scenario, Exception) else \
+                    f"scenario must be a JSON object, not {type(scenario).__name__}"
+        return scenarios, errors
+
+    def _build(self, names=None, force=False):
+        """Rebuild changed scenarios (or `names`) and the comparison; runs on the worker thread."""
+        from scenarios import _build_one, build_comparison, render_scenario_charts, scenario_schedule
+
+        start = time.perf_counter()
+        scenarios, errors = self._load()
+        if scenarios is None:
+            # unreadable manifest: keep every previous build
+            scenarios = dict(self.scenarios)
+        wanted = set(names) if names else set(scenarios)
+        unknown = wanted - set(scenarios) - set(errors)
+        changed = [name for name in scenarios
+                   if name in wanted and (force or names or scenarios[name] != self.scenarios.get(name))]
+        # scenarios that are gone; a file that failed to read keeps its last build
+        removed = [name for name in self.results if name not in scenarios and name not in errors]
+
+        built = []
+        for name in changed:
+            try:
+                sched = scenario_schedule(scenarios[name])
+                charts = render_scenario_charts([sched], 1, self.chart_cache)[0] if self.charts else None
+                self.results[name] = _build_one((name, scenarios[name], self.out_dir, self.streaming, True, charts))
+            except Exception as e:    # one bad scenario must not stop the others
+                errors[name] = str(e) or repr(e)
+                continue
+            self.scenarios[name] = scenarios[name]
+            built.append(name)
+        for name in removed:
+            del self.results[name]
+            self.scenarios.pop(name, None)
+        if built or removed or not os.path.exists(self.comparison):
+            build_comparison(self.comparison, [self.results[name] for name in sorted(self.results)])
+
+        self.errors = errors
+        self.builds += 1
+        self.last_build = {"built": built, "removed": removed, "unknown": sorted(unknown),
+                           "errors": errors, "seconds": round(time.perf_counter() - start, 3),
+                           "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+        return self.last_build
+
+    def _build_base(self):
+        from generate_mine_plan_excel import build_workbook
+
+        start = time.perf_counter()
+        written = build_workbook(self.base_output, incremental=True)
+        return {"output": self.base_output, "rebuilt": written, "seconds": round(time.perf_counter() - start, 3)}
+
+    async def _run(self, fn, *args):
+        async with self._lock:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def build(self, names=None, force=False):
+        result = await self._run(self._build, names, force)
+        if result["built"] or result["removed"]:
+            log(f"built {len(result['built'])}, removed {len(result['removed'])} in {result['seconds']:.2f}s"
+                + (f": {', '.join(result['built'] + result['removed'])}" if len(result["built"]) <= 10 else ""))
+        for name, error in result["errors"].items():
+            log(f"error in {name}: {error}")
+        return result
+
+    async def build_base(self):
+        result = await self._run(self._build_base)
+        log(f"base workbook: rebuilt {len(result['rebuilt'])} sheet(s) in {result['seconds']:.2f}s")
+        return result
+
+    def status(self):
+        return {"source": self.source, "scenarios": sorted(self.results), "outputs": self.outputs(),
+                "errors": self.errors, "builds": self.builds, "last_build": self.last_build}
+
+    def outputs(self):
+        return {name: path for name, path, _, _ in self.results.values()} | {"comparison": self.comparison}
+
+
+# ==============================================================================
+# WATCHER
+# ==============================================================================
+
+def snapshot(directory):
+    """{path: (mtime_ns, size)} of the *.json files in `directory`."""
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return {}
+    return {e.path: (e.stat().st_mtime_ns, e.stat().st_size) for e in entries
+            if e.name.endswith(".json") and e.is_file()}
+
+
+async def watch(service, interval=POLL_SECONDS, debounce=DEBOUNCE_SECONDS):
+    """Poll the scenario files; build once they have been quiet for `debounce` seconds."""
+    loop = asyncio.get_running_loop()
+    last = snapshot(service.watch_dir)
+    changed_at = None
+    while True:
+        await asyncio.sleep(interval)
+        now = snapshot(service.watch_dir)
+        if now != last:
+            last, changed_at = now, loop.time()
+        elif changed_at is not None and loop.time() - changed_at >= debounce:
+            changed_at = None
+            try:
+                await service.build()
+            except Exception as e:    # keep watching; the next change retries
+                log(f"watch build failed: {e!r}")
+
+
+# ==============================================================================
+# REQUEST API
+# ==============================================================================
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+async def _respond(writer, status, body):
+    data = json.dumps(body, indent=1).encode("utf-8")
+    writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("ascii") + data)
+    await writer.drain()
+    writer.close()
+
+
+def handler(service, stop):
+    """asyncio.start_server callback serving the routes in the module docstring."""
+    async def handle(reader, writer):
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        except ValueError:
+            return await _respond(writer, 400, {"error": "malformed request"})
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        routes = {
+            ("GET", "/status"): lambda: service.status(),
+            ("POST", "/build"): lambda: service.build(query.get("scenario"), query.get("force", ["0"])[0] == "1"),
+            ("POST", "/base"): lambda: service.build_base(),
+            ("POST", "/shutdown"): lambda: stop.set() or {"stopping": True},
+        }
+        if (method, url.path) not in routes:
+            known = any(path == url.path for _, path in routes)
+            return await _respond(writer, 405 if known else 404, {"error": f"{method} {url.path}"})
+        try:
+            result = routes[method, url.path]()
+            result = await result if asyncio.iscoroutine(result) else result
+        except Exception as e:        # a failed build must not stop the service
+            log(f"{method} {url.path} failed: {e!r}")
+            return await _respond(writer, 500, {"error": repr(e)})
+        await _respond(writer, 200, result)
+    return handle
+
+
+async def serve(service, port=PORT, interval=POLL_SECONDS, debounce=DEBOUNCE_SECONDS):
+    stop = asyncio.Event()
+    os.makedirs(service.out_dir, exist_ok=True)
+    result = await service.build(force=True)
+    log(f"warm: {len(service.results)} scenario workbooks in {result['seconds']:.2f}s")
+    server = await asyncio.start_server(handler(service, stop), "127.0.0.1", port)
+    log(f"watching {service.watch_dir}; API on http://127.0.0.1:{port}")
+    watcher = asyncio.create_task(watch(service, interval, debounce))
+    async with server:
+        await stop.wait()
+    watcher.cancel()
+    log("stopped")
+
+
+def request(command, scenario=None, force=False, port=PORT, timeout=600):
+    """Send one request to a running service and return its JSON reply."""
+    from urllib.request import Request, urlopen
+
+    path = {"status": "/status", "build": "/build", "base": "/base", "shutdown": "/shutdown"}[command]
+    params = [f"scenario={name}" for name in scenario or ()] + (["force=1"] if force else [])
+    req = Request(f"http://127.0.0.1:{port}{path}" + ("?" + "&".join(params) if params else ""),
+                  method="GET" if command == "status" else "POST")
+    with urlopen(req, timeout=timeout) as response:
+        return json.load(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch scenario inputs and rebuild their workbooks in a warm process.")
+    parser.add_argument("source", nargs="?", help="Directory of scenario *.json files, or a manifest JSON file")
+    parser.add_argument("-o", "--out-dir", default="scenario_workbooks")
+    parser.add_argument("--comparison", default=None,
+                        help="Comparison workbook path (default: OUTDIR/Scenario_Comparison.xlsx)")
+    parser.add_argument("--base-output",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Greenbushes_LoM_Analysis.xlsx"),
+                        help="Workbook rebuilt by POST /base")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Seconds between file polls")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help="Quiet seconds after the last edit before rebuilding")
+    parser.add_argument("--streaming", action="store_true", help="Write-only mode for every workbook")
+    parser.add_argument("--charts", action="store_true", help="Embed the four Figure 14 charts (needs matplotlib)")
+    parser.add_argument("--chart-cache", metavar="DIR", default=None)
+    parser.add_argument("--request", choices=("status", "build", "base", "shutdown"),
+                        help="Send a request to a running service instead of starting one")
+    parser.add_argument("--scenario", nargs="+", help="Scenarios for --request build (default: changed ones)")
+    parser.add_argument("--force", action="store_true", help="--request build: rebuild even if unchanged")
+    args = parser.parse_args(argv)
+
+    if args.request:
+        try:
+            reply = request(args.request, args.scenario, args.force, args.port)
+        except OSError as e:
+            parser.exit(1, f"no service on port {args.port}: {e}\n")
+        print(json.dumps(reply, indent=1))
+        return
+    if not args.source:
+        parser.error("a scenario directory or manifest is required to start the service")
+
+    # load the heavy modules and the base schedule before the first request
+    import generate_mine_plan_excel
+    import scenarios  # noqa: F401
+    generate_mine_plan_excel.default_schedule()
+
+    service = BuildService(args.source, args.out_dir, args.comparison, args.streaming, args.charts,
+                           args.chart_cache, args.base_output)
+    try:
+        asyncio.run(serve(service, args.port, args.interval, args.debounce))
+    except KeyboardInterrupt:
+        log("interrupted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Monte Carlo uncertainty for the chart-read Figure 14 series.
+
+Annotated values (strip ratios, stockpiles, grades, concentrate totals) are
+taken as exact. Series read off the chart by eye (total movement, plant-by-plant
+processing and concentrate bands) are perturbed with a reading error of the
+given sigma. The error is lognormal with the point value as its mean, so
+draws never go negative and a reading of 0 (no band) stays 0.
+Each batch of draws is one (n_samples, n_years) array per series and goes
+through lom_schedule.derive_columns in a single vectorized pass. LoM totals
+cover every year of the schedule: each is one matrix product with the
+resample.total_weights of the schedule's interpolation method.
+
+Usage: python uncertainty.py [-n SAMPLES] [--workers N] [--seed SEED]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lom_schedule import MINING_INPUTS, PLANTS, derive_columns, safe_ratio
+from resample import LEVELS, MINING_FLOWS, total_weights
+
+# 1-sigma reading error (Mt) of the chart-read series
+READING_SIGMA = {
+    "total_movement": 1.25,                     # +/- 2-3 Mt margin on a 0-80 Mt axis
+    **{f"proc_{p}": 0.25 for p in PLANTS},      # stacked bands on a 0-12 Mt axis
+    **{f"conc_{p}": 0.05 for p in PLANTS},      # stacked bands on a 0-3 Mt axis
+}
+
+PERCENTILES = (10, 50, 90)
+SHARD_SIZE = 20_000
+
+
+def lom_weights(sched):
+    """Full-period total weights per kind of series for sched.lom_method."""
+    level_method = "linear" if sched.lom_method == "mass" else sched.lom_method
+    return {
+        "mining": total_weights(sched.years, sched.lom_method, sched.mining),
+        "flow": total_weights(sched.years, sched.lom_method),
+        "level": total_weights(sched.years, level_method) / (len(sched.resample()) or 1),
+    }
+
+
+def _weights(w, name):
+    if name in MINING_FLOWS or name == "total_movement":
+        return w["mining"]
+    return w["level"] if name in LEVELS else w["flow"]
+
+
+def _peak(a):
+    return a.max(axis=-1)
+
+
+def _total(name):
+    return lambda c, w: c[name] @ _weights(w, name)
+
+
+# (label, function of derived columns and LoM weights -> one value per sample)
+METRICS = [
+    ("Total Ore Mined (Mt)", _total("ore")),
+    ("Total Waste Mined (Mt)", _total("waste")),
+    ("Total Movement (Mt)", _total("total_movement")),
+    ("Average Strip Ratio", lambda c, w: _total("waste")(c, w) / _total("ore")(c, w)),
+    ("Peak Total Movement (Mt)", lambda c, w: _peak(c["total_movement"])),
+    ("Peak Strip Ratio", lambda c, w: _peak(c["strip_ratio"])),
+    ("Peak Stockpile (Mt)", lambda c, w: _peak(c["stockpile"])),
+    *[(f"Processing {p.upper()} (Mt)", _total(f"proc_{p}")) for p in PLANTS],
+    ("Total Processing (Mt)", _total("proc_total")),
+    ("Average Li2O Grade (%)", _total("li2o_grade")),
+    *[(f"Concentrate {p.upper()} (Mt)", _total(f"conc_{p}")) for p in PLANTS],
+    ("Total Concentrate (Mt)", _total("conc_total")),
+    ("Concentrate Recovery Proxy (%)",
+     lambda c, w: _total("conc_total")(c, w) / _total("proc_total")(c, w) * 100),
+]
+
+
+def evaluate(columns, weights):
+    """Stack every metric into an array of shape (..., len(METRICS))."""
+    return np.stack([np.broadcast_to(fn(columns, weights), np.shape(columns["proc_total"])[:-1])
+                     for _, fn in METRICS], axis=-1)
+
+
+def draw(sched, n, rng, sigma=READING_SIGMA):
+    """Derived columns for `n` perturbed copies of `sched`, shaped (n, n_years)."""
+    columns = {name: sched[name] for name in sched.columns}
+    for name, sd in sigma.items():
+        # lognormal with mean = the reading and standard deviation = sd; 0 where the reading is 0
+        s = np.sqrt(np.log1p(safe_ratio(sd, sched[name]) ** 2))
+        values = sched[name] * np.exp(s * (rng.standard_normal((n, len(sched))) - s / 2))
+        if name in MINING_INPUTS:
+            values *= sched.mining
+        columns[name] = values
+    return derive_columns(columns, decimals=None)
+
+
+def _run_shard(args):
+    sched, n, seed_seq, sigma = args
+    return evaluate(draw(sched, n, np.random.default_rng(seed_seq), sigma), lom_weights(sched))
+
+
+def simulate(sched, n=10_000, seed=None, workers=1, shard_size=SHARD_SIZE, sigma=READING_SIGMA):
+    """Draw `n` schedules and return the metric samples, shape (n, len(METRICS)).
+
+    Draws are split into shards of `shard_size` with independent seeds spawned
+    from `seed`, so results do not depend on `workers`. With `workers > 1` the
+    shards run on a process pool.
+    """
+    sizes = [shard_size] * (n // shard_size)
+    if n % shard_size:
+        sizes.append(n % shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(sched, size, s, sigma) for size, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard, tasks))
+    else:
+        results = [_run_shard(t) for t in tasks]
+    return np.concatenate(results)
+
+
+def summarize(sched, samples):
+    """[(label, point, p10, p50, p90)] for every metric."""
+    point = evaluate(sched.columns, lom_weights(sched))
+    pct = np.percentile(samples, PERCENTILES, axis=0)
+    return [(label, float(point[i]), *(float(p) for p in pct[:, i]))
+            for i, (label, _) in enumerate(METRICS)]
+
+
+if __name__ == "__main__":
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="Monte Carlo P10/P50/P90 for the LoM totals.")
+    parser.add_argument("-n", "--samples", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Process pool size (0 = all {os.cpu_count()} cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    schedule = load_schedule()
+
+    samples = simulate(schedule, args.samples, seed=args.seed, workers=args.workers or os.cpu_count())
+    print(f"{'Metric':<34}{'Point':>10}{'P10':>10}{'P50':>10}{'P90':>10}")
+    for label, *values in summarize(schedule, samples):
+        print(f"{label:<34}" + "".join(f"{v:>10.2f}" for v in values))
@@ -0,0 +1,194 @@
+"""
+DCF Valuation
+Values the LoM schedule over whole grids of SC6 price decks, FX rates and
+discount rates in one broadcast array operation.
+
+Unit costs and capital are the CY25 ORE Table 5 figures quoted in
+investment-analysis.md (real A$, 100% basis). Prices and FX are not disclosed
+in the release, so they are inputs.
+
+Shapes: price decks (P,) flat or (P, T) by year, FX (F,), discount rates (R,).
+T is the annual axis (odd years interpolated between the even-year snapshots).
+Cash flows are (P, F, T); NPV is (P, F, R); IRR is (P, F); breakeven price is
+(F, R).
+
+Usage: python valuation.py [--prices 800 1200 1600] [--fx 0.65] [--rates 0.0732] [--development-years 1]
+"""
+
+import argparse
+
+import numpy as np
+
+# ── Table 5 unit costs ──
+MINING_COST_PER_M3 = 20.27                  # A$/m3 moved
+DENSITY_T_PER_M3 = 841.0 / 296.0            # 841 Mt total movement = 296 Mm3
+PROCESSING_COST = 49.48                     # A$/t ore processed
+GA_COST = 13.41
+SUSTAINING_CAPEX = 18.13
+TRANSPORT_COST = 5.18
+WATER_COST = 2.03
+ROYALTY_RATE = 0.05                         # WA State royalty, 5% of FoB revenue
+
+# ── Total LoM capital (A$M) ──
+DEVELOPMENT_CAPEX = 2525.0                  # spread evenly over the first DEVELOPMENT_YEARS
+DEVELOPMENT_YEARS = 1                       # upfront, so the first year is an outflow
+EXPANSIONARY_CAPEX = 269.0                  # first year
+CLOSURE_COST = 425.0                        # final year
+
+DISCOUNT_RATE = 0.0732                      # LoM, real
+TAX_RATE = 0.30
+IGO_SHARE = 0.2499
+
+PER_TONNE_PROCESSED = PROCESSING_COST + GA_COST + SUSTAINING_CAPEX + TRANSPORT_COST + WATER_COST
+
+
+def annual_columns(sched, names=("conc_total", "proc_total", "total_movement")):
+    """Annual years, mining mask and columns, interpolated between the
+    snapshots with the schedule's LoM method (see resample.py)."""
+    annual = sched.resample("annual")
+    return annual.years, annual.mining, {name: annual[name] for name in names}
+
+
+def cost_profile(sched, development_years=DEVELOPMENT_YEARS):
+    """(years, concentrate Mt, pre-royalty costs A$M, capex A$M) on the annual axis.
+
+    Development capex is spread evenly over the first `development_years`
+    mining years (all of them if that is 0 or more than there are).
+    """
+    years, mining, cols = annual_columns(sched)
+    opex = (cols["total_movement"] * MINING_COST_PER_M3 / DENSITY_T_PER_M3
+            + cols["proc_total"] * PER_TONNE_PROCESSED)
+    capex = np.zeros(len(years))
+    development = np.flatnonzero(mining)[:development_years or None]
+    capex[development] += DEVELOPMENT_CAPEX / max(len(development), 1)
+    capex[0] += EXPANSIONARY_CAPEX
+    capex[-1] += CLOSURE_COST
+    return years, cols["conc_total"], opex, capex
+
+
+def cash_flows(sched, prices, fx, share=1.0, development_years=DEVELOPMENT_YEARS):
+    """After-tax cash flow (A$M) with shape (P, F, T).
+
+    `prices` are US$/t SC6, flat (P,) or by year (P, T); `fx` is US$ per A$.
+    Tax is charged on positive operating margin (no depreciation shield).
+    """
+    years, conc, opex, capex = cost_profile(sched, development_years)
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[:, None] if prices.ndim == 1 else prices
+    fx = np.asarray(fx, dtype=np.float64)
+
+    revenue = conc * prices[:, None, :] / fx[None, :, None]          # (P, F, T)
+    margin = revenue * (1 - ROYALTY_RATE) - opex
+    cf = margin - TAX_RATE * np.maximum(margin, 0.0) - capex
+    return years, cf * share
+
+
+def discount_factors(years, rates):
+    """(R, T) mid-year discount factors back to the start of the first year."""
+    t = years - years[0] + 0.5
+    return (1.0 + np.asarray(rates, dtype=np.float64)[:, None]) ** -t[None, :]
+
+
+def npv(cf, years, rates):
+    return cf @ discount_factors(years, rates).T
+
+
+def irr(cf, years, lo=0.0, hi=50.0, iterations=60):
+    """IRR of every cash-flow row by vectorized bisection.
+
+    Only defined where the first year is an outflow and NPV changes sign
+    within [lo, hi]; NaN otherwise. The bracket starts at 0%: below it the
+    final-year closure outflow dominates and NPV turns negative again.
+    """
+    t = years - years[0] + 0.5
+    f = lambda r: (cf * (1.0 + r[..., None]) ** -t).sum(axis=-1)  # noqa: E731
+    lo = np.full(cf.shape[:-1], lo)
+    hi = np.full(cf.shape[:-1], hi)
+    f_lo = f(lo)
+    valid = (np.sign(f_lo) != np.sign(f(hi))) & (cf[..., 0] < 0)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        f_mid = f(mid)
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(left, mid, lo)
+        f_lo = np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+    return np.where(valid, (lo + hi) / 2, np.nan)
+
+
+def breakeven_price(sched, fx, rates, hi=20_000.0, iterations=50, development_years=DEVELOPMENT_YEARS):
+    """Flat US$/t SC6 price giving NPV = 0, shape (F, R).
+
+    NaN where NPV is still not positive at `hi`: there is no breakeven in
+    the range searched.
+    """
+    fx = np.asarray(fx, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    years, conc, opex, capex = cost_profile(sched, development_years)
+    df = discount_factors(years, rates)                                # (R, T)
+
+    def positive(price):
+        margin = conc * price[..., None] / fx[:, None, None] * (1 - ROYALTY_RATE) - opex
+        cf = margin - TAX_RATE * np.maximum(margin, 0.0) - capex      # (F, R, T)
+        return (cf * df[None]).sum(axis=-1) > 0
+
+    lo = np.zeros((len(fx), len(rates)))
+    hi = np.full_like(lo, hi)
+    found = positive(hi)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        above = positive(mid)
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    return np.where(found, (lo + hi) / 2, np.nan)
+
+
+def evaluate_grid(sched, prices, fx=(0.65,), rates=(DISCOUNT_RATE,), share=1.0,
+                  development_years=DEVELOPMENT_YEARS):
+    """NPV, IRR and breakeven over the full price x FX x rate grid."""
+    years, cf = cash_flows(sched, prices, fx, share, development_years)
+    return {
+        "years": years,
+        "prices": np.asarray(prices, dtype=np.float64),
+        "fx": np.asarray(fx, dtype=np.float64),
+        "rates": np.asarray(rates, dtype=np.float64),
+        "cash_flows": cf,
+        "npv": npv(cf, years, rates),
+        "irr": irr(cf, years),
+        "breakeven": breakeven_price(sched, fx, rates, development_years=development_years),
+        "share": share,
+        "development_years": development_years,
+        "lom_method": sched.lom_method,
+    }
+
+
+def _pct(value, width=10):
+    return f"{value:>{width}.1%}" if np.isfinite(value) else f"{'n/a':>{width}}"
+
+
+if __name__ == "__main__":
+    from figure14 import load_schedule
+
+    parser = argparse.ArgumentParser(description="NPV / IRR / breakeven over price, FX and discount-rate grids.")
+    parser.add_argument("--prices", type=float, nargs="+", default=[800, 1200, 1600, 2000],
+                        help="Flat SC6 prices (US$/t)")
+    parser.add_argument("--fx", type=float, nargs="+", default=[0.65], help="US$ per A$")
+    parser.add_argument("--rates", type=float, nargs="+", default=[DISCOUNT_RATE])
+    parser.add_argument("--igo", action="store_true", help=f"IGO's {IGO_SHARE:.2%} share instead of 100%")
+    parser.add_argument("--development-years", type=int, default=DEVELOPMENT_YEARS,
+                        help="Spread development capex over this many first years (0: all mining years)")
+    args = parser.parse_args()
+    if args.development_years < 0:
+        parser.error("--development-years must be 0 or more")
+    schedule = load_schedule()
+
+    result = evaluate_grid(schedule, args.prices, args.fx, args.rates, IGO_SHARE if args.igo else 1.0,
+                           args.development_years)
+    for fi, fx in enumerate(result["fx"]):
+        print(f"\nFX {fx:.3f} US$/A$ - NPV (A$M)")
+        print(f"{'Price US$/t':>12}" + "".join(f"{r:>10.2%}" for r in result["rates"]) + f"{'IRR':>10}")
+        for pi, price in enumerate(result["prices"]):
+            print(f"{price:>12,.0f}" + "".join(f"{v:>10,.0f}" for v in result["npv"][pi, fi])
+                  + _pct(result["irr"][pi, fi]))
+        print(f"{'Breakeven':>12}" + "".join(f"{v:>10,.0f}" if np.isfinite(v) else f"{'n/a':>10}"
+                                             for v in result["breakeven"][fi]))